@@ -0,0 +1,99 @@
+"""Check that one aggregator keeps up with many local capture agents
+
+Starts an aggregator and AGENTS agent processes. Every agent reports a
+color change for each of its areas every check (the worst case: every
+pixel flickering) and a trigger every tenth check, through the same
+EventSender the real agents use. No display or sound is needed:
+    
+    python benchmarks/aggregator_benchmark.py [agents]
+
+The aggregator keeps up if it receives every event sent and the lag from
+sample to arrival stays around the agents' batch interval.
+"""
+
+import os
+import sys
+import time
+import socket
+import tempfile
+import multiprocessing
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.pixel_monitor.alerts import AlertBus
+from src.pixel_monitor.remote import Aggregator, EventSender
+
+
+AGENTS = 32
+AREAS = 50  # Areas per agent
+CHECK_INTERVAL = 0.05
+SECONDS = 5
+
+
+def agent_process(address, name, results):
+    """Send samples and triggers like a monitor with every pixel changing"""
+    sender = EventSender(address, name)
+    sender.set_areas([{"id": i, "sound_file": "alert.wav", "volume": 50} for i in range(AREAS)])
+    sender.start()
+    deadline = time.monotonic() + SECONDS
+    tick = 0
+    next_tick = time.monotonic()
+    while next_tick < deadline:
+        now = time.time()
+        for area_id in range(AREAS):
+            sender.sample(area_id, now, (tick % 256, area_id % 256, 0))
+        if tick % 10 == 0:
+            sender.trigger(tick // 10 % AREAS, now, (255, 0, 0))
+        tick += 1
+        next_tick += CHECK_INTERVAL
+        time.sleep(max(0.0, next_tick - time.monotonic()))
+    sender.stop(5)
+    results.put((sender.sent, sender.dropped, sender.batches))
+
+
+def main():
+    agents = int(sys.argv[1]) if len(sys.argv) > 1 else AGENTS
+    if hasattr(socket, 'AF_UNIX'):
+        address = f"unix://{os.path.join(tempfile.gettempdir(), f'pixelsoundalert-bench-{os.getpid()}.sock')}"
+    else:
+        address = "tcp://127.0.0.1:0"
+    
+    alert_bus = AlertBus(policy='merge')
+    alert_bus.add_sink('count', lambda alert: None)
+    alert_bus.start()
+    aggregator = Aggregator(address, alert_bus=alert_bus)
+    aggregator.start()
+    if address.startswith('tcp://'):
+        address = f"tcp://127.0.0.1:{aggregator.address[1]}"
+    
+    results = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=agent_process, args=(address, f"agent-{n}", results))
+                 for n in range(agents)]
+    start_cpu = time.process_time()
+    start = time.perf_counter()
+    for process in processes:
+        process.start()
+    totals = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    
+    # Let the last batches arrive
+    sent = sum(t[0] for t in totals)
+    deadline = time.monotonic() + 5
+    while aggregator.events < sent and time.monotonic() < deadline:
+        time.sleep(0.05)
+    elapsed = time.perf_counter() - start
+    cpu = time.process_time() - start_cpu
+    aggregator.stop()
+    alert_bus.stop(2)
+    
+    print(f"{agents} agents x {AREAS} areas, {SECONDS} s")
+    print(f"sent {sent} events in {sum(t[2] for t in totals)} batches, agents dropped {sum(t[1] for t in totals)}")
+    print(f"received {aggregator.events} events ({aggregator.events / SECONDS:.0f}/s), "
+          f"{aggregator.triggers} triggers, {aggregator.bytes_received / 1024:.0f} KiB")
+    print(f"lag: smoothed {aggregator.lag * 1000:.1f} ms, max {aggregator.max_lag * 1000:.1f} ms")
+    print(f"aggregator process CPU: {cpu / elapsed * 100:.0f}% of one core")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Benchmark screen capture backends
+
+Compares X11 MIT-SHM capture with PIL.ImageGrab. Run it on a Linux desktop
+or headless under Xvfb:
+    
+    xvfb-run -s "-screen 0 1920x1080x24" python benchmarks/capture_benchmark.py
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.pixel_monitor.monitor.capture import ImageGrabCapture, X11ShmCapture
+
+
+SIZES = [(1, 1), (16, 16), (64, 64), (256, 256)]
+ITERATIONS = 500
+
+
+def bench(backend, width, height):
+    """Time grabs of one rectangle size; returns (microseconds per grab, peak traced bytes) or None"""
+    for _ in range(10):
+        if backend.grab(100, 100, width, height) is None:
+            return None
+    
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        frame = backend.grab(100, 100, width, height)
+        frame.pixel(0, 0)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] - before
+    tracemalloc.stop()
+    return elapsed / ITERATIONS * 1e6, max(peak, 0)
+
+
+def main():
+    backends = [ImageGrabCapture()]
+    try:
+        backends.append(X11ShmCapture())
+    except (RuntimeError, OSError) as e:
+        print(f"X11 MIT-SHM capture unavailable: {e}")
+    
+    print(f"{'backend':<10} {'size':>9} {'us/grab':>10} {'peak alloc B':>13}")
+    for backend in backends:
+        for width, height in SIZES:
+            result = bench(backend, width, height)
+            if result is None:
+                print(f"{backend.name:<10} {f'{width}x{height}':>9} {'grab failed':>24}")
+                continue
+            per_grab, peak = result
+            print(f"{backend.name:<10} {f'{width}x{height}':>9} {per_grab:>10.1f} {peak:>13}")
+        backend.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Compare incremental and full histogram updates
+
+Simulates a 400x40 health bar whose fill changes by a few pixels in a
+handful of rows per check, the common case for progress and health bars,
+so no display is needed:
+    
+    python benchmarks/histogram_benchmark.py
+
+The incremental update only re-quantizes the rows that changed and should
+be several times faster than counting the whole region again.
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.pixel_monitor.monitor.capture import CaptureFrame
+from src.pixel_monitor.monitor.histogram import ColorHistogram
+
+
+WIDTH = 400
+HEIGHT = 40
+CHANGED_ROWS = 4  # Rows touched per check, e.g. a small marker moving along the bar
+CHECKS = 200
+
+
+def create_frames():
+    """Frames of a bar (4 bytes per pixel like X11) with a marker moving along it"""
+    stride = WIDTH * 4
+    base = bytearray(stride * HEIGHT)
+    for y in range(HEIGHT):
+        for x in range(WIDTH):
+            i = y * stride + x * 4
+            base[i:i + 3] = bytes((20, 20 + y, 200)) if x < WIDTH // 2 else bytes((40, 40, 40))
+    
+    frames = []
+    for n in range(CHECKS):
+        data = bytearray(base)
+        x = n % (WIDTH - 8)
+        for y in range(CHANGED_ROWS):
+            for dx in range(8):
+                i = y * stride + (x + dx) * 4
+                data[i:i + 3] = bytes((10, 10, 250))
+        frames.append(CaptureFrame(0, 0, WIDTH, HEIGHT, bytes(data), stride, 4, (2, 1, 0)))
+    return frames
+
+
+def main():
+    frames = create_frames()
+    
+    incremental = ColorHistogram()
+    incremental.scan(frames[0])
+    start = time.perf_counter()
+    for frame in frames:
+        incremental.scan(frame)
+    incremental_time = (time.perf_counter() - start) / CHECKS
+    
+    start = time.perf_counter()
+    for frame in frames:
+        # A fresh histogram has no previous frame and counts every row
+        ColorHistogram().scan(frame)
+    full_time = (time.perf_counter() - start) / CHECKS
+    
+    print(f"{WIDTH}x{HEIGHT} region, {CHANGED_ROWS} rows changing per check")
+    print(f"full:        {full_time * 1000:6.3f} ms/check")
+    print(f"incremental: {incremental_time * 1000:6.3f} ms/check")
+
+
+if __name__ == "__main__":
+    main()
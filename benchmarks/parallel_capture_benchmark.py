@@ -0,0 +1,81 @@
+"""Compare serial and per-display parallel capture
+
+Simulates three displays whose grabs take 4, 8 and 12 ms (the time a real
+backend spends waiting on the display server, with the GIL released), so no
+display is needed:
+    
+    python benchmarks/parallel_capture_benchmark.py
+
+Serial capture should take about the sum of the latencies per tick, parallel
+capture about the slowest one.
+"""
+
+import os
+import sys
+import time
+from array import array
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.pixel_monitor.monitor.capture import CaptureFrame
+from src.pixel_monitor.monitor.displays import Display
+from src.pixel_monitor.monitor.parallel_capture import ParallelCapture
+
+
+DISPLAY_WIDTH = 1920
+LATENCIES = [0.004, 0.008, 0.012]  # Seconds per grab on each display
+PIXELS_PER_DISPLAY = 20
+TICKS = 50
+
+
+class SlowCapture:
+    """Capture backend whose grabs wait like a display server round trip"""
+    
+    name = 'slow'
+    
+    def grab(self, left, top, width, height):
+        time.sleep(LATENCIES[left // DISPLAY_WIDTH])
+        return CaptureFrame(left, top, width, height, bytes(width * height * 3), width * 3, 3, (0, 1, 2))
+    
+    def read_pixel_into(self, x, y, buffer, offset):
+        frame = self.grab(x, y, 1, 1)
+        frame.copy_pixel(0, 0, buffer, offset)
+        return True
+    
+    def close(self):
+        pass
+
+
+def main():
+    displays = [Display(i, i * DISPLAY_WIDTH, 0, DISPLAY_WIDTH, 1080) for i in range(len(LATENCIES))]
+    coordinates = [(d.left + 100 + j, 200) for d in displays for j in range(PIXELS_PER_DISPLAY)]
+    pixels = array('B', bytes(3 * len(coordinates)))
+    valid = bytearray(len(coordinates))
+    
+    # Serial: one grab of each display's bounding rectangle in turn, like a single capture thread
+    serial = ParallelCapture(displays, backend_factory=lambda name: SlowCapture())
+    serial.configure(coordinates, pixels, valid)
+    capture = SlowCapture()
+    start = time.perf_counter()
+    for _ in range(TICKS):
+        for index in range(len(displays)):
+            serial._capture_display(capture, index)
+    serial_tick = (time.perf_counter() - start) / TICKS
+    
+    parallel = ParallelCapture(displays, backend_factory=lambda name: SlowCapture())
+    parallel.start()
+    parallel.configure(coordinates, pixels, valid)
+    start = time.perf_counter()
+    for _ in range(TICKS):
+        parallel.sample()
+    parallel_tick = (time.perf_counter() - start) / TICKS
+    parallel.close()
+    
+    print(f"{len(displays)} displays, {len(coordinates)} pixels, grab latencies "
+          f"{', '.join(f'{latency * 1000:.0f}' for latency in LATENCIES)} ms")
+    print(f"serial:   {serial_tick * 1000:6.2f} ms/tick")
+    print(f"parallel: {parallel_tick * 1000:6.2f} ms/tick (slowest display {max(LATENCIES) * 1000:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Time template searches against the monitor's check interval
+
+Draws a cluttered synthetic screen, moves an icon around it and times how
+long TemplateMatcher takes to find it for a few template and region sizes.
+No display is needed:
+    
+    python benchmarks/template_match_benchmark.py
+
+A search should take well below the 50 ms check interval; regions whose
+pixels did not change are not searched again and cost almost nothing.
+"""
+
+import os
+import sys
+import time
+import random
+
+from PIL import Image, ImageDraw
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.pixel_monitor.monitor.capture import CaptureFrame
+from src.pixel_monitor.monitor.template_match import TemplateMatcher
+
+
+CASES = [(16, 120, 90), (32, 240, 180), (48, 400, 300)]  # (icon size, region width, region height)
+SEARCHES = 20
+
+
+def create_icon(size):
+    """An icon with some structure to lock onto"""
+    icon = Image.new('RGB', (size, size), (255, 255, 255))
+    draw = ImageDraw.Draw(icon)
+    draw.ellipse([2, 2, size - 3, size - 3], fill=(200, 30, 30))
+    draw.rectangle([size // 3, size // 4, size // 3 + size // 4, size * 3 // 4], fill=(255, 255, 0))
+    return icon
+
+
+def create_background(width, height, rng):
+    """Random rectangles, so there are plenty of near misses"""
+    background = Image.new('RGB', (width, height), (40, 40, 60))
+    draw = ImageDraw.Draw(background)
+    for _ in range(width * height // 700):
+        x, y = rng.randrange(width), rng.randrange(height)
+        color = tuple(rng.randrange(256) for _ in range(3))
+        draw.rectangle([x, y, x + rng.randrange(3, 30), y + rng.randrange(3, 30)], fill=color)
+    return background
+
+
+def to_frame(image):
+    """Wrap an image like a capture backend would"""
+    return CaptureFrame(0, 0, image.width, image.height, image.tobytes(), image.width * 3, 3, (0, 1, 2))
+
+
+def main():
+    rng = random.Random(0)
+    for size, width, height in CASES:
+        icon = create_icon(size)
+        background = create_background(width, height, rng)
+        matcher = TemplateMatcher(icon)
+        
+        frames = []
+        positions = []
+        for _ in range(SEARCHES):
+            position = (rng.randrange(width - size), rng.randrange(height - size))
+            screen = background.copy()
+            screen.paste(icon, position)
+            frames.append(to_frame(screen))
+            positions.append(position)
+        
+        matcher.scan(to_frame(background))  # Warm up the cached kernels
+        found = 0
+        start = time.perf_counter()
+        for frame, position in zip(frames, positions):
+            if matcher.scan(frame) and matcher.position == position:
+                found += 1
+        search = (time.perf_counter() - start) / SEARCHES
+        
+        start = time.perf_counter()
+        for _ in range(SEARCHES):
+            matcher.scan(frames[-1])
+        unchanged = (time.perf_counter() - start) / SEARCHES
+        
+        print(f"{size}x{size} icon in {width}x{height} region ({matcher.levels} levels): "
+              f"{search * 1000:6.2f} ms/search, unchanged {unchanged * 1000:5.2f} ms, found {found}/{SEARCHES}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Check webhook batching, retries and the flush on shutdown against a local receiver
+
+Starts a stand-in webhook receiver on 127.0.0.1 that answers every
+FAIL_EVERY-th request with HTTP 503, sends bursts of alerts through the
+same WebhookSink the app uses, and stops it with the app's flush timeout.
+No network access is needed:
+    
+    python benchmarks/webhook_benchmark.py [alerts]
+
+The sink behaves if every alert arrives, in a few requests per connection,
+with the 503 responses retried, and nothing is left queued after stop().
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.pixel_monitor.alerts import WebhookSink
+
+
+ALERTS = 500
+BURST = 25  # Alerts submitted at once, e.g. many areas firing on one check
+BURST_INTERVAL = 0.05
+FAIL_EVERY = 5  # Every fifth request is answered with 503
+FLUSH_TIMEOUT = 2.0  # WEBHOOK_FLUSH_TIMEOUT of the app
+
+
+class _Receiver(BaseHTTPRequestHandler):
+    """Stand-in webhook endpoint counting what it receives"""
+    
+    protocol_version = "HTTP/1.1"  # Keep connections open between requests
+    
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+    
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        with self.server.lock:
+            self.server.requests += 1
+            fail = self.server.requests % FAIL_EVERY == 0
+            if not fail:
+                alerts = json.loads(body)["alerts"]
+                self.server.alerts += len(alerts)
+                self.server.largest_batch = max(self.server.largest_batch, len(alerts))
+        self.send_response(503 if fail else 204)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+    
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    alerts = int(sys.argv[1]) if len(sys.argv) > 1 else ALERTS
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _Receiver)
+    server.lock = threading.Lock()
+    server.connections = server.requests = server.alerts = server.largest_batch = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    
+    sink = WebhookSink(f"http://127.0.0.1:{server.server_address[1]}/alerts", backoff=0.05)
+    sink.start()
+    area = {'id': 0, 'sound_file': 'alert.wav', 'baseline_color': (0, 0, 0)}
+    start = time.perf_counter()
+    for n in range(alerts):
+        sink.submit(area)
+        if n % BURST == BURST - 1:
+            time.sleep(BURST_INTERVAL)
+    
+    # Like closing the app right after the last alert
+    stop_start = time.perf_counter()
+    sink.stop(FLUSH_TIMEOUT)
+    stopped = time.perf_counter()
+    server.shutdown()
+    
+    print(f"submitted {alerts} alerts in {(stop_start - start) * 1000:.0f} ms, "
+          f"stop() took {(stopped - stop_start) * 1000:.0f} ms")
+    print(f"receiver: {server.alerts} alerts in {server.requests} requests over {server.connections} "
+          f"connections, largest batch {server.largest_batch}")
+    print(f"sink: sent {sink.sent}, retries {sink.retries}, failed {sink.failed}, dropped {sink.dropped}, "
+          f"left queued {sink.queue_depth()}")
+    if server.alerts != alerts or sink.queue_depth():
+        print("Alerts were lost")
+        sys.exit(1)
+    print("All alerts delivered")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,55 @@
 """Main entry point for Pixel Monitor application"""
 
-import tkinter as tk
-from src.pixel_monitor.app import PixelMonitorApp
+import argparse
 
 
 def main():
-    """Main function to start the application"""
+    """Main function to start the application, or a headless agent or aggregator"""
+    parser = argparse.ArgumentParser(description="PixelSoundAlert")
+    parser.add_argument('--agent', metavar='ADDRESS',
+                        help="monitor LAYOUT without the GUI and send alerts to the aggregator at "
+                             "tcp://host:port or unix:///path")
+    parser.add_argument('--aggregator', metavar='ADDRESS',
+                        help="play the alerts of agents connecting to tcp://host:port or unix:///path")
+    parser.add_argument('--name', help="agent name shown by the aggregator (default: host name)")
+    parser.add_argument('--sounds', metavar='DIR',
+                        help="directory the aggregator plays sound files from (default: current directory)")
+    parser.add_argument('--calibrate', action='store_true',
+                        help="measure how quickly this machine detects a color change and suggest a check interval")
+    parser.add_argument('--trials', type=int, default=50, help="color flips measured by --calibrate (default: 50)")
+    parser.add_argument('--interval', type=float,
+                        help="check interval in seconds measured by --calibrate (default: check_interval in config.json)")
+    parser.add_argument('--sound', metavar='FILE', help="sound played on every detection during --calibrate")
+    parser.add_argument('layout', nargs='?', help="layout file monitored by --agent")
+    args = parser.parse_args()
+    
+    if args.agent:
+        if not args.layout:
+            parser.error("--agent needs a layout file")
+        from src.pixel_monitor.remote import run_agent
+        run_agent(args.agent, args.layout, name=args.name)
+        return
+    if args.aggregator:
+        from src.pixel_monitor.remote import run_aggregator
+        run_aggregator(args.aggregator, sound_dir=args.sounds)
+        return
+    
+    import tkinter as tk
+    if args.calibrate:
+        from src.pixel_monitor.config import SettingsManager
+        from src.pixel_monitor.gui import LatencyCalibration
+        settings_manager = SettingsManager()
+        root = tk.Tk()
+        check_interval = args.interval or settings_manager.get_check_interval()
+        calibration = LatencyCalibration(root, trials=args.trials, check_interval=check_interval,
+                                         sound_file=args.sound,
+                                         event_driven=settings_manager.get_event_driven_capture(),
+                                         parallel_capture=settings_manager.get_parallel_capture())
+        calibration.start()
+        root.mainloop()
+        return
+    
+    from src.pixel_monitor.app import PixelMonitorApp
     root = tk.Tk()
     app = PixelMonitorApp(root)
     root.mainloop()
@@ -13,4 +57,3 @@ def main():
 
 if __name__ == "__main__":
     main()
-
@@ -0,0 +1,7 @@
+"""Alert dispatch, and alert sinks besides sound playback"""
+
+from .webhook import WebhookSink
+from .alert_log import AlertLog
+from .dispatch import AlertBus, Alert, OVERFLOW_POLICIES
+
+__all__ = ['WebhookSink', 'AlertLog', 'AlertBus', 'Alert', 'OVERFLOW_POLICIES']
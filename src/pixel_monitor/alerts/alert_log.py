@@ -0,0 +1,300 @@
+"""Append-only JSON lines log of fired alerts"""
+
+import os
+import json
+import time
+import queue
+import threading
+
+
+class AlertLog:
+    """
+    Records alerts to a rotating JSON lines file from a background thread
+    
+    submit() only puts the record on a queue. The writer thread collects
+    whatever arrived within flush_interval and writes it with one buffered
+    write and flush, so the monitor thread never waits for the disk. When
+    the file would grow past max_bytes it is renamed to path.1 (path.1 to
+    path.2, ...) and a new file is started.
+    
+    Every line starts with the area number and timestamp. Each batch is
+    written in timestamp order, and an alert is never logged much later than
+    the ones raised after it, so query() can skip whole files and binary
+    search the rest instead of parsing everything; it looks ORDER_SLACK
+    seconds past both ends of the window for alerts that arrived late.
+    """
+    
+    ORDER_SLACK = 60.0  # Seconds an alert may be written after a later one
+    
+    def __init__(self, path, max_bytes=5 * 1024 * 1024, backup_count=3,
+                 flush_interval=0.5, max_batch=256, queue_size=1024):
+        """
+        Initialize alert log
+        
+        Args:
+            path: JSON lines file alerts are appended to
+            max_bytes: Size at which the file is rotated
+            backup_count: Rotated files kept as path.1 .. path.N
+            flush_interval: Seconds the writer waits for more alerts before writing a batch
+            max_batch: Maximum number of alerts per write
+            queue_size: Alerts held while the disk is slow; newer alerts are dropped when full
+        """
+        self.path = os.path.abspath(path)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._file = None
+        self._size = 0
+        self._file_lock = threading.Lock()  # Held while writing or rotating, so queries see whole files
+        self._running = False
+        self._worker = None
+        
+        # Counters
+        self.written = 0  # Alerts written to disk
+        self.dropped = 0  # Alerts discarded because the queue was full
+        self.failed = 0  # Alerts lost to write errors
+        self.rotations = 0
+    
+    def start(self):
+        """Start the writer thread"""
+        if self._running:
+            return
+        self._running = True
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+    
+    def stop(self, timeout=None):
+        """Stop the writer thread after it writes what is already queued"""
+        if not self._running:
+            return
+        self._running = False
+        self._worker.join(timeout)
+        with self._file_lock:
+            self._close()
+    
+    def submit(self, area, color=None, sampled_at=None, timestamp=None):
+        """
+        Queue an alert for an area; never blocks the caller
+        
+        Args:
+            area: Area that fired
+            color: Pixel A color that fired the alert
+            sampled_at: time.time() of the sample that fired it, to record the latency until now
+            timestamp: time.time() the alert was raised, defaults to now
+        """
+        now = time.time()
+        # Key order matters: query() matches on the leading "area" and "timestamp"
+        record = {
+            "area": area['id'] + 1,
+            "timestamp": timestamp if timestamp is not None else now,
+            "color": list(color) if color else None,
+            "baseline_color": list(area['baseline_color']) if area.get('baseline_color') else None,
+            "latency": round(now - sampled_at, 6) if sampled_at is not None else None
+        }
+        try:
+            self._queue.put_nowait(record)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+    
+    def queue_depth(self):
+        """Number of alerts waiting to be written"""
+        return self._queue.qsize()
+    
+    def query(self, area=None, since=None, until=None, limit=None):
+        """
+        Get logged alerts, oldest first
+        
+        Alerts still waiting in the queue are not included.
+        
+        Args:
+            area: Area number as shown in the GUI (1-based), or None for all areas
+            since: Earliest timestamp (inclusive), e.g. time.time() - 86400 for the last day
+            until: Latest timestamp (inclusive)
+            limit: Return at most this many of the newest matching alerts
+        
+        Returns:
+            List of alert dictionaries
+        """
+        prefix = f'{{"area": {area},'.encode('utf-8') if area is not None else None
+        results = []
+        with self._file_lock:
+            if self._file is not None:
+                self._file.flush()
+            paths = self._files()
+            for n, path in enumerate(paths):
+                # Files are in time order: skip those that end before the window
+                if since is not None and n + 1 < len(paths):
+                    next_first = self._first_timestamp(paths[n + 1])
+                    if next_first is not None and next_first < since - self.ORDER_SLACK:
+                        continue
+                if self._read_range(path, prefix, since, until, results):
+                    break
+        # Late alerts sit after some newer ones in the file
+        results.sort(key=lambda record: record["timestamp"])
+        if limit is not None:
+            results = results[-limit:] if limit else []
+        return results
+    
+    def _read_range(self, path, prefix, since, until, results):
+        """
+        Append the matching alerts of one file to results
+        
+        Returns:
+            True if the file reached past until, so later files can be skipped
+        """
+        slack = self.ORDER_SLACK
+        try:
+            f = open(path, 'rb')
+        except OSError:
+            return False
+        with f:
+            if since is not None:
+                f.seek(self._seek_timestamp(f, since - slack))
+            for line in f:
+                # Filter on the leading fields before paying for json.loads
+                timestamp = self._line_timestamp(line)
+                if timestamp is None:
+                    continue
+                if until is not None and timestamp > until:
+                    if timestamp > until + slack:
+                        return True
+                    continue
+                if since is not None and timestamp < since:
+                    continue
+                if prefix is not None and not line.startswith(prefix):
+                    continue
+                try:
+                    results.append(json.loads(line))
+                except ValueError:
+                    pass  # Partly written line after a crash
+        return False
+    
+    def _files(self):
+        """Existing log files, oldest first"""
+        paths = [f"{self.path}.{n}" for n in range(self.backup_count, 0, -1)] + [self.path]
+        return [path for path in paths if os.path.exists(path)]
+    
+    @staticmethod
+    def _line_timestamp(line):
+        """Read the timestamp of a log line without parsing all of it"""
+        start = line.find(b'"timestamp": ')
+        if start < 0:
+            return None
+        start += len(b'"timestamp": ')
+        end = line.find(b',', start)
+        try:
+            return float(line[start:end if end >= 0 else None])
+        except ValueError:
+            return None
+    
+    def _first_timestamp(self, path):
+        """Timestamp of the first alert in a file, or None"""
+        try:
+            with open(path, 'rb') as f:
+                return self._line_timestamp(f.readline())
+        except OSError:
+            return None
+    
+    def _seek_timestamp(self, f, timestamp):
+        """Binary search the offset of the first line at or after timestamp"""
+        f.seek(0, os.SEEK_END)
+        lo, hi = 0, f.tell()
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._line_after(f, mid)[1] >= timestamp:
+                hi = mid
+            else:
+                lo = mid + 1
+        return self._line_after(f, lo)[0]
+    
+    def _line_after(self, f, offset):
+        """(offset, timestamp) of the first line starting at or after offset; timestamp is inf past the end"""
+        f.seek(offset - 1 if offset else 0)
+        if offset:
+            f.readline()  # Finish the line offset lies in, unless offset starts a line
+        start = f.tell()
+        line = f.readline()
+        if not line:
+            return start, float('inf')
+        timestamp = self._line_timestamp(line)
+        # Unreadable lines count as old so the search moves past them
+        return start, timestamp if timestamp is not None else float('-inf')
+    
+    def _run(self):
+        """Collect alerts into batches and write them"""
+        while self._running or not self._queue.empty():
+            try:
+                first = self._queue.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            
+            # Gather everything that arrives within the flush interval
+            batch = [first]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._running:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            
+            self._write(batch)
+    
+    def _write(self, batch):
+        """Append one batch with a single write and flush"""
+        # Alerts can be submitted out of order, e.g. by several AlertBus
+        # workers; query() allows for the few that miss their batch
+        batch.sort(key=lambda record: record["timestamp"])
+        data = "".join(json.dumps(record) + "\n" for record in batch).encode('utf-8')
+        with self._file_lock:
+            try:
+                if self._file is None:
+                    self._open()
+                if self._size and self._size + len(data) > self.max_bytes:
+                    self._rotate()
+                self._file.write(data)
+                self._file.flush()
+                self._size += len(data)
+                self.written += len(batch)
+            except OSError as e:
+                print(f"Error writing alert log: {e}")
+                self._close()
+                self.failed += len(batch)
+    
+    def _open(self):
+        """Open the log file for appending"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(self.path, 'ab', buffering=64 * 1024)
+        self._size = self._file.tell()
+    
+    def _rotate(self):
+        """Shift path -> path.1 -> path.2 ..., dropping the oldest file"""
+        self._close()
+        if self.backup_count > 0:
+            for n in range(self.backup_count - 1, 0, -1):
+                source = f"{self.path}.{n}"
+                if os.path.exists(source):
+                    os.replace(source, f"{self.path}.{n + 1}")
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self.rotations += 1
+        self._open()
+    
+    def _close(self):
+        """Close the log file"""
+        if self._file is not None:
+            try:
+                self._file.close()
+            except OSError:
+                pass
+            self._file = None
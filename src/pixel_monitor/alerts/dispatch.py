@@ -0,0 +1,220 @@
+"""Bounded dispatch of alerts from the monitor to the alert sinks"""
+
+import time
+import threading
+from collections import deque
+
+
+OVERFLOW_POLICIES = ('drop_oldest', 'merge', 'block')
+
+
+class Alert:
+    """An area that fired, on its way to the sinks"""
+    
+    def __init__(self, area, color=None, sampled_at=None):
+        self.area = area
+        self.color = color  # Pixel A color that fired the alert
+        self.sampled_at = sampled_at  # time.time() of the sample that fired it
+        self.published_at = time.time()
+
+
+class AlertBus:
+    """
+    Hands alerts to the sinks through a bounded queue and a fixed worker pool
+    
+    publish() queues one delivery per sink and returns, so the monitor thread
+    never runs a sink itself. Workers take the oldest delivery whose sink is
+    below its concurrency limit, so a slow sink occupies at most that many
+    workers and the others keep serving the remaining sinks.
+    
+    When the queue is full, the overflow policy decides:
+        drop_oldest: discard the oldest queued delivery
+        merge: replace the queued delivery of the same area and sink with the
+               new alert, and discard the oldest delivery if there is none
+        block: wait for free slots, at most block_timeout per publish() in
+               total, then discard the deliveries that found no room
+    """
+    
+    def __init__(self, workers=4, queue_size=256, policy='drop_oldest', block_timeout=0.5):
+        """
+        Initialize alert bus
+        
+        Args:
+            workers: Threads delivering alerts to the sinks
+            queue_size: Deliveries held while the sinks are busy
+            policy: What to do when the queue is full, one of OVERFLOW_POLICIES
+            block_timeout: Seconds one publish() waits for space with the block policy, over all sinks (None: forever)
+        """
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Alert overflow policy must be one of {', '.join(OVERFLOW_POLICIES)}, got {policy!r}")
+        self.workers = workers
+        self.queue_size = queue_size
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.profiler = None  # Optional SessionProfiler wrapped around deliveries
+        
+        self._sinks = []
+        self._queue = deque()  # (sink, Alert) deliveries, oldest first
+        self._condition = threading.Condition()
+        self._running = False
+        self._threads = []
+        
+        # Counters
+        self.published = 0  # Alerts published
+        self.dropped = 0  # Deliveries discarded because the queue was full
+        self.merged = 0  # Deliveries replaced by a newer alert of the same area
+    
+    def add_sink(self, name, handler, limit=1):
+        """
+        Register a sink
+        
+        Args:
+            name: Name shown in the metrics
+            handler: Called with each Alert on a worker thread
+            limit: Maximum number of alerts handled by this sink at once
+        """
+        with self._condition:
+            self._sinks.append(_Sink(name, handler, limit))
+    
+    def sinks(self):
+        """Registered sinks and their counters"""
+        with self._condition:
+            return list(self._sinks)
+    
+    def start(self):
+        """Start the worker threads"""
+        if self._running:
+            return
+        self._running = True
+        self._threads = [threading.Thread(target=self._run, daemon=True) for _ in range(self.workers)]
+        for thread in self._threads:
+            thread.start()
+    
+    def stop(self, timeout=None):
+        """Stop the workers after they deliver what is already queued"""
+        if not self._running:
+            return
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        for thread in self._threads:
+            thread.join(max(0.0, deadline - time.monotonic()) if deadline is not None else None)
+    
+    def publish(self, area, color=None, sampled_at=None):
+        """
+        Queue an alert for every sink
+        
+        Only waits with the block policy while the queue is full, and then at
+        most block_timeout for all sinks together, since it runs on the
+        monitor thread.
+        
+        Returns:
+            True if no delivery of this alert was discarded
+        """
+        alert = Alert(area, color, sampled_at)
+        delivered = True
+        deadline = None
+        if self.policy == 'block' and self.block_timeout is not None:
+            deadline = time.monotonic() + self.block_timeout
+        with self._condition:
+            self.published += 1
+            for sink in self._sinks:
+                delivered = self._enqueue(sink, alert, deadline) and delivered
+            self._condition.notify_all()
+        return delivered
+    
+    def queue_depth(self):
+        """Number of deliveries waiting for a worker"""
+        return len(self._queue)
+    
+    def _enqueue(self, sink, alert, deadline=None):
+        """
+        Queue one delivery, applying the overflow policy; called with the lock held
+        
+        Args:
+            deadline: time.monotonic() until which the block policy may wait (None: forever)
+        """
+        queue = self._queue
+        if len(queue) >= self.queue_size:
+            if self.policy == 'merge':
+                area_id = alert.area['id']
+                for i, (queued_sink, queued) in enumerate(queue):
+                    if queued_sink is sink and queued.area['id'] == area_id:
+                        # Keep the place in the queue, deliver the newer alert
+                        queue[i] = (sink, alert)
+                        self.merged += 1
+                        sink.merged += 1
+                        return True
+            elif self.policy == 'block':
+                while len(queue) >= self.queue_size and self._running:
+                    remaining = deadline - time.monotonic() if deadline is not None else None
+                    if remaining is not None and remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                if len(queue) >= self.queue_size:
+                    self.dropped += 1
+                    sink.dropped += 1
+                    return False
+            
+            if len(queue) >= self.queue_size:
+                oldest_sink, oldest = queue.popleft()
+                self.dropped += 1
+                oldest_sink.dropped += 1
+        
+        queue.append((sink, alert))
+        return True
+    
+    def _take(self):
+        """Remove the oldest delivery whose sink has room; called with the lock held"""
+        queue = self._queue
+        for i, (sink, alert) in enumerate(queue):
+            if sink.active < sink.limit:
+                del queue[i]
+                sink.active += 1
+                return sink, alert
+        return None
+    
+    def _run(self):
+        """Deliver queued alerts until stopped and drained"""
+        while True:
+            with self._condition:
+                delivery = self._take()
+                while delivery is None:
+                    if not self._running and not self._queue:
+                        return
+                    self._condition.wait(0.2)
+                    delivery = self._take()
+                # A slot was freed for publishers waiting with the block policy
+                self._condition.notify_all()
+            
+            sink, alert = delivery
+            succeeded = False
+            try:
+                handler = self.profiler.wrap(sink.handler) if self.profiler else sink.handler
+                handler(alert)
+                succeeded = True
+            except Exception as e:
+                print(f"Error delivering alert to {sink.name}: {e}")
+            finally:
+                with self._condition:
+                    sink.active -= 1
+                    if succeeded:
+                        sink.delivered += 1
+                    else:
+                        sink.failed += 1
+                    self._condition.notify_all()
+
+
+class _Sink:
+    """A registered sink and its counters"""
+    
+    def __init__(self, name, handler, limit):
+        self.name = name
+        self.handler = handler
+        self.limit = max(1, limit)
+        self.active = 0  # Alerts being handled right now
+        self.delivered = 0
+        self.failed = 0  # Handler raised
+        self.dropped = 0  # Deliveries discarded because the queue was full
+        self.merged = 0  # Deliveries replaced by a newer alert
@@ -0,0 +1,171 @@
+"""Batched HTTP webhook alert sink"""
+
+import json
+import time
+import queue
+import threading
+import http.client
+from urllib.parse import urlsplit
+
+
+class WebhookSink:
+    """Forwards alerts to an HTTP endpoint from a background thread"""
+    
+    def __init__(self, url, batch_window=0.25, max_batch=50, queue_size=256,
+                 max_retries=3, backoff=0.5, timeout=5.0):
+        """
+        Initialize webhook sink
+        
+        Args:
+            url: http:// or https:// URL alerts are POSTed to as JSON
+            batch_window: Seconds to wait for more alerts after the first one of a batch
+            max_batch: Maximum number of alerts per request
+            queue_size: Alerts held while the receiver is slow; newer alerts are dropped when full
+            max_retries: Retries per batch after the first attempt
+            backoff: Delay before the first retry, doubled for every further retry
+            timeout: Socket timeout per request in seconds
+        """
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https') or not parts.hostname:
+            raise ValueError(f"Webhook URL must be http:// or https://, got {url!r}")
+        
+        self.url = url
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        
+        self._scheme = parts.scheme
+        self._host = parts.hostname
+        self._port = parts.port
+        self._path = (parts.path or '/') + (f"?{parts.query}" if parts.query else '')
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._connection = None
+        self._running = False
+        self._worker = None
+        
+        # Counters
+        self.sent = 0  # Alerts delivered
+        self.dropped = 0  # Alerts discarded because the queue was full
+        self.failed = 0  # Alerts discarded after running out of retries
+        self.retries = 0
+    
+    def start(self):
+        """Start the delivery thread"""
+        if self._running:
+            return
+        self._running = True
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+    
+    def stop(self, timeout=None):
+        """
+        Stop the delivery thread after it sends what is already queued
+        
+        Args:
+            timeout: Seconds to wait for the queue to drain; alerts still
+                queued or retrying after that are abandoned
+        """
+        if not self._running:
+            return
+        self._running = False
+        self._worker.join(timeout)
+        if not self._worker.is_alive():
+            # Otherwise the worker is still using the connection
+            self._close()
+    
+    def submit(self, area, timestamp=None):
+        """
+        Queue an alert for an area; never blocks the caller
+        
+        Args:
+            area: Area that fired
+            timestamp: time.time() the alert was raised, defaults to now
+        """
+        alert = {
+            "area": area['id'] + 1,
+            "timestamp": timestamp if timestamp is not None else time.time(),
+            "sound_file": area.get('sound_file'),
+            "baseline_color": list(area['baseline_color']) if area.get('baseline_color') else None
+        }
+        try:
+            self._queue.put_nowait(alert)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+    
+    def queue_depth(self):
+        """Number of alerts waiting to be sent"""
+        return self._queue.qsize()
+    
+    def _run(self):
+        """Collect alerts into batches and deliver them"""
+        while self._running or not self._queue.empty():
+            try:
+                first = self._queue.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            
+            # Gather everything that arrives within the batch window
+            batch = [first]
+            deadline = time.monotonic() + self.batch_window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            
+            self._deliver(batch)
+    
+    def _deliver(self, batch):
+        """POST one batch, retrying with exponential backoff"""
+        body = json.dumps({"alerts": batch}).encode('utf-8')
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self.retries += 1
+                time.sleep(self.backoff * (2 ** (attempt - 1)))
+            try:
+                status = self._post(body)
+            except (OSError, http.client.HTTPException) as e:
+                # Connection is in an unknown state, reconnect on the next attempt
+                self._close()
+                print(f"Error sending webhook: {e}")
+                continue
+            
+            if status < 300:
+                self.sent += len(batch)
+                return
+            if status < 500 and status != 429:
+                print(f"Webhook rejected alerts with HTTP {status}")
+                break
+            print(f"Webhook returned HTTP {status}, retrying")
+        
+        self.failed += len(batch)
+    
+    def _post(self, body):
+        """Send a request over the persistent connection and return the status"""
+        if self._connection is None:
+            connection_class = http.client.HTTPSConnection if self._scheme == 'https' else http.client.HTTPConnection
+            self._connection = connection_class(self._host, self._port, timeout=self.timeout)
+        
+        self._connection.request("POST", self._path, body=body, headers={
+            "Content-Type": "application/json",
+            "Connection": "keep-alive"
+        })
+        response = self._connection.getresponse()
+        # Read the whole response so the connection can be reused
+        response.read()
+        if response.will_close:
+            self._close()
+        return response.status
+    
+    def _close(self):
+        """Close the persistent connection"""
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
@@ -2,15 +2,24 @@
 
 import os
 import json
+import atexit
 import tkinter as tk
 from tkinter import filedialog, messagebox
 
-from .config import SettingsManager, LayoutManager
-from .monitor import PixelMonitor, ColorUtils
+from .config import SettingsManager, LayoutManager, LayoutWatcher
+from .monitor import PixelMonitor, ColorUtils, AreaRegistry, RulePlan
 from .audio import AudioPlayer
+from .metrics import MetricsServer, SessionProfiler
+from .alerts import WebhookSink, AlertLog, AlertBus
 from .gui import MainWindow, AreaWidget
 
 
+MAGNIFIER_REFRESH_MS = 200  # Magnifiers are redrawn at most this often
+ALERT_WORKERS = 4  # Threads delivering alerts to the sound, webhook and log sinks
+SOUND_CONCURRENCY = 2  # Sounds prepared at once; more alerts wait in the alert queue
+WEBHOOK_FLUSH_TIMEOUT = 2.0  # Seconds queued webhook alerts may take to send on exit
+
+
 class PixelMonitorApp:
     """Main application class"""
     
@@ -22,22 +31,97 @@ class PixelMonitorApp:
         self.root.minsize(900, 200)
         
         # Core variables
-        self.areas = []  # List of area dictionaries
+        self.areas = AreaRegistry()  # Area dictionaries indexed by ID and coordinates
         self.area_counter = 0  # To assign unique IDs
         self.current_area_id = None  # Track which area is being edited
+        self.layout_configs = {}  # area id -> configuration it was loaded with from the layout file
+        self.layout_watcher = None
         
         # Initialize components
         self.settings_manager = SettingsManager()
         self.layout_manager = LayoutManager()
-        self.pixel_monitor = PixelMonitor(check_interval=0.05)
+        self.magnifier_radius = self.settings_manager.get_magnifier_radius()
+        self.magnifier_job = None  # Pending root.after refresh of the magnifiers
+        self.pixel_monitor = PixelMonitor(
+            check_interval=self.settings_manager.get_check_interval(),
+            event_driven=self.settings_manager.get_event_driven_capture(),
+            parallel_capture=self.settings_manager.get_parallel_capture(),
+            magnifier_radius=self.magnifier_radius
+        )
         self.audio_player = AudioPlayer()
         self.color_utils = ColorUtils()
+        self.metrics_server = None
+        
+        # Profiling can be toggled from the GUI or with SIGUSR1
+        self.profiler = SessionProfiler()
+        self.pixel_monitor.profiler = self.profiler
+        self.profiler.install_signal_toggle()
+        
+        # Alerts reach the sinks through a bounded queue and worker pool, so no sink delays monitoring
+        try:
+            self.alert_bus = AlertBus(workers=ALERT_WORKERS,
+                                      queue_size=self.settings_manager.get_alert_queue_size(),
+                                      policy=self.settings_manager.get_alert_overflow())
+        except ValueError as e:
+            print(f"Error configuring alert queue: {e}")
+            self.alert_bus = AlertBus(workers=ALERT_WORKERS, queue_size=self.settings_manager.get_alert_queue_size())
+        self.alert_bus.profiler = self.profiler
+        self.alert_bus.add_sink('sound', lambda alert: self.audio_player.play_sound_sync(alert.area),
+                                limit=SOUND_CONCURRENCY)
+        self.alert_bus.start()
+        
+        # Optional local metrics endpoint (enable with "metrics_port" in config.json)
+        metrics_port = self.settings_manager.get_metrics_port()
+        if metrics_port:
+            try:
+                self.metrics_server = MetricsServer(self.pixel_monitor, self.audio_player, port=int(metrics_port),
+                                                   alert_bus=self.alert_bus)
+                self.metrics_server.start()
+            except Exception as e:
+                print(f"Error starting metrics endpoint: {e}")
+                self.metrics_server = None
+        
+        # Optional webhook alert forwarding (enable with "webhook_url" in config.json)
+        self.webhook_sink = None
+        webhook_url = self.settings_manager.get_webhook_url()
+        if webhook_url:
+            try:
+                self.webhook_sink = WebhookSink(webhook_url)
+                self.webhook_sink.start()
+                self.alert_bus.add_sink('webhook', lambda alert: self.webhook_sink.submit(
+                    alert.area, timestamp=alert.published_at))
+                # Send what is still queued when the window is closed
+                atexit.register(self.webhook_sink.stop, WEBHOOK_FLUSH_TIMEOUT)
+            except ValueError as e:
+                print(f"Error starting webhook sink: {e}")
+        
+        # Optional alert history (enable with "alert_log" in config.json)
+        self.alert_log = None
+        alert_log_path = self.settings_manager.get_alert_log_path()
+        if alert_log_path:
+            self.alert_log = AlertLog(alert_log_path, max_bytes=self.settings_manager.get_alert_log_max_bytes())
+            self.alert_log.start()
+            self.alert_bus.add_sink('log', lambda alert: self.alert_log.submit(
+                alert.area, color=alert.color, sampled_at=alert.sampled_at, timestamp=alert.published_at))
+            # Write what is still queued when the window is closed
+            atexit.register(self.alert_log.stop, 2.0)
+        # Registered last so it runs first: queued alerts reach the sinks before they stop
+        atexit.register(self.alert_bus.stop, 1.0)
         
         # Setup GUI
         self.main_window = MainWindow(self.root, self)
         
         # Add first area by default
         self.add_area()
+        
+        # Optionally keep the last loaded layout in sync with its file (enable with "watch_layout" in config.json)
+        last_loaded_file = self.settings_manager.get_last_loaded_file()
+        if self.settings_manager.get_watch_layout() and last_loaded_file and os.path.exists(last_loaded_file):
+            try:
+                self.load_layout_from_file(last_loaded_file, show_success=False)
+            except Exception as e:
+                print(f"Error loading last layout: {e}")
+            self.watch_layout(last_loaded_file)
     
     def add_area(self):
         """Add a new monitoring area"""
@@ -52,13 +136,17 @@ class PixelMonitorApp:
             'sound_file': None,
             'baseline_color': None,
             'condition_color': None,
-            'color_changed': False,
+            'pixels': {},  # Extra named pixels referenced by 'rule'
+            'templates': {},  # Named template images searched for by 'rule'
+            'histograms': {},  # Named region color histograms used by 'rule'
+            'rule': None,  # Optional trigger rule, see RulePlan
             'use_condition': tk.BooleanVar(value=False),
             'ui': {}  # Store UI element references
         }
         
-        self.areas.append(area)
+        self.areas.add(area)
         self._create_area_ui(area)
+        return area
     
     def _create_area_ui(self, area):
         """Create UI for a single area"""
@@ -69,10 +157,11 @@ class PixelMonitorApp:
             'capture_condition': self.capture_condition_color,
             'select_sound': self.select_sound,
             'toggle_condition': self.toggle_condition_ui,
+            'settings_changed': self.on_area_settings_changed,
             'remove_area': self.remove_area
         }
         
-        AreaWidget(self.main_window.scrollable_frame, area, callbacks)
+        AreaWidget(self.main_window.scrollable_frame, area, callbacks, magnifier_radius=self.magnifier_radius)
     
     def remove_area(self, area_id):
         """Remove an area"""
@@ -80,20 +169,21 @@ class PixelMonitorApp:
             messagebox.showwarning("Warning", "Cannot remove the last area!")
             return
         
-        # Find and remove area
-        area = self.get_area_by_id(area_id)
+        # Remove from registry first, the monitor drops it at its next tick
+        area = self.areas.remove(area_id)
         if area:
             # Destroy UI
             area['ui']['frame'].destroy()
-            # Remove from list
-            self.areas.remove(area)
+    
+    def on_area_settings_changed(self, area_id):
+        """Let the monitor pick up edited area settings"""
+        area = self.get_area_by_id(area_id)
+        if area:
+            self.areas.reindex(area)
     
     def get_area_by_id(self, area_id):
         """Get area by ID"""
-        for area in self.areas:
-            if area['id'] == area_id:
-                return area
-        return None
+        return self.areas.get(area_id)
     
     def select_coordinates(self, area_id):
         """Let user click on screen to select coordinates"""
@@ -104,6 +194,7 @@ class PixelMonitorApp:
         area = self.get_area_by_id(area_id)
         if area:
             area['coordinates'] = (x, y)
+            self.areas.reindex(area)
             area['ui']['coord_label'].config(text=f"X:{x} Y:{y}", fg="green")
             self.update_color_display(area_id)
     
@@ -121,6 +212,7 @@ class PixelMonitorApp:
         
         if current_color:
             area['baseline_color'] = current_color
+            self.areas.reindex(area)
             hex_color = self.color_utils.rgb_to_hex(current_color)
             area['ui']['baseline_display'].config(bg=hex_color)
         else:
@@ -137,6 +229,7 @@ class PixelMonitorApp:
         area['ui']['coord_condition_label'].config(state=state)
         area['ui']['condition_display'].config(state=state)
         area['ui']['condition_btn'].config(state=state)
+        self.areas.reindex(area)
     
     def select_coordinates_condition(self, area_id):
         """Let user click on screen to select condition pixel (Pixel B)"""
@@ -147,6 +240,7 @@ class PixelMonitorApp:
         area = self.get_area_by_id(area_id)
         if area:
             area['coordinates_condition'] = (x, y)
+            self.areas.reindex(area)
             area['ui']['coord_condition_label'].config(text=f"X:{x} Y:{y}", fg="green")
     
     def capture_condition_color(self, area_id):
@@ -163,6 +257,7 @@ class PixelMonitorApp:
         
         if current_color:
             area['condition_color'] = current_color
+            self.areas.reindex(area)
             hex_color = self.color_utils.rgb_to_hex(current_color)
             area['ui']['condition_display'].config(bg=hex_color)
         else:
@@ -184,6 +279,7 @@ class PixelMonitorApp:
             area = self.get_area_by_id(area_id)
             if area:
                 area['sound_file'] = file_path
+                self.areas.reindex(area)
                 filename = file_path.split("/")[-1].split("\\")[-1]
                 if len(filename) > 12:
                     filename = filename[:9] + "..."
@@ -192,42 +288,88 @@ class PixelMonitorApp:
     def toggle_monitoring(self):
         """Toggle monitoring on/off for all areas"""
         if not self.pixel_monitor.monitoring:
-            # Validate all areas
-            for area in self.areas:
-                area_num = area['id'] + 1
-                if not area['coordinates']:
-                    messagebox.showwarning("Warning", f"Area {area_num}: Please select coordinates!")
-                    return
-                if not area['sound_file']:
-                    messagebox.showwarning("Warning", f"Area {area_num}: Please select a sound file!")
-                    return
-                if not area['baseline_color']:
-                    messagebox.showwarning("Warning", f"Area {area_num}: Please capture baseline color!")
-                    return
-                
-                if area['use_condition'].get():
-                    if not area['coordinates_condition']:
-                        messagebox.showwarning("Warning", f"Area {area_num}: Condition enabled but Pixel B not selected!")
-                        return
-                    if not area['condition_color']:
-                        messagebox.showwarning("Warning", f"Area {area_num}: Condition enabled but Pixel B color not captured!")
-                        return
+            # Areas that are not fully set up are skipped until they are
+            snapshot = self.areas.snapshot()
+            ready = snapshot.ready()
+            if not ready:
+                problems = "\n".join(f"Area {area['id'] + 1}: {area['problem']}" for area in snapshot)
+                messagebox.showwarning("Warning", f"No area is ready to monitor:\n{problems}")
+                return
             
             # Start monitoring
             self.main_window.update_toggle_button("STOP ALL", "#f44336")
-            self.main_window.update_status("Monitoring all areas...", "green")
+            if len(ready) == len(snapshot):
+                self.main_window.update_status("Monitoring all areas...", "green")
+            else:
+                self.main_window.update_status(
+                    f"Monitoring {len(ready)} of {len(snapshot)} areas (others join once set up)...", "green")
             
             self.pixel_monitor.start_monitoring(
                 self.areas,
                 self.update_color_display,
-                self.audio_player.play_sound
+                self.trigger_alert
             )
+            if self.magnifier_radius > 0:
+                if self.magnifier_job:
+                    self.root.after_cancel(self.magnifier_job)
+                self.refresh_magnifiers()
         else:
             # Stop monitoring
             self.pixel_monitor.stop_monitoring()
+            self.pixel_monitor.cancel_magnifier()
             self.main_window.update_toggle_button("START ALL", "#FF9800")
             self.main_window.update_status("Stopped", "gray")
     
+    def toggle_profiling(self):
+        """Start or stop profiling the monitor and audio threads"""
+        dump_path = self.profiler.toggle(on_done=self._on_profile_written)
+        if self.profiler.active:
+            self.main_window.update_profile_button("STOP Profiling", "#f44336")
+            self.main_window.update_status("Profiling...", "purple")
+        else:
+            self.main_window.update_profile_button("Profile", "#607D8B")
+            self.main_window.update_status(f"Writing profile to {dump_path}...", "gray")
+    
+    def _on_profile_written(self, path, error):
+        """Report the outcome of a profile dump; called on the dump thread"""
+        if error:
+            self.root.after(0, self.main_window.update_status, f"Profile not saved: {error}", "red")
+        else:
+            self.root.after(0, self.main_window.update_status, f"Profile saved to {path}", "gray")
+    
+    def trigger_alert(self, area):
+        """Publish a triggered area to the alert sinks; called on the monitor thread"""
+        history = self.pixel_monitor.get_history(area['id'])
+        sample = history.latest() if history else None
+        if sample:
+            self.alert_bus.publish(area, color=sample[1], sampled_at=sample[2])
+        else:
+            self.alert_bus.publish(area)
+    
+    def refresh_magnifiers(self):
+        """Show the neighbourhoods the monitor captured, then ask for the next ones"""
+        self.magnifier_job = None
+        monitoring = self.pixel_monitor.monitoring
+        frames = self.pixel_monitor.magnifier_frames
+        shown = []  # Pixel A of every preview on screen; removed areas drop out
+        for area in self.areas:
+            magnifier = area['ui'].get('magnifier')
+            if not magnifier:
+                continue
+            coords = tuple(area['coordinates']) if monitoring and area['coordinates'] else None
+            frame = frames.get(coords) if coords else None
+            if coords:
+                shown.append(coords)
+            if frame:
+                magnifier.show(frame)
+            elif not monitoring:
+                magnifier.clear()
+        
+        if monitoring:
+            # Without previews left the monitor stops grabbing neighbourhoods
+            self.pixel_monitor.request_magnifier(shown)
+            self.magnifier_job = self.root.after(MAGNIFIER_REFRESH_MS, self.refresh_magnifiers)
+    
     def update_color_display(self, area_id, color=None):
         """Update the color display canvas"""
         area = self.get_area_by_id(area_id)
@@ -247,69 +389,24 @@ class PixelMonitorApp:
         try:
             with open(file_path, 'r') as f:
                 config = json.load(f)
+            # Check every area before the current ones are removed
+            for n, area_config in enumerate(config.get("areas", [])):
+                self._check_area_config(n, area_config)
             
-            # Clear existing areas
-            for area in self.areas[:]:
-                area['ui']['frame'].destroy()
-            self.areas.clear()
-            self.area_counter = 0
-            
-            # Load areas
-            if "areas" in config:
-                for area_config in config["areas"]:
-                    # Add new area
-                    self.add_area()
-                    area = self.areas[-1]
-                    
-                    # Load coordinates
-                    if area_config.get("coordinates"):
-                        area['coordinates'] = tuple(area_config["coordinates"]) if area_config["coordinates"] else None
-                        if area['coordinates']:
-                            area['ui']['coord_label'].config(
-                                text=f"X:{area['coordinates'][0]} Y:{area['coordinates'][1]}", fg="green")
-                    
-                    if area_config.get("coordinates_condition"):
-                        area['coordinates_condition'] = tuple(area_config["coordinates_condition"]) if area_config["coordinates_condition"] else None
-                        if area['coordinates_condition']:
-                            area['ui']['coord_condition_label'].config(
-                                text=f"X:{area['coordinates_condition'][0]} Y:{area['coordinates_condition'][1]}", fg="green")
-                    
-                    # Load sound file
-                    if area_config.get("sound_file"):
-                        area['sound_file'] = area_config["sound_file"]
-                        filename = area['sound_file'].split("/")[-1].split("\\")[-1]
-                        if len(filename) > 12:
-                            filename = filename[:9] + "..."
-                        area['ui']['sound_label'].config(text=filename, fg="green")
-                    
-                    # Load threshold
-                    if area_config.get("threshold"):
-                        area['ui']['threshold_entry'].delete(0, tk.END)
-                        area['ui']['threshold_entry'].insert(0, area_config["threshold"])
-                    
-                    # Load volume
-                    if area_config.get("volume"):
-                        area['ui']['volume_entry'].delete(0, tk.END)
-                        area['ui']['volume_entry'].insert(0, area_config["volume"])
-                    
-                    # Load baseline color
-                    if area_config.get("baseline_color"):
-                        area['baseline_color'] = tuple(area_config["baseline_color"]) if area_config["baseline_color"] else None
-                        if area['baseline_color']:
-                            hex_color = self.color_utils.rgb_to_hex(area['baseline_color'])
-                            area['ui']['baseline_display'].config(bg=hex_color)
-                    
-                    # Load condition color
-                    if area_config.get("condition_color"):
-                        area['condition_color'] = tuple(area_config["condition_color"]) if area_config["condition_color"] else None
-                        if area['condition_color']:
-                            hex_color = self.color_utils.rgb_to_hex(area['condition_color'])
-                            area['ui']['condition_display'].config(bg=hex_color)
-                    
-                    # Load use_condition
-                    if "use_condition" in area_config:
-                        area['use_condition'].set(area_config["use_condition"])
-                        self.toggle_condition_ui(area['id'])
+            # The monitor only sees the finished layout
+            with self.areas.batch():
+                # Clear existing areas, from the registry before their widgets go away
+                old_areas = list(self.areas)
+                self.areas.clear()
+                for area in old_areas:
+                    area['ui']['frame'].destroy()
+                self.area_counter = 0
+                self.layout_configs = {}
+                
+                # Load areas
+                for area_config in config.get("areas", []):
+                    area = self.add_area()
+                    self._apply_area_config(area, area_config)
             
             if show_success:
                 messagebox.showinfo("Success", f"Layout loaded successfully!\n{len(self.areas)} area(s) loaded.")
@@ -317,6 +414,164 @@ class PixelMonitorApp:
         except Exception as e:
             raise Exception(f"Failed to load layout: {str(e)}")
     
+    def reload_layout_from_file(self, file_path):
+        """
+        Apply only the areas of a layout file that changed since it was applied
+        
+        Areas are matched to their previous configuration by content first and
+        then in order; unchanged areas are not touched, so monitoring carries
+        on with their trigger state.
+        
+        Returns:
+            (added, modified, removed) area counts
+        """
+        with open(file_path, 'r') as f:
+            config = json.load(f)
+        if not isinstance(config, dict) or not isinstance(config.get("areas", []), list):
+            raise ValueError("Invalid configuration format")
+        
+        # Areas removed in the GUI meanwhile are no longer part of the layout
+        previous = [(area_id, area_config) for area_id, area_config in self.layout_configs.items()
+                    if self.get_area_by_id(area_id)]
+        new_configs = []
+        for n, area_config in enumerate(config.get("areas", [])):
+            for i, (area_id, old_config) in enumerate(previous):
+                if old_config == area_config:
+                    del previous[i]
+                    break
+            else:
+                # Reject the whole reload, before any area changes, if one is invalid
+                self._check_area_config(n, area_config)
+                new_configs.append(area_config)
+        
+        modified = list(zip(previous, new_configs))
+        added = new_configs[len(modified):]
+        removed = previous[len(modified):]
+        
+        with self.areas.batch():
+            for (area_id, old_config), area_config in modified:
+                self._apply_area_config(self.get_area_by_id(area_id), area_config)
+            for area_config in added:
+                self._apply_area_config(self.add_area(), area_config)
+            for area_id, old_config in removed:
+                area = self.areas.remove(area_id)
+                area['ui']['frame'].destroy()
+                del self.layout_configs[area_id]
+        
+        return len(added), len(modified), len(removed)
+    
+    def _apply_area_config(self, area, area_config):
+        """Set every setting of an area, and its widgets, from a layout area configuration"""
+        ui = area['ui']
+        
+        # Load coordinates
+        area['coordinates'] = tuple(area_config["coordinates"]) if area_config.get("coordinates") else None
+        if area['coordinates']:
+            ui['coord_label'].config(text=f"X:{area['coordinates'][0]} Y:{area['coordinates'][1]}", fg="green")
+        else:
+            ui['coord_label'].config(text="Not set", fg="gray")
+        
+        area['coordinates_condition'] = tuple(area_config["coordinates_condition"]) if area_config.get("coordinates_condition") else None
+        if area['coordinates_condition']:
+            ui['coord_condition_label'].config(
+                text=f"X:{area['coordinates_condition'][0]} Y:{area['coordinates_condition'][1]}", fg="green")
+        else:
+            ui['coord_condition_label'].config(text="Not set", fg="gray")
+        
+        # Load sound file
+        area['sound_file'] = area_config.get("sound_file") or None
+        if area['sound_file']:
+            filename = area['sound_file'].split("/")[-1].split("\\")[-1]
+            if len(filename) > 12:
+                filename = filename[:9] + "..."
+            ui['sound_label'].config(text=filename, fg="green")
+        else:
+            ui['sound_label'].config(text="None", fg="gray")
+        
+        # Load threshold and volume
+        ui['threshold_var'].set(area_config.get("threshold") or "30")
+        ui['volume_var'].set(area_config.get("volume") or "50")
+        
+        # Load baseline color
+        area['baseline_color'] = tuple(area_config["baseline_color"]) if area_config.get("baseline_color") else None
+        ui['baseline_display'].config(
+            bg=self.color_utils.rgb_to_hex(area['baseline_color']) if area['baseline_color'] else "white")
+        
+        # Load condition color
+        area['condition_color'] = tuple(area_config["condition_color"]) if area_config.get("condition_color") else None
+        ui['condition_display'].config(
+            bg=self.color_utils.rgb_to_hex(area['condition_color']) if area['condition_color'] else "white")
+        
+        # Load use_condition
+        area['use_condition'].set(bool(area_config.get("use_condition", False)))
+        self.toggle_condition_ui(area['id'])
+        
+        # Load rule pixels, templates, histograms and trigger rule
+        area['pixels'] = {
+            name: {
+                'coordinates': tuple(pixel["coordinates"]) if pixel.get("coordinates") else None,
+                'color': tuple(pixel["color"]) if pixel.get("color") else None
+            }
+            for name, pixel in (area_config.get("pixels") or {}).items()
+        }
+        area['templates'] = {
+            name: {
+                'file': template.get("file"),
+                'region': list(template["region"]) if template.get("region") else None,
+                'score': template.get("score", 0.8)
+            }
+            for name, template in (area_config.get("templates") or {}).items()
+        }
+        area['histograms'] = {
+            name: {
+                'region': list(histogram["region"]) if histogram.get("region") else None,
+                'levels': histogram.get("levels", 4)
+            }
+            for name, histogram in (area_config.get("histograms") or {}).items()
+        }
+        area['rule'] = area_config.get("rule") or None
+        self.layout_configs[area['id']] = area_config
+        self.areas.reindex(area)
+    
+    @staticmethod
+    def _check_area_config(index, area_config):
+        """
+        Raise ValueError if a layout area configuration cannot be applied
+        
+        Args:
+            index: Position of the area in the layout file
+            area_config: Area configuration from the layout file
+        """
+        try:
+            config = AreaRegistry.freeze(AreaRegistry.from_layout(index, area_config))
+        except (AttributeError, KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"Area {index + 1}: invalid settings: {e}")
+        if config['rule']:
+            # Also reports unreadable template files
+            RulePlan.validate(config, load=True)
+    
+    def watch_layout(self, file_path):
+        """Reload a layout file whenever it changes on disk"""
+        if self.layout_watcher:
+            self.layout_watcher.close()
+        else:
+            self.root.after(250, self._poll_layout_watcher)
+        self.layout_watcher = LayoutWatcher(file_path)
+    
+    def _poll_layout_watcher(self):
+        """Apply pending layout file changes; runs on the Tk thread"""
+        watcher = self.layout_watcher
+        if watcher.poll():
+            try:
+                added, modified, removed = self.reload_layout_from_file(watcher.path)
+                self.main_window.update_status(
+                    f"Layout reloaded: {added} added, {modified} changed, {removed} removed", "blue")
+            except Exception as e:
+                # Keep the current areas, e.g. while the file is half written
+                print(f"Error reloading layout: {e}")
+                self.main_window.update_status("Layout reload failed, see console", "red")
+        self.root.after(250, self._poll_layout_watcher)
+    
     def save_layout(self):
         """Save all areas configuration to JSON file"""
         success = self.layout_manager.save_layout(self.areas, self.root)
@@ -333,4 +588,8 @@ class PixelMonitorApp:
                 self.load_layout_from_file(file_path, show_success=True)
             except Exception as e:
                 messagebox.showerror("Error", str(e), parent=self.root)
+                return
+            self.settings_manager.update_last_loaded_file(file_path)
+            if self.settings_manager.get_watch_layout():
+                self.watch_layout(file_path)
 
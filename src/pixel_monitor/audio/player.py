@@ -11,54 +11,104 @@ from pydub import AudioSegment
 class AudioPlayer:
     """Handles audio playback with volume control"""
     
+    # Decoded sound files, keyed by (path, mtime), shared by all players
+    DECODE_CACHE_SIZE = 16
+    _decode_cache = {}
+    _lock = threading.Lock()
+    
+    # Counters, read by the metrics endpoint
+    pending = 0  # Sounds being prepared for playback; queued ones wait in the AlertBus
+    cache_hits = 0
+    cache_misses = 0
+    
     @staticmethod
-    def play_sound(area):
-        """Play the sound for an area"""
+    def play_sound_sync(area):
+        """
+        Play the sound for an area on the calling thread, returning once playback has started
+        
+        Alerts call this from the AlertBus sound sink, whose concurrency
+        limit bounds how many sounds are prepared at once.
+        """
         if not area.get('sound_file'):
             return
         
-        def play_sound_thread():
+        with AudioPlayer._lock:
+            AudioPlayer.pending += 1
+        try:
+            AudioPlayer._play(area)
+        finally:
+            with AudioPlayer._lock:
+                AudioPlayer.pending -= 1
+    
+    @staticmethod
+    def _play(area):
+        """Decode, adjust and start playing an area's sound"""
+        try:
+            # Load and adjust volume
+            audio = AudioPlayer._load(area['sound_file'])
+            volume = AudioPlayer._get_volume(area)
+            
+            # Adjust volume (pydub uses dB, so we convert 0.0-1.0 to dB)
+            # 0.0 = -inf dB (mute), 1.0 = 0 dB (original), 0.5 = -6 dB
+            if volume > 0:
+                change_in_dB = 20 * (volume - 1.0)  # Convert to dB change
+                audio = audio + change_in_dB
+            else:
+                return  # Don't play if volume is 0
+            
+            # Convert to WAV format and play with winsound
+            # Create a temporary file for winsound (it requires a file path)
+            temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.wav')
             try:
-                # Load and adjust volume
-                audio = AudioSegment.from_file(area['sound_file'])
-                volume = AudioPlayer._get_volume(area)
-                
-                # Adjust volume (pydub uses dB, so we convert 0.0-1.0 to dB)
-                # 0.0 = -inf dB (mute), 1.0 = 0 dB (original), 0.5 = -6 dB
-                if volume > 0:
-                    change_in_dB = 20 * (volume - 1.0)  # Convert to dB change
-                    audio = audio + change_in_dB
-                else:
-                    return  # Don't play if volume is 0
-                
-                # Convert to WAV format and play with winsound
-                # Create a temporary file for winsound (it requires a file path)
-                temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.wav')
-                try:
-                    audio.export(temp_file.name, format="wav")
-                    temp_file.close()
-                    # Play asynchronously (non-blocking)
-                    winsound.PlaySound(temp_file.name, winsound.SND_FILENAME | winsound.SND_ASYNC)
-                finally:
-                    # Clean up temp file after a delay (give time for playback to start)
-                    def cleanup():
-                        time.sleep(1)  # Wait a bit for playback to start
-                        try:
-                            os.unlink(temp_file.name)
-                        except:
-                            pass
-                    threading.Thread(target=cleanup, daemon=True).start()
-            except Exception as e:
-                print(f"Error playing sound: {e}")
+                audio.export(temp_file.name, format="wav")
+                temp_file.close()
+                # Play asynchronously (non-blocking)
+                winsound.PlaySound(temp_file.name, winsound.SND_FILENAME | winsound.SND_ASYNC)
+            finally:
+                # Clean up temp file after a delay (give time for playback to start)
+                def cleanup():
+                    time.sleep(1)  # Wait a bit for playback to start
+                    try:
+                        os.unlink(temp_file.name)
+                    except:
+                        pass
+                threading.Thread(target=cleanup, daemon=True).start()
+        except Exception as e:
+            print(f"Error playing sound: {e}")
+    
+    @staticmethod
+    def _load(sound_file):
+        """Decode a sound file, reusing the cached decode if the file is unchanged"""
+        key = (sound_file, os.path.getmtime(sound_file))
+        with AudioPlayer._lock:
+            audio = AudioPlayer._decode_cache.get(key)
+            if audio is not None:
+                AudioPlayer.cache_hits += 1
+                return audio
+            AudioPlayer.cache_misses += 1
         
-        threading.Thread(target=play_sound_thread, daemon=True).start()
+        audio = AudioSegment.from_file(sound_file)
+        with AudioPlayer._lock:
+            cache = AudioPlayer._decode_cache
+            # Drop stale decodes of the same file, then the oldest entries
+            for old_key in [k for k in cache if k[0] == sound_file]:
+                del cache[old_key]
+            while len(cache) >= AudioPlayer.DECODE_CACHE_SIZE:
+                del cache[next(iter(cache))]
+            cache[key] = audio
+        return audio
+    
+    @staticmethod
+    def cache_hit_rate():
+        """Fraction of sound loads served from the decode cache"""
+        total = AudioPlayer.cache_hits + AudioPlayer.cache_misses
+        return AudioPlayer.cache_hits / total if total else 0.0
     
     @staticmethod
     def _get_volume(area):
-        """Get volume value from entry (0.0 to 1.0)"""
+        """Get volume value (0.0 to 1.0) from an area snapshot or its entry"""
         try:
-            val = int(area['ui']['volume_entry'].get())
+            val = int(area['volume'] if 'volume' in area else area['ui']['volume_entry'].get())
             return max(0, min(100, val)) / 100.0
         except:
             return 0.5
-
@@ -2,6 +2,6 @@
 
 from .settings import SettingsManager
 from .layout_manager import LayoutManager
+from .layout_watcher import LayoutWatcher
 
-__all__ = ['SettingsManager', 'LayoutManager']
-
+__all__ = ['SettingsManager', 'LayoutManager', 'LayoutWatcher']
@@ -33,6 +33,13 @@ class LayoutManager:
                 "condition_color": area['condition_color'],
                 "use_condition": area['use_condition'].get()
             }
+            if area.get('rule'):
+                area_config["pixels"] = area.get('pixels', {})
+                if area.get('templates'):
+                    area_config["templates"] = area['templates']
+                if area.get('histograms'):
+                    area_config["histograms"] = area['histograms']
+                area_config["rule"] = area['rule']
             areas_config.append(area_config)
         
         config = {"areas": areas_config}
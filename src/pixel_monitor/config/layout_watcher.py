@@ -0,0 +1,157 @@
+"""Change detection for layout files"""
+
+import os
+import time
+import errno
+import struct
+import ctypes
+import ctypes.util
+
+
+class LayoutWatcher:
+    """
+    Detects when a layout file was rewritten
+    
+    Uses inotify on Linux and falls back to polling the file's mtime
+    elsewhere. Nothing runs in the background: call poll() periodically (e.g.
+    from root.after), it reports a change once the file has been quiet for
+    the debounce time, so a tool writing the file in several steps causes a
+    single reload.
+    """
+    
+    # inotify constants from <sys/inotify.h>
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE_SELF = 0x00000400
+    IN_MOVE_SELF = 0x00000800
+    IN_IGNORED = 0x00008000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    _EVENT_HEADER = struct.Struct('iIII')
+    
+    def __init__(self, path, debounce=0.5, poll_interval=1.0, use_inotify=True):
+        """
+        Initialize layout watcher
+        
+        Args:
+            path: Layout file to watch
+            debounce: Seconds the file must stay unchanged before a change is reported
+            poll_interval: Seconds between mtime checks when inotify is unavailable
+            use_inotify: Set False to always poll the mtime
+        """
+        self.path = os.path.abspath(path)
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self._last_change = None  # Time of the latest unreported change
+        self._next_stat = 0.0
+        self._signature = self._stat()
+        self._fd = None
+        self.backend = 'mtime'
+        if use_inotify:
+            self._start_inotify()
+    
+    def _start_inotify(self):
+        """Watch the file's directory with inotify; stays on mtime polling on failure"""
+        libc_path = ctypes.util.find_library('c')
+        if not hasattr(os, 'O_NONBLOCK') or not libc_path:
+            return
+        try:
+            libc = ctypes.CDLL(libc_path, use_errno=True)
+            init = libc.inotify_init1
+            add_watch = libc.inotify_add_watch
+        except (OSError, AttributeError):
+            return
+        add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        
+        fd = init(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if fd < 0:
+            print(f"inotify unavailable, polling layout file instead: {os.strerror(ctypes.get_errno())}")
+            return
+        # Watch the directory, not the file: generators often replace the file by renaming
+        mask = self.IN_MODIFY | self.IN_CLOSE_WRITE | self.IN_MOVED_TO | self.IN_CREATE | self.IN_DELETE_SELF | self.IN_MOVE_SELF
+        directory = os.path.dirname(self.path)
+        if add_watch(fd, os.fsencode(directory), mask) < 0:
+            print(f"Cannot watch {directory}, polling layout file instead: {os.strerror(ctypes.get_errno())}")
+            os.close(fd)
+            return
+        self._fd = fd
+        self.backend = 'inotify'
+    
+    def poll(self, now=None):
+        """
+        Check for changes
+        
+        Returns:
+            True once per burst of changes, after the file stayed quiet for the debounce time
+        """
+        if now is None:
+            now = time.monotonic()
+        
+        if self._fd is not None:
+            if self._read_events():
+                self._last_change = now
+        elif now >= self._next_stat:
+            self._next_stat = now + self.poll_interval
+            signature = self._stat()
+            if signature != self._signature:
+                self._signature = signature
+                self._last_change = now
+        
+        if self._last_change is not None and now - self._last_change >= self.debounce:
+            self._last_change = None
+            # The file may be missing mid-rename; report it once it is back
+            if os.path.exists(self.path):
+                return True
+        return False
+    
+    def _read_events(self):
+        """Drain queued inotify events; True if any of them concerns the layout file"""
+        name = os.fsencode(os.path.basename(self.path))
+        changed = False
+        while True:
+            try:
+                data = os.read(self._fd, 4096)
+            except BlockingIOError:
+                return changed
+            except OSError as e:
+                if e.errno == errno.EINTR:
+                    continue
+                raise
+            
+            offset = 0
+            while offset < len(data):
+                wd, mask, cookie, length = self._EVENT_HEADER.unpack_from(data, offset)
+                offset += self._EVENT_HEADER.size
+                event_name = data[offset:offset + length].rstrip(b'\0')
+                offset += length
+                if mask & (self.IN_DELETE_SELF | self.IN_MOVE_SELF | self.IN_IGNORED):
+                    # The directory itself went away, keep going by polling
+                    self._stop_inotify()
+                    self._last_change = time.monotonic()
+                    return True
+                if event_name == name:
+                    changed = True
+    
+    def _stop_inotify(self):
+        """Switch to mtime polling"""
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+        self.backend = 'mtime'
+        self._signature = self._stat()
+    
+    def _stat(self):
+        """Get (mtime, size) of the file, or None if it does not exist"""
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+    
+    def close(self):
+        """Stop watching"""
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
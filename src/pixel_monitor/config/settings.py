@@ -62,4 +62,70 @@ class SettingsManager:
         """Get the last loaded file path from settings"""
         settings = self.read_settings()
         return settings.get('last_loaded_file')
-
+    
+    def get_metrics_port(self):
+        """Get the port of the local metrics endpoint, or None if it is disabled"""
+        settings = self.read_settings()
+        return settings.get('metrics_port')
+    
+    def get_webhook_url(self):
+        """Get the URL alerts are forwarded to, or None if forwarding is disabled"""
+        settings = self.read_settings()
+        return settings.get('webhook_url')
+    
+    def get_alert_log_path(self):
+        """Get the JSON lines file alerts are recorded to, or None if the log is disabled"""
+        settings = self.read_settings()
+        return settings.get('alert_log')
+    
+    def get_alert_log_max_bytes(self):
+        """Get the size at which the alert log is rotated"""
+        settings = self.read_settings()
+        try:
+            return max(1024, int(settings.get('alert_log_max_bytes', 5 * 1024 * 1024)))
+        except (TypeError, ValueError):
+            return 5 * 1024 * 1024
+    
+    def get_alert_overflow(self):
+        """Get what the alert queue does when full: drop_oldest, merge or block"""
+        settings = self.read_settings()
+        return settings.get('alert_overflow', 'drop_oldest')
+    
+    def get_alert_queue_size(self):
+        """Get how many alert deliveries are held while the sinks are busy"""
+        settings = self.read_settings()
+        try:
+            return max(1, int(settings.get('alert_queue_size', 256)))
+        except (TypeError, ValueError):
+            return 256
+    
+    def get_watch_layout(self):
+        """Whether to reload the last loaded layout file when it changes on disk"""
+        settings = self.read_settings()
+        return bool(settings.get('watch_layout', False))
+    
+    def get_check_interval(self):
+        """Get the seconds the monitor sleeps between checks"""
+        settings = self.read_settings()
+        try:
+            return max(0.001, float(settings.get('check_interval', 0.05)))
+        except (TypeError, ValueError):
+            return 0.05
+    
+    def get_event_driven_capture(self):
+        """Whether to capture on X11 Damage events instead of polling"""
+        settings = self.read_settings()
+        return bool(settings.get('event_driven_capture', False))
+    
+    def get_magnifier_radius(self):
+        """Get how many pixels around Pixel A the live magnifier shows (0 disables it)"""
+        settings = self.read_settings()
+        try:
+            return max(0, int(settings.get('magnifier_radius', 4)))
+        except (TypeError, ValueError):
+            return 4
+    
+    def get_parallel_capture(self):
+        """Whether to capture each display in its own worker thread"""
+        settings = self.read_settings()
+        return bool(settings.get('parallel_capture', False))
@@ -2,6 +2,8 @@
 
 from .main_window import MainWindow
 from .area_widget import AreaWidget
+from .magnifier import Magnifier
+from .calibration import LatencyCalibration
 
-__all__ = ['MainWindow', 'AreaWidget']
+__all__ = ['MainWindow', 'AreaWidget', 'Magnifier', 'LatencyCalibration']
 
@@ -2,12 +2,13 @@
 
 import tkinter as tk
 from ..monitor.color_utils import ColorUtils
+from .magnifier import Magnifier
 
 
 class AreaWidget:
     """UI widget for a single monitoring area"""
     
-    def __init__(self, parent_frame, area, callbacks):
+    def __init__(self, parent_frame, area, callbacks, magnifier_radius=0):
         """
         Initialize area widget
         
@@ -15,9 +16,11 @@ class AreaWidget:
             parent_frame: Parent frame to pack into
             area: Area dictionary with configuration
             callbacks: Dictionary of callback functions
+            magnifier_radius: Pixels around Pixel A shown in the live magnifier (0 hides it)
         """
         self.area = area
         self.callbacks = callbacks
+        self.magnifier_radius = magnifier_radius
         self.color_utils = ColorUtils()
         self._create_ui(parent_frame)
     
@@ -188,15 +191,22 @@ class AreaWidget:
         settings_row.pack(fill="x", padx=2, pady=1)
         
         tk.Label(settings_row, text="Threshold", font=("Arial", 8)).pack(side="left", padx=1)
-        threshold_entry = tk.Entry(settings_row, width=5, font=("Arial", 8), justify="center")
-        threshold_entry.insert(0, "30")
+        threshold_var = tk.StringVar(value="30")
+        # The monitor works on snapshots of the settings, so publish edits
+        threshold_var.trace_add('write', lambda *args: self.callbacks['settings_changed'](area_id))
+        threshold_entry = tk.Entry(settings_row, width=5, font=("Arial", 8), justify="center",
+                                   textvariable=threshold_var)
         threshold_entry.pack(side="left", padx=1)
+        self.area['ui']['threshold_var'] = threshold_var
         self.area['ui']['threshold_entry'] = threshold_entry
         
         tk.Label(settings_row, text="Volume", font=("Arial", 8)).pack(side="left", padx=1)
-        volume_entry = tk.Entry(settings_row, width=5, font=("Arial", 8), justify="center")
-        volume_entry.insert(0, "50")
+        volume_var = tk.StringVar(value="50")
+        volume_var.trace_add('write', lambda *args: self.callbacks['settings_changed'](area_id))
+        volume_entry = tk.Entry(settings_row, width=5, font=("Arial", 8), justify="center",
+                                textvariable=volume_var)
         volume_entry.pack(side="left", padx=1)
+        self.area['ui']['volume_var'] = volume_var
         self.area['ui']['volume_entry'] = volume_entry
         
         # Column 5: Live
@@ -226,6 +236,11 @@ class AreaWidget:
         color_value_label.pack(side="left", padx=1)
         self.area['ui']['color_value_label'] = color_value_label
         
+        if self.magnifier_radius > 0:
+            magnifier = Magnifier(live_row, self.magnifier_radius)
+            magnifier.pack(side="left", padx=1)
+            self.area['ui']['magnifier'] = magnifier
+        
         # Remove button
         remove_btn = tk.Button(
             main_row, 
@@ -0,0 +1,258 @@
+"""Detection latency calibration with a flashing test patch"""
+
+import math
+import time
+import random
+import tkinter as tk
+from ..monitor import PixelMonitor, AreaRegistry, ColorUtils
+from ..alerts import AlertBus
+
+
+class LatencyCalibration:
+    """
+    Measures how long the monitor takes to notice a color change on this machine
+    
+    A window shows a patch that flips from BASELINE to ALERT at random
+    moments. A temporary area watches the patch through a real PixelMonitor
+    and AlertBus, and every trial records the delay from the flip to the
+    trigger (detection) and to the start of the sound sink (dispatch). The
+    patch then flips back and the next trial starts once the monitor saw it.
+    """
+    
+    BASELINE = (40, 40, 40)
+    ALERT = (230, 40, 40)
+    PATCH_SIZE = 80
+    TRIAL_TIMEOUT = 2.0  # Seconds after a flip before the trial counts as missed
+    MIN_DELAY = 0.3  # Random pause before each flip, in seconds
+    MAX_DELAY = 1.0
+    MIN_INTERVAL = 0.01  # Below this, sleeping is too coarse on Windows to honor the interval
+    
+    def __init__(self, root, trials=50, check_interval=0.05, sound_file=None,
+                 event_driven=False, parallel_capture=False):
+        """
+        Initialize calibration
+        
+        Args:
+            root: Tk root or Toplevel the test window is built in
+            trials: Number of flips to measure
+            check_interval: check_interval of the monitor being measured
+            sound_file: Sound played on every detection, or None to only time the dispatch
+            event_driven: Measure event-driven capture instead of polling
+            parallel_capture: Measure capturing each display in its own worker
+        """
+        self.root = root
+        self.trials = trials
+        self.check_interval = check_interval
+        self.sound_file = sound_file
+        self.detection = []  # Seconds from flip to trigger, per trial
+        self.dispatch = []  # Seconds from flip to the sound sink starting, per trial
+        self.missed = 0
+        
+        self.pixel_monitor = PixelMonitor(check_interval=check_interval, event_driven=event_driven,
+                                          parallel_capture=parallel_capture)
+        self.alert_bus = AlertBus(workers=2)
+        self.alert_bus.add_sink('sound', self._on_dispatch, limit=2)
+        self.areas = AreaRegistry()
+        
+        # Written by the monitor and bus threads, polled by the Tk thread
+        self._flipped_at = None
+        self._detected_at = None
+        self._dispatched_at = None
+        self._seen = None  # (perf_counter, color) of the last Pixel A color the monitor reported
+        self._running = False
+        
+        self.root.title("PixelSoundAlert Calibration")
+        self.root.attributes('-topmost', True)
+        self.status_label = tk.Label(self.root, text="Keep this window visible while measuring...",
+                                     font=("Arial", 10, "bold"), justify="left")
+        self.status_label.pack(padx=10, pady=(10, 5), anchor="w")
+        self.patch = tk.Frame(self.root, width=self.PATCH_SIZE, height=self.PATCH_SIZE,
+                              bg=ColorUtils.rgb_to_hex(self.BASELINE))
+        self.patch.pack(padx=10, pady=10)
+        self.report_label = tk.Label(self.root, text="", font=("Courier", 9), justify="left")
+        self.report_label.pack(padx=10, pady=(0, 10), anchor="w")
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
+    
+    def start(self):
+        """Start measuring once the window is on screen"""
+        self.root.after(500, self._begin)
+    
+    def close(self):
+        """Stop measuring and close the window"""
+        if self._running:
+            self._running = False
+            self.pixel_monitor.stop_monitoring()
+            self.alert_bus.stop(1.0)
+        self.root.destroy()
+    
+    def _begin(self):
+        """Point a temporary area at the patch and wait until the monitor sees it"""
+        self.root.update_idletasks()
+        x = self.patch.winfo_rootx() + self.PATCH_SIZE // 2
+        y = self.patch.winfo_rooty() + self.PATCH_SIZE // 2
+        self.areas.add({
+            'id': 0,
+            'coordinates': (x, y),
+            'coordinates_condition': None,
+            'sound_file': self.sound_file or "calibration",  # Areas need one to be ready
+            'baseline_color': self.BASELINE,
+            'condition_color': None,
+            'use_condition': False,
+            'pixels': {},
+            'rule': None,
+            'threshold': 30,
+            'volume': 50
+        })
+        self._running = True
+        self.alert_bus.start()
+        started_at = time.perf_counter()
+        self.pixel_monitor.start_monitoring(self.areas, self._on_sample, self._on_trigger)
+        self._wait_for(self.BASELINE, started_at, self._schedule_flip, timeout=3.0,
+                       failure="The monitor cannot see the test patch. Is the window covered or off screen?")
+    
+    def _on_sample(self, area_id, color):
+        """Pixel A changed color; called on the monitor thread"""
+        self._seen = (time.perf_counter(), color)
+    
+    def _on_trigger(self, area):
+        """The area fired; called on the monitor thread"""
+        self._detected_at = time.perf_counter()
+        self.alert_bus.publish(area)
+    
+    def _on_dispatch(self, alert):
+        """The sound sink got the alert; called on a bus worker"""
+        self._dispatched_at = time.perf_counter()
+        if self.sound_file:
+            from ..audio import AudioPlayer
+            AudioPlayer.play_sound_sync(alert.area)
+    
+    def _wait_for(self, color, since, then, timeout=1.0, failure=None):
+        """Call then() once the monitor reported color after since, polling from the Tk thread"""
+        deadline = time.perf_counter() + timeout
+        
+        def poll():
+            if not self._running:
+                return
+            seen = self._seen
+            if seen and seen[0] >= since and self._close_to(seen[1], color):
+                then()
+            elif time.perf_counter() > deadline and failure:
+                self._finish(failure)
+            elif time.perf_counter() > deadline:
+                then()
+            else:
+                self.root.after(5, poll)
+        poll()
+    
+    def _schedule_flip(self):
+        """Flip after a random pause, so flips land at every phase of the check interval"""
+        done = len(self.detection) + self.missed
+        self.status_label.config(text=f"Measuring... trial {done + 1} of {self.trials}")
+        self.root.after(int(random.uniform(self.MIN_DELAY, self.MAX_DELAY) * 1000), self._flip)
+    
+    def _flip(self):
+        """Show the alert color and time the monitor's reaction"""
+        if not self._running:
+            return
+        self._detected_at = None
+        self._dispatched_at = None
+        self.patch.config(bg=ColorUtils.rgb_to_hex(self.ALERT))
+        self.root.update_idletasks()  # Draw now rather than when the event loop gets to it
+        self._flipped_at = time.perf_counter()
+        self._poll_trial()
+    
+    def _poll_trial(self):
+        """Record the trial once it was dispatched, then restore the baseline"""
+        if not self._running:
+            return
+        flipped_at = self._flipped_at
+        detected_at = self._detected_at
+        dispatched_at = self._dispatched_at
+        if dispatched_at is None and time.perf_counter() - flipped_at < self.TRIAL_TIMEOUT:
+            self.root.after(2, self._poll_trial)
+            return
+        
+        if detected_at is not None and dispatched_at is not None:
+            self.detection.append(detected_at - flipped_at)
+            self.dispatch.append(dispatched_at - flipped_at)
+        else:
+            self.missed += 1
+        
+        self.patch.config(bg=ColorUtils.rgb_to_hex(self.BASELINE))
+        self.root.update_idletasks()
+        restored_at = time.perf_counter()
+        if len(self.detection) + self.missed >= self.trials:
+            self._wait_for(self.BASELINE, restored_at, self._finish)
+        else:
+            # The area re-arms on the tick that sees the baseline again
+            self._wait_for(self.BASELINE, restored_at, self._schedule_flip)
+    
+    def _finish(self, failure=None):
+        """Stop the monitor and show the results"""
+        if not self._running:
+            return
+        self._running = False
+        self.pixel_monitor.stop_monitoring()
+        self.alert_bus.stop(1.0)
+        report = failure or self.report()
+        self.status_label.config(text="Calibration failed" if failure else "Calibration finished")
+        self.report_label.config(text=report)
+        print(report)
+    
+    def recommend_interval(self):
+        """
+        Suggest a check_interval for this machine
+        
+        A flip waits on average half a tick period to be sampled, plus a fixed
+        delay for the screen to show it and the monitor to dispatch it. Sampling
+        more often than that fixed delay buys little, and ticks should spend
+        at most a quarter of the time working.
+        
+        Returns:
+            Seconds, rounded up to 5 ms, or None without successful trials
+        """
+        if not self.detection:
+            return None
+        work = self.pixel_monitor.tick_work
+        interval = max(3 * work, self._fixed_delay(), self.MIN_INTERVAL)
+        return math.ceil(interval * 200) / 200
+    
+    def report(self):
+        """Describe the measured latency distributions and the recommendation"""
+        lines = [f"{len(self.detection)} of {self.trials} trials detected"
+                 f" with check_interval {self.check_interval * 1000:.0f} ms"]
+        if self.missed:
+            lines.append(f"{self.missed} flips were not detected within {self.TRIAL_TIMEOUT:.0f} s")
+        if not self.detection:
+            return "\n".join(lines)
+        
+        lines.append(f"{'':10} {'min':>7} {'p50':>7} {'p90':>7} {'p99':>7} {'max':>7} {'mean':>7}  (ms)")
+        for name, values in (("detection", self.detection), ("dispatch", self.dispatch)):
+            stats = [min(values), self._percentile(values, 50), self._percentile(values, 90),
+                     self._percentile(values, 99), max(values), sum(values) / len(values)]
+            lines.append(f"{name:10} " + " ".join(f"{v * 1000:7.1f}" for v in stats))
+        
+        work = self.pixel_monitor.tick_work
+        recommended = self.recommend_interval()
+        worst = recommended + work + self._fixed_delay()
+        lines.append(f"Work per check: {work * 1000:.2f} ms")
+        lines.append(f"Recommended check_interval: {recommended * 1000:.0f} ms "
+                     f"(about {worst * 1000:.0f} ms from a change to its sound at worst)")
+        return "\n".join(lines)
+    
+    def _fixed_delay(self):
+        """Median dispatch latency not explained by waiting for the next sample"""
+        period = self.pixel_monitor.tick_work + self.check_interval
+        return max(0.0, self._percentile(self.dispatch, 50) - period / 2)
+    
+    @staticmethod
+    def _percentile(values, percent):
+        """Nearest-rank percentile"""
+        ordered = sorted(values)
+        rank = max(1, math.ceil(percent / 100 * len(ordered)))
+        return ordered[rank - 1]
+    
+    @staticmethod
+    def _close_to(color, target, tolerance=10):
+        """Whether every channel is within tolerance of the target"""
+        return all(abs(c - t) <= tolerance for c, t in zip(color, target))
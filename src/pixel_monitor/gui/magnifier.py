@@ -0,0 +1,61 @@
+"""Zoomed live preview around a monitored pixel"""
+
+import tkinter as tk
+
+
+class Magnifier:
+    """Canvas showing the pixels around Pixel A, enlarged, with Pixel A outlined"""
+    
+    def __init__(self, parent, radius, zoom=5):
+        """
+        Initialize magnifier
+        
+        Args:
+            parent: Parent widget to pack into
+            radius: Pixels shown on each side of Pixel A
+            zoom: Screen pixels per captured pixel
+        """
+        self.radius = radius
+        self.zoom = zoom
+        self.frame = None  # Last frame shown, to skip redrawing the same capture
+        size = (2 * radius + 1) * zoom
+        
+        self.canvas = tk.Canvas(parent, width=size, height=size, bg="white",
+                                highlightthickness=0, borderwidth=0)
+        self.image = tk.PhotoImage(width=size, height=size)
+        self.canvas.create_image(0, 0, image=self.image, anchor="nw")
+        center = radius * zoom
+        self.canvas.create_rectangle(center, center, center + zoom - 1, center + zoom - 1, outline="red")
+    
+    def pack(self, **kwargs):
+        self.canvas.pack(**kwargs)
+    
+    def show(self, frame):
+        """
+        Draw a captured neighbourhood
+        
+        Args:
+            frame: (width, height, packed RGB bytes) as in PixelMonitor.magnifier_frames
+        """
+        if frame is self.frame:
+            return
+        self.frame = frame
+        width, height, rgb = frame
+        zoom = self.zoom
+        
+        # One PhotoImage.put of the already enlarged rows
+        rows = []
+        for y in range(height):
+            i = y * width * 3
+            cells = []
+            for x in range(width):
+                cells.extend([f"#{rgb[i]:02x}{rgb[i + 1]:02x}{rgb[i + 2]:02x}"] * zoom)
+                i += 3
+            row = "{" + " ".join(cells) + "}"
+            rows.extend([row] * zoom)
+        self.image.put(" ".join(rows), to=(0, 0))
+    
+    def clear(self):
+        """Blank the preview, e.g. when monitoring stops"""
+        self.frame = None
+        self.image.blank()
@@ -60,6 +60,17 @@ class MainWindow:
         )
         self.toggle_btn.pack(side="left", padx=2)
         
+        self.profile_btn = tk.Button(
+            control_frame, 
+            text="Profile", 
+            command=self.app.toggle_profiling,
+            bg="#607D8B", 
+            fg="white", 
+            font=("Arial", 10, "bold"), 
+            width=14
+        )
+        self.profile_btn.pack(side="left", padx=2)
+        
         # Add Area Button
         add_area_frame = tk.Frame(self.root)
         add_area_frame.pack(fill="x", padx=10, pady=2)
@@ -105,6 +116,10 @@ class MainWindow:
         """Update toggle button"""
         self.toggle_btn.config(text=text, bg=color)
     
+    def update_profile_button(self, text, color):
+        """Update profile button"""
+        self.profile_btn.config(text=text, bg=color)
+    
     def create_coordinate_overlay(self, area_id, pixel_type="A"):
         """Create overlay for coordinate selection"""
         self.app.current_area_id = area_id
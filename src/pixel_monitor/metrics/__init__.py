@@ -0,0 +1,6 @@
+"""Metrics export and profiling"""
+
+from .server import MetricsServer
+from .profiler import SessionProfiler, ProfilerSlot
+
+__all__ = ['MetricsServer', 'SessionProfiler', 'ProfilerSlot']
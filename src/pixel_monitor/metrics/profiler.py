@@ -0,0 +1,216 @@
+"""On-demand profiling of monitoring sessions"""
+
+import os
+import io
+import time
+import signal
+import pstats
+import cProfile
+import threading
+
+
+class ProfilerSlot:
+    """Profiling state of one long-running thread"""
+    
+    def __init__(self, name):
+        self.name = name
+        self.profile = None
+        self.session = None
+
+
+class SessionProfiler:
+    """
+    Profiles the monitor and audio threads while switched on
+    
+    Long-running threads own a ProfilerSlot and call checkpoint() at tick
+    boundaries; short-lived threads are wrapped with wrap(). While the
+    profiler is off that costs one attribute check per tick or thread start.
+    Switching it off writes the merged profile of the session to a .prof
+    file plus a .txt summary of the hottest functions.
+    """
+    
+    def __init__(self, output_dir=None, top_n=30):
+        """
+        Initialize session profiler
+        
+        Args:
+            output_dir: Directory for profile dumps. If None, uses 'profiles' in the current working directory
+            top_n: Number of functions listed in the text summary
+        """
+        if output_dir is None:
+            output_dir = os.path.join(os.getcwd(), 'profiles')
+        
+        self.output_dir = output_dir
+        self.top_n = top_n
+        self.active = False
+        self.session = 0
+        self.last_dump = None
+        self._lock = threading.Lock()
+        self._collected = {}  # session -> list of finished cProfile.Profile
+        self._outstanding = {}  # session -> profiles still running
+        self._started = {}  # session -> start time
+    
+    def start(self):
+        """Start a profiling session"""
+        with self._lock:
+            if self.active:
+                return
+            self.session += 1
+            self._collected[self.session] = []
+            self._outstanding[self.session] = 0
+            self._started[self.session] = time.time()
+            self.active = True
+    
+    def stop(self, on_done=None):
+        """
+        Stop the session and write its dump in the background
+        
+        Args:
+            on_done: Called on the dump thread when it finishes, with (path, None)
+                once the dump is written or (None, reason) if it was not
+        
+        Returns:
+            Path the .prof dump will be written to, or None if not profiling
+        """
+        with self._lock:
+            if not self.active:
+                return None
+            self.active = False
+            session = self.session
+            started = self._started.pop(session)
+        
+        stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(started))
+        path = os.path.join(self.output_dir, f"session-{stamp}-{session}.prof")
+        threading.Thread(target=self._dump, args=(session, path, on_done), daemon=True).start()
+        return path
+    
+    def toggle(self, on_done=None):
+        """Start or stop profiling; returns the dump path when stopping, see stop() for on_done"""
+        if self.active:
+            return self.stop(on_done)
+        self.start()
+        return None
+    
+    def checkpoint(self, slot):
+        """Start or stop profiling the calling thread; call at tick boundaries"""
+        if self.active and slot.session != self.session:
+            self.release(slot)
+            with self._lock:
+                if not self.active:
+                    return
+                slot.session = self.session
+                self._outstanding[slot.session] += 1
+            profile = cProfile.Profile()
+            if self._enable(profile):
+                slot.profile = profile
+            else:
+                self._collect(slot.session, None)
+        elif not self.active and slot.profile is not None:
+            self.release(slot)
+    
+    def release(self, slot):
+        """Hand in the calling thread's profile, e.g. when the thread exits"""
+        if slot.profile is None:
+            return
+        slot.profile.disable()
+        self._collect(slot.session, slot.profile)
+        slot.profile = None
+        slot.session = None
+    
+    def wrap(self, func):
+        """Wrap a short-lived thread's target so it is profiled if a session is active"""
+        def run(*args, **kwargs):
+            if not self.active:
+                return func(*args, **kwargs)
+            with self._lock:
+                profiling = self.active
+                session = self.session
+                if profiling:
+                    self._outstanding[session] += 1
+            if not profiling:
+                return func(*args, **kwargs)
+            profile = cProfile.Profile()
+            if not self._enable(profile):
+                self._collect(session, None)
+                return func(*args, **kwargs)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profile.disable()
+                self._collect(session, profile)
+        return run
+    
+    @staticmethod
+    def _enable(profile):
+        """Enable a profile; False if another one already covers this thread"""
+        try:
+            profile.enable()
+            return True
+        except ValueError:
+            # Python 3.12+ allows one active profiler, which then sees every thread
+            return False
+    
+    def install_signal_toggle(self, signum=None):
+        """Toggle profiling on a signal (SIGUSR1 by default) for runs without the GUI"""
+        if signum is None:
+            signum = getattr(signal, 'SIGUSR1', None)
+        if signum is None or threading.current_thread() is not threading.main_thread():
+            return False
+        
+        def handler(signum, frame):
+            path = self.toggle()
+            print(f"Profiling stopped, writing {path}" if path else "Profiling started")
+        
+        signal.signal(signum, handler)
+        return True
+    
+    def _collect(self, session, profile):
+        """Store a finished profile of a session (None if it never started)"""
+        with self._lock:
+            if session in self._collected:
+                if profile is not None:
+                    self._collected[session].append(profile)
+                self._outstanding[session] -= 1
+    
+    def _dump(self, session, path, on_done=None, grace=2.0):
+        """Merge a session's profiles, write the dump and summary, then call on_done"""
+        # Threads hand in their profiles at their next tick boundary
+        deadline = time.monotonic() + grace
+        while time.monotonic() < deadline:
+            with self._lock:
+                if self._outstanding[session] <= 0:
+                    break
+            time.sleep(0.05)
+        
+        with self._lock:
+            profiles = self._collected.pop(session)
+            self._outstanding.pop(session)
+        
+        if not profiles:
+            print("Profiling session captured no samples")
+            if on_done:
+                on_done(None, "no samples captured")
+            return
+        
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            stats = pstats.Stats(profiles[0])
+            for profile in profiles[1:]:
+                stats.add(profile)
+            stats.dump_stats(path)
+            
+            summary = io.StringIO()
+            pstats.Stats(path, stream=summary).sort_stats('cumulative').print_stats(self.top_n)
+            summary_path = os.path.splitext(path)[0] + '.txt'
+            with open(summary_path, 'w') as f:
+                f.write(f"Profile of {len(profiles)} thread run(s)\n")
+                f.write(summary.getvalue())
+            self.last_dump = path
+            print(f"Profile written to {path}")
+        except Exception as e:
+            print(f"Error writing profile: {e}")
+            if on_done:
+                on_done(None, str(e))
+            return
+        if on_done:
+            on_done(path, None)
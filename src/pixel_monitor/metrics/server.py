@@ -0,0 +1,143 @@
+"""Loopback HTTP endpoint serving metrics in Prometheus text format"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+LOOPBACK_HOSTS = ('127.0.0.1', '::1', 'localhost')
+
+
+class MetricsServer:
+    """Serves PixelMonitor, AudioPlayer and AlertBus counters on /metrics"""
+    
+    def __init__(self, pixel_monitor, audio_player, port=9464, host='127.0.0.1', alert_bus=None):
+        """
+        Initialize metrics server
+        
+        Args:
+            pixel_monitor: PixelMonitor whose loop counters are exported
+            audio_player: AudioPlayer whose queue and cache counters are exported
+            port: TCP port to listen on (0 picks a free port)
+            host: Loopback address to bind; other addresses are refused
+            alert_bus: Optional AlertBus whose queue and sink counters are exported
+        """
+        if host not in LOOPBACK_HOSTS:
+            raise ValueError(f"Metrics endpoint must bind to a loopback address, got {host!r}")
+        
+        self.pixel_monitor = pixel_monitor
+        self.audio_player = audio_player
+        self.alert_bus = alert_bus
+        self.host = host
+        self.port = port
+        self.httpd = None
+        self.server_thread = None
+    
+    def start(self):
+        """Start serving in a background thread"""
+        if self.httpd:
+            return
+        
+        metrics_server = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = metrics_server.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, format, *args):
+                pass  # Keep scrapes out of the console
+        
+        self.httpd = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+        self.server_thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.server_thread.start()
+    
+    def stop(self):
+        """Stop serving"""
+        if not self.httpd:
+            return
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.httpd = None
+    
+    def render(self):
+        """
+        Render all metrics in Prometheus text exposition format
+        
+        Only reads counters (and snapshots of the per-area dictionaries), so
+        the monitor thread is never locked or waited on.
+        """
+        monitor = self.pixel_monitor
+        player = self.audio_player
+        lines = []
+        
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP pixelsoundalert_{name} {help_text}")
+            lines.append(f"# TYPE pixelsoundalert_{name} {kind}")
+            for labels, value in samples:
+                lines.append(f"pixelsoundalert_{name}{labels} {value}")
+        
+        metric("monitoring", "gauge", "1 while monitoring is running",
+               [("", int(monitor.monitoring))])
+        metric("ticks_total", "counter", "Monitor loop iterations",
+               [("", monitor.tick_count)])
+        metric("tick_rate_hz", "gauge", "Smoothed monitor loop iterations per second",
+               [("", round(monitor.tick_rate, 3))])
+        metric("tick_work_seconds", "gauge", "Smoothed time spent capturing and evaluating per tick",
+               [("", round(monitor.tick_work, 6))])
+        metric("tick_overruns_total", "counter", "Ticks whose work took longer than the check interval",
+               [("", monitor.tick_overrun_count)])
+        
+        sample_counts = dict(monitor.sample_counts)
+        trigger_counts = dict(monitor.trigger_counts)
+        metric("area_samples_total", "counter", "Pixel A samples taken per area",
+               [(self._area_label(area_id), count) for area_id, count in sorted(sample_counts.items())])
+        metric("area_triggers_total", "counter", "Sounds triggered per area",
+               [(self._area_label(area_id), count) for area_id, count in sorted(trigger_counts.items())])
+        
+        metric("audio_queue_depth", "gauge", "Sounds being prepared for playback",
+               [("", player.pending)])
+        metric("audio_decode_cache_hits_total", "counter", "Sound loads served from the decode cache",
+               [("", player.cache_hits)])
+        metric("audio_decode_cache_misses_total", "counter", "Sound loads that decoded the file",
+               [("", player.cache_misses)])
+        metric("audio_decode_cache_hit_ratio", "gauge", "Fraction of sound loads served from the decode cache",
+               [("", round(player.cache_hit_rate(), 4))])
+        
+        bus = self.alert_bus
+        if bus is not None:
+            sinks = bus.sinks()
+            metric("alert_queue_depth", "gauge", "Alert deliveries waiting for a worker",
+                   [("", bus.queue_depth())])
+            metric("alerts_published_total", "counter", "Alerts published to the sinks",
+                   [("", bus.published)])
+            metric("alert_sink_active", "gauge", "Alerts being handled per sink",
+                   [(self._sink_label(sink), sink.active) for sink in sinks])
+            metric("alert_sink_delivered_total", "counter", "Alerts handled per sink",
+                   [(self._sink_label(sink), sink.delivered) for sink in sinks])
+            metric("alert_sink_failures_total", "counter", "Alerts whose sink raised an error",
+                   [(self._sink_label(sink), sink.failed) for sink in sinks])
+            metric("alert_sink_dropped_total", "counter", "Alert deliveries discarded because the queue was full",
+                   [(self._sink_label(sink), sink.dropped) for sink in sinks])
+            metric("alert_sink_merged_total", "counter", "Alert deliveries replaced by a newer alert of the same area",
+                   [(self._sink_label(sink), sink.merged) for sink in sinks])
+        
+        return "\n".join(lines) + "\n"
+    
+    @staticmethod
+    def _area_label(area_id):
+        """Label areas the way the GUI numbers them"""
+        return f'{{area="{area_id + 1}"}}'
+    
+    @staticmethod
+    def _sink_label(sink):
+        """Label alert sinks by name"""
+        return f'{{sink="{sink.name}"}}'
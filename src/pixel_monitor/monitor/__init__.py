@@ -2,6 +2,18 @@
 
 from .pixel_monitor import PixelMonitor
 from .color_utils import ColorUtils
+from .area_registry import AreaRegistry, AreaSnapshot
+from .rules import RulePlan
+from .sample_history import SampleHistory
+from .capture import CaptureFrame, ImageGrabCapture, X11ShmCapture, create_capture_backend
+from .damage import X11DamageWatcher
+from .displays import Display, enumerate_displays
+from .parallel_capture import ParallelCapture
+from .template_match import TemplateMatcher
+from .histogram import ColorHistogram
 
-__all__ = ['PixelMonitor', 'ColorUtils']
+__all__ = ['PixelMonitor', 'ColorUtils', 'AreaRegistry', 'AreaSnapshot', 'RulePlan', 'SampleHistory',
+           'CaptureFrame', 'ImageGrabCapture', 'X11ShmCapture', 'create_capture_backend',
+           'X11DamageWatcher', 'Display', 'enumerate_displays', 'ParallelCapture', 'TemplateMatcher',
+           'ColorHistogram']
 
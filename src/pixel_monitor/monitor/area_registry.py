@@ -0,0 +1,241 @@
+"""Indexed storage of monitoring areas"""
+
+import copy
+import threading
+from contextlib import contextmanager
+from types import MappingProxyType
+from .rules import RulePlan
+
+
+class AreaSnapshot:
+    """
+    Immutable monitoring configuration of all areas at one registry version
+    
+    Areas are read-only mappings holding plain values (no Tk variables), so
+    the monitor thread can use a snapshot without locks while the GUI keeps
+    editing the live areas.
+    """
+    
+    def __init__(self, version, areas):
+        self.version = version
+        self.areas = tuple(areas)
+        self._by_id = {area['id']: area for area in self.areas}
+        self._by_coords = {}  # (x, y) -> areas referencing that pixel
+        for area in self.areas:
+            for c in self._referenced_coords(area):
+                self._by_coords.setdefault(c, []).append(area)
+    
+    def get(self, area_id):
+        """Get an area's configuration by ID"""
+        return self._by_id.get(area_id)
+    
+    def ready(self):
+        """Get the areas that are fully configured, in order"""
+        return [area for area in self.areas if area['problem'] is None]
+    
+    def coordinates(self):
+        """Get every distinct coordinate referenced by any area"""
+        return list(self._by_coords)
+    
+    def areas_at(self, coords):
+        """Get all areas that reference the given coordinate"""
+        return list(self._by_coords.get(coords, ()))
+    
+    @staticmethod
+    def _referenced_coords(area):
+        """Get the distinct pixels an area reads (Pixel A, Pixel B and rule pixels)"""
+        candidates = [area['coordinates'], area['coordinates_condition']]
+        candidates.extend(p['coordinates'] for p in area['pixels'].values())
+        
+        coords = []
+        for c in candidates:
+            if c and c not in coords:
+                coords.append(c)
+        return coords
+    
+    def __iter__(self):
+        return iter(self.areas)
+    
+    def __len__(self):
+        return len(self.areas)
+
+
+class AreaRegistry:
+    """
+    Holds the live, GUI-owned areas and publishes copy-on-write snapshots
+    
+    Every change publishes a new AreaSnapshot. Areas that did not change keep
+    the configuration object of the previous snapshot, so a monitor can tell
+    which areas an edit touched.
+    """
+    
+    def __init__(self):
+        self._areas = []
+        self._by_id = {}
+        self._configs = {}  # area id -> frozen configuration in the current snapshot
+        self._lock = threading.RLock()
+        self._batch_depth = 0
+        self._dirty = False
+        self.version = 0  # Bumped on every published snapshot
+        self._snapshot = AreaSnapshot(0, ())
+    
+    def add(self, area):
+        """Add an area"""
+        with self._lock:
+            self._areas.append(area)
+            self._by_id[area['id']] = area
+            self._configs[area['id']] = self.freeze(area)
+            self._publish()
+        return area
+    
+    def remove(self, area_id):
+        """Remove an area by ID, returning it (or None if unknown)"""
+        with self._lock:
+            area = self._by_id.pop(area_id, None)
+            if area is None:
+                return None
+            self._areas.remove(area)
+            del self._configs[area_id]
+            self._publish()
+            return area
+    
+    def clear(self):
+        """Remove all areas"""
+        with self._lock:
+            self._areas = []
+            self._by_id.clear()
+            self._configs.clear()
+            self._publish()
+    
+    def get(self, area_id):
+        """Get area by ID"""
+        return self._by_id.get(area_id)
+    
+    def reindex(self, area):
+        """Publish an area's edited coordinates, colors, settings or rule"""
+        with self._lock:
+            if area['id'] not in self._by_id:
+                return
+            self._configs[area['id']] = self.freeze(area)
+            self._publish()
+    
+    def snapshot(self):
+        """Get the current AreaSnapshot"""
+        return self._snapshot
+    
+    @contextmanager
+    def batch(self):
+        """Publish all changes made inside the block as one snapshot"""
+        with self._lock:
+            self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._batch_depth -= 1
+                if self._batch_depth == 0 and self._dirty:
+                    self._publish()
+    
+    def _publish(self):
+        """Replace the snapshot, unless a batch is open"""
+        if self._batch_depth:
+            self._dirty = True
+            return
+        self._dirty = False
+        self.version += 1
+        self._snapshot = AreaSnapshot(self.version, [self._configs[area['id']] for area in self._areas])
+    
+    @staticmethod
+    def from_layout(area_id, area_config):
+        """Build a plain area, without widgets, from a saved layout area configuration"""
+        return {
+            'id': area_id,
+            'coordinates': area_config.get("coordinates"),
+            'coordinates_condition': area_config.get("coordinates_condition"),
+            'sound_file': area_config.get("sound_file") or None,
+            'baseline_color': area_config.get("baseline_color"),
+            'condition_color': area_config.get("condition_color"),
+            'use_condition': bool(area_config.get("use_condition", False)),
+            'pixels': area_config.get("pixels") or {},
+            'templates': area_config.get("templates") or {},
+            'histograms': area_config.get("histograms") or {},
+            'rule': area_config.get("rule") or None,
+            'threshold': area_config.get("threshold", 30),
+            'volume': area_config.get("volume", 50)
+        }
+    
+    @staticmethod
+    def freeze(area):
+        """
+        Copy the monitoring settings of a live area into a read-only mapping
+        
+        Reads Tk variables and entries, so call it on the GUI thread. Areas
+        without widgets (headless agents) hold plain values instead.
+        """
+        def coords(value):
+            return tuple(value) if value else None
+        
+        ui = area.get('ui', {})
+        config = {
+            'id': area['id'],
+            'coordinates': coords(area.get('coordinates')),
+            'coordinates_condition': coords(area.get('coordinates_condition')),
+            'baseline_color': coords(area.get('baseline_color')),
+            'condition_color': coords(area.get('condition_color')),
+            'use_condition': bool(AreaRegistry._value(area['use_condition'])),
+            'pixels': {
+                name: {'coordinates': coords(pixel.get('coordinates')), 'color': coords(pixel.get('color'))}
+                for name, pixel in area.get('pixels', {}).items()
+            },
+            'templates': copy.deepcopy(area.get('templates') or {}),
+            'histograms': copy.deepcopy(area.get('histograms') or {}),
+            'rule': copy.deepcopy(area.get('rule')),
+            'sound_file': area.get('sound_file'),
+            'threshold': AreaRegistry._entry_value(ui.get('threshold_entry', area.get('threshold')), 30),
+            'volume': AreaRegistry._entry_value(ui.get('volume_entry', area.get('volume')), 50)
+        }
+        config['problem'] = AreaRegistry.check(config)
+        return MappingProxyType(config)
+    
+    @staticmethod
+    def check(config):
+        """Get why an area cannot be monitored yet, or None if it is ready"""
+        # Rules that only scan regions do not need Pixel A
+        needs_pixel_a = not config['rule'] or RulePlan.uses_pixel(config['rule'], "A")
+        if needs_pixel_a and not config['coordinates']:
+            return "Please select coordinates!"
+        if not config['sound_file']:
+            return "Please select a sound file!"
+        if needs_pixel_a and not config['baseline_color']:
+            return "Please capture baseline color!"
+        if config['use_condition']:
+            if not config['coordinates_condition']:
+                return "Condition enabled but Pixel B not selected!"
+            if not config['condition_color']:
+                return "Condition enabled but Pixel B color not captured!"
+        try:
+            # Runs on every edit, so only the rule's structure is checked; template files are read by the monitor
+            RulePlan.validate(config)
+        except (ValueError, TypeError) as e:
+            return f"Invalid trigger rule: {e}"
+        return None
+    
+    @staticmethod
+    def _value(value):
+        """Read a Tk variable or entry, or take a plain value as it is"""
+        return value.get() if hasattr(value, 'get') else value
+    
+    @staticmethod
+    def _entry_value(entry, default):
+        """Read a 0-100 setting from an entry or a plain value"""
+        try:
+            return max(0, min(100, int(AreaRegistry._value(entry))))
+        except:
+            return default
+    
+    def __iter__(self):
+        with self._lock:
+            return iter(list(self._areas))
+    
+    def __len__(self):
+        return len(self._areas)
@@ -0,0 +1,503 @@
+"""Screen capture backends"""
+
+import os
+import sys
+import ctypes
+import threading
+import ctypes.util
+
+
+# PIL raw modes of the (bytes per pixel, RGB offsets) layouts backends produce
+RAW_MODES = {
+    (3, (0, 1, 2)): 'RGB',
+    (3, (2, 1, 0)): 'BGR',
+    (4, (0, 1, 2)): 'RGBX',
+    (4, (2, 1, 0)): 'BGRX',
+    (4, (1, 2, 3)): 'XRGB'
+}
+
+
+class CaptureFrame:
+    """
+    Pixels of a captured rectangle
+    
+    Pixel (x, y) starts at byte y * stride + x * bytes_per_pixel of data; the
+    red, green and blue bytes are at the given offsets from there.
+    """
+    
+    def __init__(self, left, top, width, height, data, stride, bytes_per_pixel, offsets):
+        self.left = left
+        self.top = top
+        self.width = width
+        self.height = height
+        self.data = data
+        self.stride = stride
+        self.bytes_per_pixel = bytes_per_pixel
+        self.r_offset, self.g_offset, self.b_offset = offsets
+    
+    def pixel(self, x, y):
+        """Get the RGB color at (x, y) relative to the rectangle"""
+        i = y * self.stride + x * self.bytes_per_pixel
+        data = self.data
+        return data[i + self.r_offset], data[i + self.g_offset], data[i + self.b_offset]
+    
+    def to_rgb(self):
+        """Copy the whole rectangle as packed RGB bytes, row by row"""
+        width, height = self.width, self.height
+        data = self.data
+        if self.bytes_per_pixel == 3 and self.stride == width * 3 and (self.r_offset, self.g_offset, self.b_offset) == (0, 1, 2):
+            return bytes(data[:width * height * 3])
+        
+        rgb = bytearray(width * height * 3)
+        r, g, b = self.r_offset, self.g_offset, self.b_offset
+        j = 0
+        for y in range(height):
+            i = y * self.stride
+            for x in range(width):
+                rgb[j] = data[i + r]
+                rgb[j + 1] = data[i + g]
+                rgb[j + 2] = data[i + b]
+                i += self.bytes_per_pixel
+                j += 3
+        return bytes(rgb)
+    
+    def to_image(self):
+        """Copy the whole rectangle into a PIL RGB image"""
+        from PIL import Image
+        size = (self.width, self.height)
+        raw_mode = RAW_MODES.get((self.bytes_per_pixel, (self.r_offset, self.g_offset, self.b_offset)))
+        if raw_mode is None:
+            return Image.frombytes('RGB', size, self.to_rgb())
+        # Let PIL unpack the backend's layout; copies, so reused frames can be overwritten
+        return Image.frombytes('RGB', size, bytes(self.data[:self.stride * self.height]),
+                               'raw', raw_mode, self.stride, 1)
+    
+    def copy_pixel(self, x, y, buffer, offset):
+        """Copy the RGB bytes at (x, y) into buffer[offset:offset + 3] without allocating"""
+        i = y * self.stride + x * self.bytes_per_pixel
+        data = self.data
+        buffer[offset] = data[i + self.r_offset]
+        buffer[offset + 1] = data[i + self.g_offset]
+        buffer[offset + 2] = data[i + self.b_offset]
+
+
+class ImageGrabCapture:
+    """
+    Captures through PIL.ImageGrab (works everywhere ImageGrab does)
+    
+    ImageGrab creates a new image for every screenshot, so grabs are not
+    allocation-free. The pixels are copied into a frame reused for every
+    grab of the same size, and the image is freed right away.
+    """
+    
+    name = 'imagegrab'
+    
+    def __init__(self):
+        self._frames = {}  # (width, height) -> reused CaptureFrame
+    
+    def grab(self, left, top, width, height):
+        """Capture a screen rectangle, returning a reused CaptureFrame or None"""
+        from PIL import ImageGrab
+        try:
+            image = ImageGrab.grab(bbox=(left, top, left + width, top + height))
+        except Exception as e:
+            print(f"Error capturing screen: {e}")
+            return None
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+        if image.size != (width, height):
+            # E.g. the rectangle reaches past the screen edge
+            return None
+        
+        key = (width, height)
+        frame = self._frames.get(key)
+        if frame is None:
+            frame = self._frames[key] = CaptureFrame(0, 0, width, height, bytearray(width * height * 3),
+                                                     width * 3, 3, (0, 1, 2))
+        frame.data[:] = image.tobytes()
+        frame.left = left
+        frame.top = top
+        return frame
+    
+    def get_pixel(self, x, y):
+        """Get the RGB color of one screen pixel, or None"""
+        frame = self.grab(x, y, 1, 1)
+        return frame.pixel(0, 0) if frame else None
+    
+    def read_pixel_into(self, x, y, buffer, offset):
+        """Copy one screen pixel into buffer[offset:offset + 3]; False if capture failed"""
+        frame = self.grab(x, y, 1, 1)
+        if frame is None:
+            return False
+        frame.copy_pixel(0, 0, buffer, offset)
+        return True
+    
+    def close(self):
+        """Release backend resources"""
+        self._frames.clear()
+
+
+class _XShmSegmentInfo(ctypes.Structure):
+    _fields_ = [
+        ('shmseg', ctypes.c_ulong),
+        ('shmid', ctypes.c_int),
+        ('shmaddr', ctypes.c_void_p),
+        ('readOnly', ctypes.c_int)
+    ]
+
+
+class _XImage(ctypes.Structure):
+    # Leading fields of XImage; only accessed through pointers from Xlib
+    _fields_ = [
+        ('width', ctypes.c_int),
+        ('height', ctypes.c_int),
+        ('xoffset', ctypes.c_int),
+        ('format', ctypes.c_int),
+        ('data', ctypes.c_void_p),
+        ('byte_order', ctypes.c_int),
+        ('bitmap_unit', ctypes.c_int),
+        ('bitmap_bit_order', ctypes.c_int),
+        ('bitmap_pad', ctypes.c_int),
+        ('depth', ctypes.c_int),
+        ('bytes_per_line', ctypes.c_int),
+        ('bits_per_pixel', ctypes.c_int),
+        ('red_mask', ctypes.c_ulong),
+        ('green_mask', ctypes.c_ulong),
+        ('blue_mask', ctypes.c_ulong)
+    ]
+
+
+class _XErrorEvent(ctypes.Structure):
+    _fields_ = [
+        ('type', ctypes.c_int),
+        ('display', ctypes.c_void_p),
+        ('resourceid', ctypes.c_ulong),
+        ('serial', ctypes.c_ulong),
+        ('error_code', ctypes.c_ubyte),
+        ('request_code', ctypes.c_ubyte),
+        ('minor_code', ctypes.c_ubyte)
+    ]
+
+
+_X_ERROR_HANDLER = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_void_p, ctypes.POINTER(_XErrorEvent))
+
+
+_x_errors = {}  # Display pointer of each open capture -> X errors since its last check
+
+
+@_X_ERROR_HANDLER
+def _ignore_x_error(display, event):
+    if display in _x_errors:
+        # Xlib's default handler exits the process; count the error instead
+        _x_errors[display] += 1
+        return 0
+    # Another connection's error, e.g. Tk's: leave it to the handler it expects
+    previous = _x_previous_handler
+    return _X_ERROR_HANDLER(previous)(display, event) if previous else 0
+
+
+_IGNORE_X_ERROR = ctypes.cast(_ignore_x_error, ctypes.c_void_p)
+
+# The error handler is process wide (Tk has its own). Captures on several
+# threads share one installation of the ignoring handler, so one thread
+# restoring the previous handler cannot expose another thread's call.
+_x_error_lock = threading.Lock()
+_x_error_users = 0
+_x_previous_handler = None
+
+
+def _push_x_error_handler(x11):
+    """Ignore X errors until the matching _pop_x_error_handler"""
+    global _x_error_users, _x_previous_handler
+    with _x_error_lock:
+        if _x_error_users == 0:
+            _x_previous_handler = x11.XSetErrorHandler(_IGNORE_X_ERROR)
+        _x_error_users += 1
+
+
+def _pop_x_error_handler(x11):
+    """Restore the previous X error handler once no capture needs it"""
+    global _x_error_users
+    with _x_error_lock:
+        _x_error_users -= 1
+        if _x_error_users == 0:
+            x11.XSetErrorHandler(_x_previous_handler)
+
+
+class X11ShmCapture:
+    """
+    Captures through the X11 MIT-SHM extension
+    
+    Rectangles are copied by the X server straight into one shared memory
+    segment that is reused for every grab, so steady-state capture allocates
+    nothing. The segment only grows when a larger rectangle is requested.
+    An X display connection is not thread safe: use one instance per thread.
+    """
+    
+    name = 'x11shm'
+    
+    ZPIXMAP = 2
+    ALL_PLANES = ctypes.c_ulong(-1).value
+    IPC_PRIVATE = 0
+    IPC_CREAT = 0o1000
+    IPC_RMID = 0
+    
+    def __init__(self, display_name=None):
+        x11_path = ctypes.util.find_library('X11')
+        xext_path = ctypes.util.find_library('Xext')
+        if not x11_path or not xext_path:
+            raise RuntimeError("libX11/libXext not found")
+        
+        self._x11 = ctypes.CDLL(x11_path)
+        self._xext = ctypes.CDLL(xext_path)
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self._declare_functions()
+        
+        self.display = self._x11.XOpenDisplay(display_name.encode() if display_name else None)
+        if not self.display:
+            raise RuntimeError("Cannot open X display")
+        if not self._xext.XShmQueryExtension(self.display):
+            self._x11.XCloseDisplay(self.display)
+            self.display = None
+            raise RuntimeError("X server does not support MIT-SHM")
+        _x_errors[self.display] = 0
+        
+        screen = self._x11.XDefaultScreen(self.display)
+        self.root = self._x11.XDefaultRootWindow(self.display)
+        self.visual = self._x11.XDefaultVisual(self.display, screen)
+        self.depth = self._x11.XDefaultDepth(self.display, screen)
+        self.screen_width = self._x11.XDisplayWidth(self.display, screen)
+        self.screen_height = self._x11.XDisplayHeight(self.display, screen)
+        
+        self._shminfo = None
+        self._segment_size = 0
+        self._segment_view = None
+        self._images = {}  # (width, height) -> XImage pointer sharing the segment
+        self._frames = {}  # (width, height) -> reused CaptureFrame
+        self._offsets = None
+        
+        # Attach up front so an unusable MIT-SHM (e.g. remote display) fails here
+        try:
+            self._attach_segment(4096)
+        except (RuntimeError, OSError):
+            del _x_errors[self.display]
+            self._x11.XCloseDisplay(self.display)
+            self.display = None
+            raise
+    
+    def _declare_functions(self):
+        """Declare argument and return types of the Xlib/XShm/libc calls"""
+        x11, xext, libc = self._x11, self._xext, self._libc
+        vp, ul, i, ui = ctypes.c_void_p, ctypes.c_ulong, ctypes.c_int, ctypes.c_uint
+        shm_p = ctypes.POINTER(_XShmSegmentInfo)
+        
+        x11.XOpenDisplay.argtypes = [ctypes.c_char_p]
+        x11.XOpenDisplay.restype = vp
+        x11.XCloseDisplay.argtypes = [vp]
+        x11.XDefaultScreen.argtypes = [vp]
+        x11.XDefaultScreen.restype = i
+        x11.XDefaultRootWindow.argtypes = [vp]
+        x11.XDefaultRootWindow.restype = ul
+        x11.XDefaultVisual.argtypes = [vp, i]
+        x11.XDefaultVisual.restype = vp
+        x11.XDefaultDepth.argtypes = [vp, i]
+        x11.XDefaultDepth.restype = i
+        x11.XDisplayWidth.argtypes = [vp, i]
+        x11.XDisplayWidth.restype = i
+        x11.XDisplayHeight.argtypes = [vp, i]
+        x11.XDisplayHeight.restype = i
+        x11.XSync.argtypes = [vp, i]
+        x11.XFree.argtypes = [vp]
+        x11.XSetErrorHandler.argtypes = [vp]
+        x11.XSetErrorHandler.restype = vp
+        
+        xext.XShmQueryExtension.argtypes = [vp]
+        xext.XShmQueryExtension.restype = i
+        xext.XShmCreateImage.argtypes = [vp, vp, ui, i, ctypes.c_char_p, shm_p, ui, ui]
+        xext.XShmCreateImage.restype = ctypes.POINTER(_XImage)
+        xext.XShmAttach.argtypes = [vp, shm_p]
+        xext.XShmAttach.restype = i
+        xext.XShmDetach.argtypes = [vp, shm_p]
+        xext.XShmDetach.restype = i
+        xext.XShmGetImage.argtypes = [vp, ul, ctypes.POINTER(_XImage), i, i, ul]
+        xext.XShmGetImage.restype = i
+        
+        libc.shmget.argtypes = [i, ctypes.c_size_t, i]
+        libc.shmget.restype = i
+        libc.shmat.argtypes = [i, vp, i]
+        libc.shmat.restype = vp
+        libc.shmdt.argtypes = [vp]
+        libc.shmctl.argtypes = [i, i, vp]
+    
+    def grab(self, left, top, width, height):
+        """Capture a screen rectangle, returning a reused CaptureFrame or None"""
+        if (left < 0 or top < 0 or width <= 0 or height <= 0 or
+                left + width > self.screen_width or top + height > self.screen_height):
+            return None
+        
+        key = (width, height)
+        image = self._images.get(key)
+        if image is None:
+            image = self._create_image(width, height)
+            if image is None:
+                return None
+        
+        # Only ignore X errors for the duration of the grab
+        _push_x_error_handler(self._x11)
+        try:
+            ok = self._xext.XShmGetImage(self.display, self.root, image, left, top, self.ALL_PLANES)
+        finally:
+            _pop_x_error_handler(self._x11)
+        # A failed grab already shows in ok
+        _x_errors[self.display] = 0
+        if not ok:
+            return None
+        
+        frame = self._frames[key]
+        frame.left = left
+        frame.top = top
+        return frame
+    
+    def get_pixel(self, x, y):
+        """Get the RGB color of one screen pixel, or None"""
+        frame = self.grab(x, y, 1, 1)
+        return frame.pixel(0, 0) if frame else None
+    
+    def read_pixel_into(self, x, y, buffer, offset):
+        """Copy one screen pixel into buffer[offset:offset + 3]; False if capture failed"""
+        frame = self.grab(x, y, 1, 1)
+        if frame is None:
+            return False
+        frame.copy_pixel(0, 0, buffer, offset)
+        return True
+    
+    def _create_image(self, width, height):
+        """Create an XImage of the given size backed by the shared segment"""
+        # At most 4 bytes per pixel including row padding
+        needed = width * height * 4
+        if needed > self._segment_size:
+            # Every cached image points into the old segment, so start over
+            self._release_images()
+            self._attach_segment(max(needed, self._segment_size * 2, 4096))
+        
+        # XShmCreateImage keeps a pointer to the segment info, which lives as long as the segment
+        image = self._xext.XShmCreateImage(
+            self.display, self.visual, self.depth, self.ZPIXMAP, None,
+            ctypes.byref(self._shminfo), width, height)
+        if not image:
+            return None
+        
+        contents = image.contents
+        if contents.bits_per_pixel not in (24, 32):
+            self._x11.XFree(image)
+            raise RuntimeError(f"Unsupported X visual with {contents.bits_per_pixel} bits per pixel")
+        contents.data = self._shminfo.shmaddr
+        if self._offsets is None:
+            self._offsets = self._channel_offsets(contents)
+        
+        self._images[(width, height)] = image
+        self._frames[(width, height)] = CaptureFrame(
+            0, 0, width, height, self._segment_view, contents.bytes_per_line,
+            contents.bits_per_pixel // 8, self._offsets)
+        return image
+    
+    def _attach_segment(self, size):
+        """Create a shared memory segment and attach it to the X server"""
+        self._detach_segment()
+        
+        shmid = self._libc.shmget(self.IPC_PRIVATE, size, self.IPC_CREAT | 0o600)
+        if shmid < 0:
+            raise OSError(ctypes.get_errno(), "shmget failed")
+        shmaddr = self._libc.shmat(shmid, None, 0)
+        if shmaddr in (None, ctypes.c_void_p(-1).value):
+            self._libc.shmctl(shmid, self.IPC_RMID, None)
+            raise OSError(ctypes.get_errno(), "shmat failed")
+        
+        shminfo = _XShmSegmentInfo(0, shmid, shmaddr, 0)
+        _push_x_error_handler(self._x11)
+        try:
+            _x_errors[self.display] = 0
+            attached = self._xext.XShmAttach(self.display, ctypes.byref(shminfo))
+            self._x11.XSync(self.display, 0)
+        finally:
+            _pop_x_error_handler(self._x11)
+        failed = _x_errors[self.display]
+        _x_errors[self.display] = 0
+        if not attached or failed:
+            self._libc.shmdt(shmaddr)
+            self._libc.shmctl(shmid, self.IPC_RMID, None)
+            raise RuntimeError("XShmAttach failed")
+        # Freed automatically once both this process and the X server detach
+        self._libc.shmctl(shmid, self.IPC_RMID, None)
+        
+        self._shminfo = shminfo
+        self._segment_size = size
+        self._segment_view = memoryview((ctypes.c_ubyte * size).from_address(shmaddr)).cast('B')
+    
+    def _detach_segment(self):
+        """Detach the current shared memory segment"""
+        if not self._shminfo:
+            return
+        _push_x_error_handler(self._x11)
+        try:
+            # E.g. the server already dropped the segment
+            self._xext.XShmDetach(self.display, ctypes.byref(self._shminfo))
+            self._x11.XSync(self.display, 0)
+        finally:
+            _pop_x_error_handler(self._x11)
+        _x_errors[self.display] = 0
+        self._segment_view.release()
+        self._libc.shmdt(self._shminfo.shmaddr)
+        self._shminfo = None
+        self._segment_view = None
+        self._segment_size = 0
+    
+    def _release_images(self):
+        """Free cached XImage headers (the pixel data lives in the segment)"""
+        for image in self._images.values():
+            self._x11.XFree(image)
+        self._images.clear()
+        self._frames.clear()
+    
+    @staticmethod
+    def _channel_offsets(image):
+        """Byte offsets of red, green and blue within a pixel"""
+        bytes_per_pixel = image.bits_per_pixel // 8
+        offsets = []
+        for mask in (image.red_mask, image.green_mask, image.blue_mask):
+            shift = (mask & -mask).bit_length() - 1
+            index = shift // 8
+            # byte_order 0 = LSBFirst
+            offsets.append(index if image.byte_order == 0 else bytes_per_pixel - 1 - index)
+        return tuple(offsets)
+    
+    def close(self):
+        """Release the segment and the display connection"""
+        if not self.display:
+            return
+        self._release_images()
+        self._detach_segment()
+        del _x_errors[self.display]
+        self._x11.XCloseDisplay(self.display)
+        self.display = None
+
+
+def create_capture_backend(name='auto'):
+    """
+    Create a capture backend
+    
+    Args:
+        name: 'x11shm', 'imagegrab' or 'auto' (X11 MIT-SHM on Linux with a
+            display, ImageGrab otherwise)
+    """
+    if name == 'imagegrab':
+        return ImageGrabCapture()
+    if name == 'x11shm':
+        return X11ShmCapture()
+    
+    if sys.platform.startswith('linux') and os.environ.get('DISPLAY'):
+        try:
+            return X11ShmCapture()
+        except (RuntimeError, OSError) as e:
+            print(f"X11 shared memory capture unavailable, using ImageGrab: {e}")
+    return ImageGrabCapture()
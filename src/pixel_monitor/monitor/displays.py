@@ -0,0 +1,114 @@
+"""Enumeration of the physical displays making up the desktop"""
+
+import os
+import sys
+import ctypes
+import ctypes.util
+
+
+class Display:
+    """A display's rectangle in desktop coordinates"""
+    
+    def __init__(self, index, left, top, width, height):
+        self.index = index
+        self.left = left
+        self.top = top
+        self.width = width
+        self.height = height
+    
+    def contains(self, x, y):
+        """Whether the desktop coordinate (x, y) lies on this display"""
+        return self.left <= x < self.left + self.width and self.top <= y < self.top + self.height
+    
+    def __repr__(self):
+        return f"Display({self.index}, {self.left}, {self.top}, {self.width}, {self.height})"
+
+
+class _XineramaScreenInfo(ctypes.Structure):
+    _fields_ = [
+        ('screen_number', ctypes.c_int),
+        ('x_org', ctypes.c_short),
+        ('y_org', ctypes.c_short),
+        ('width', ctypes.c_short),
+        ('height', ctypes.c_short)
+    ]
+
+
+class _Rect(ctypes.Structure):
+    _fields_ = [
+        ('left', ctypes.c_long),
+        ('top', ctypes.c_long),
+        ('right', ctypes.c_long),
+        ('bottom', ctypes.c_long)
+    ]
+
+
+def enumerate_displays():
+    """
+    Get the displays of the desktop
+    
+    Uses Xinerama on X11 and EnumDisplayMonitors on Windows. Returns an
+    empty list if the layout cannot be determined.
+    """
+    try:
+        if sys.platform == 'win32':
+            return _windows_displays()
+        if os.environ.get('DISPLAY'):
+            return _xinerama_displays()
+    except (OSError, AttributeError, RuntimeError) as e:
+        print(f"Error enumerating displays: {e}")
+    return []
+
+
+def _xinerama_displays():
+    """Displays reported by the X11 Xinerama extension"""
+    x11_path = ctypes.util.find_library('X11')
+    xinerama_path = ctypes.util.find_library('Xinerama')
+    if not x11_path or not xinerama_path:
+        raise RuntimeError("libX11/libXinerama not found")
+    
+    x11 = ctypes.CDLL(x11_path)
+    xinerama = ctypes.CDLL(xinerama_path)
+    x11.XOpenDisplay.argtypes = [ctypes.c_char_p]
+    x11.XOpenDisplay.restype = ctypes.c_void_p
+    x11.XCloseDisplay.argtypes = [ctypes.c_void_p]
+    x11.XFree.argtypes = [ctypes.c_void_p]
+    xinerama.XineramaIsActive.argtypes = [ctypes.c_void_p]
+    xinerama.XineramaQueryScreens.argtypes = [ctypes.c_void_p, ctypes.POINTER(ctypes.c_int)]
+    xinerama.XineramaQueryScreens.restype = ctypes.POINTER(_XineramaScreenInfo)
+    
+    display = x11.XOpenDisplay(None)
+    if not display:
+        raise RuntimeError("Cannot open X display")
+    try:
+        if not xinerama.XineramaIsActive(display):
+            return []
+        count = ctypes.c_int()
+        screens = xinerama.XineramaQueryScreens(display, ctypes.byref(count))
+        if not screens:
+            return []
+        displays = [
+            Display(i, screens[i].x_org, screens[i].y_org, screens[i].width, screens[i].height)
+            for i in range(count.value)
+        ]
+        x11.XFree(screens)
+        return displays
+    finally:
+        x11.XCloseDisplay(display)
+
+
+def _windows_displays():
+    """Displays reported by EnumDisplayMonitors"""
+    user32 = ctypes.windll.user32
+    monitor_enum_proc = ctypes.WINFUNCTYPE(
+        ctypes.c_int, ctypes.c_void_p, ctypes.c_void_p, ctypes.POINTER(_Rect), ctypes.c_void_p)
+    displays = []
+    
+    def callback(monitor, dc, rect, data):
+        r = rect.contents
+        displays.append(Display(len(displays), r.left, r.top, r.right - r.left, r.bottom - r.top))
+        return 1
+    
+    if not user32.EnumDisplayMonitors(None, None, monitor_enum_proc(callback), None):
+        raise OSError("EnumDisplayMonitors failed")
+    return displays
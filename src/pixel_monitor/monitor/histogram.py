@@ -0,0 +1,143 @@
+"""Quantized color histograms of screen regions"""
+
+from collections import Counter
+from .capture import RAW_MODES
+
+
+class ColorHistogram:
+    """
+    Counts the pixels of a region per quantized color, updated row by row
+    
+    Every channel is reduced to `levels` values, giving levels**3 bins. The
+    raw bytes of each frame are compared row by row with the previous frame,
+    and only the rows that differ are quantized again, with their old bins
+    subtracted from the counts and their new bins added. A progress bar
+    growing by a few pixels therefore costs a few rows, not the whole region.
+    """
+    
+    MAX_LEVELS = 6  # Bin indices must fit in one byte
+    
+    def __init__(self, levels=4):
+        """
+        Initialize histogram
+        
+        Args:
+            levels: Values per color channel, 2 to MAX_LEVELS
+        """
+        if not 2 <= levels <= self.MAX_LEVELS:
+            raise ValueError(f"levels must be between 2 and {self.MAX_LEVELS}, got {levels}")
+        self.levels = levels
+        self.counts = [0] * (levels ** 3)
+        self.total = 0  # Pixels counted; 0 until a frame was scanned
+        self.rows_updated = 0  # Rows re-quantized over the histogram's lifetime
+        
+        # Lookup tables giving each channel's share of the bin index
+        self._tables = (
+            [self._quantize(v, levels) * levels * levels for v in range(256)],
+            [self._quantize(v, levels) * levels for v in range(256)],
+            [self._quantize(v, levels) for v in range(256)]
+        )
+        self._shape = None  # (width, height, stride, raw mode) of the previous frame
+        self._raw = None  # Raw bytes of the previous frame
+        self._row_bins = []  # Per row: bin index of every pixel
+    
+    @staticmethod
+    def _quantize(value, levels):
+        """Map a 0-255 channel value to 0 .. levels-1"""
+        return value * levels // 256
+    
+    @staticmethod
+    def bin_of(color, levels):
+        """Get the bin an RGB color falls into with the given levels per channel"""
+        r, g, b = (ColorHistogram._quantize(v, levels) for v in color)
+        return (r * levels + g) * levels + b
+    
+    def fraction(self, bins):
+        """Get the fraction of the region's pixels in the given bins, or None before the first frame"""
+        if not self.total:
+            return None
+        counts = self.counts
+        count = 0
+        for b in bins:
+            count += counts[b]
+        return count / self.total
+    
+    def scan(self, frame):
+        """
+        Update the counts from a captured frame
+        
+        Returns:
+            True if the counts reflect the frame, None if the frame is missing
+        """
+        if frame is None:
+            return None
+        
+        stride = frame.stride
+        height = frame.height
+        row_bytes = frame.width * frame.bytes_per_pixel
+        raw_mode = RAW_MODES.get((frame.bytes_per_pixel, (frame.r_offset, frame.g_offset, frame.b_offset)))
+        shape = (frame.width, height, stride, raw_mode)
+        raw = bytes(frame.data[:stride * height])
+        
+        if shape != self._shape or raw_mode is None:
+            # New size or layout: count everything
+            self._shape = shape
+            self._row_bins = self._bins(frame, raw, raw_mode, 0, height)
+            self.counts = [0] * len(self.counts)
+            for row in self._row_bins:
+                self._add(row, 1)
+            self.total = frame.width * height
+            self.rows_updated += height
+            self._raw = raw
+            return True
+        
+        previous = self._raw
+        y = 0
+        while y < height:
+            o = y * stride
+            if raw[o:o + row_bytes] == previous[o:o + row_bytes]:
+                y += 1
+                continue
+            # Re-quantize the whole run of changed rows at once
+            end = y + 1
+            while end < height:
+                o = end * stride
+                if raw[o:o + row_bytes] == previous[o:o + row_bytes]:
+                    break
+                end += 1
+            for offset, row in enumerate(self._bins(frame, raw, raw_mode, y, end)):
+                old = self._row_bins[y + offset]
+                if row != old:
+                    self._add(old, -1)
+                    self._add(row, 1)
+                    self._row_bins[y + offset] = row
+            self.rows_updated += end - y
+            y = end
+        self._raw = raw
+        return True
+    
+    def _add(self, row, sign):
+        """Add (sign 1) or remove (sign -1) the bins of one row"""
+        counts = self.counts
+        for b, n in Counter(row).items():
+            counts[b] += sign * n
+    
+    def _bins(self, frame, raw, raw_mode, start, end):
+        """Quantize rows start .. end-1 of a frame, returning one bytes object of bin indices per row"""
+        from PIL import Image, ImageChops
+        width = frame.width
+        size = (width, end - start)
+        if raw_mode is None:
+            # Unusual layout: unpack the rows in Python
+            rgb = frame.to_rgb()[start * width * 3:end * width * 3]
+            image = Image.frombytes('RGB', size, rgb)
+        else:
+            band = raw[start * frame.stride:end * frame.stride]
+            image = Image.frombytes('RGB', size, band, 'raw', raw_mode, frame.stride, 1)
+        
+        r, g, b = image.split()
+        # At most levels**3 - 1 <= 215, so adding never clips
+        bins = ImageChops.add(ImageChops.add(r.point(self._tables[0]), g.point(self._tables[1])),
+                              b.point(self._tables[2]))
+        data = bins.tobytes()
+        return [data[y * width:(y + 1) * width] for y in range(end - start)]
@@ -0,0 +1,206 @@
+"""Concurrent capture with one worker per display"""
+
+import time
+import threading
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from .capture import create_capture_backend
+
+
+class ParallelCapture:
+    """
+    Samples pixels with one capture worker per display
+    
+    Workers run in a thread pool, each with its own capture backend (X11
+    connections must not be shared between threads). Every tick the monitor
+    thread and all workers meet at a start barrier, each worker copies its
+    display's pixels into its own scratch buffer, and everyone meets again
+    at a done barrier before the monitor thread copies the scratch buffers
+    into the sample buffer. A tick therefore sees one consistent snapshot of
+    all displays and takes as long as the slowest display, not the sum. A
+    worker that hangs past the timeout is replaced along with its scratch
+    buffer, so it cannot write into later ticks when it wakes up.
+    """
+    
+    # A display's pixels are grabbed as one bounding rectangle up to this many pixels
+    MAX_RECT_PIXELS = 128 * 128
+    
+    def __init__(self, displays, capture_backend='auto', timeout=2.0, backend_factory=None):
+        """
+        Initialize parallel capture
+        
+        Args:
+            displays: Displays to capture, see enumerate_displays
+            capture_backend: Backend name passed to create_capture_backend by every worker
+            timeout: Seconds the monitor waits for the slowest worker before restarting the workers
+            backend_factory: Callable creating a backend from capture_backend (default: create_capture_backend)
+        """
+        self.displays = list(displays)
+        self.capture_backend = capture_backend
+        self.timeout = timeout
+        self.backend_factory = backend_factory or create_capture_backend
+        self.display_times = [0.0] * len(self.displays)  # Seconds each worker spent in the last tick
+        
+        self._coordinates = []
+        self._pixels = None
+        self._valid = None
+        self._groups = [() for _ in self.displays]  # Per display: sample buffer indices
+        self._scratch = [(array('B'), bytearray()) for _ in self.displays]  # Per display: (RGB, valid) of its group
+        self._bounds = [None] * len(self.displays)  # Per display: (left, top, width, height) grabbed in one piece
+        self._executor = None
+        self._start = None
+        self._done = None
+        self._generation = 0
+    
+    def start(self):
+        """Start one worker per display"""
+        if self._executor:
+            return
+        count = len(self.displays)
+        self._generation += 1
+        self._start = threading.Barrier(count + 1)
+        self._done = threading.Barrier(count + 1)
+        self._executor = ThreadPoolExecutor(max_workers=count, thread_name_prefix='capture')
+        for index in range(count):
+            self._executor.submit(self._worker, index, self._start, self._done, self._generation)
+    
+    def close(self):
+        """Stop the workers"""
+        if not self._executor:
+            return
+        self._generation += 1
+        self._start.abort()
+        self._done.abort()
+        self._executor.shutdown(wait=False)
+        self._executor = None
+    
+    def configure(self, coordinates, pixels, valid):
+        """
+        Assign the coordinates of a plan to the displays; call between ticks
+        
+        Args:
+            coordinates: (x, y) of every sample, in sample buffer order
+            pixels: Flat RGB sample buffer, 3 bytes per coordinate
+            valid: Per coordinate success flags
+        """
+        groups = [[] for _ in self.displays]
+        for i, (x, y) in enumerate(coordinates):
+            groups[self._display_of(x, y)].append(i)
+        
+        bounds = []
+        for indices in groups:
+            if not indices:
+                bounds.append(None)
+                continue
+            xs = [coordinates[i][0] for i in indices]
+            ys = [coordinates[i][1] for i in indices]
+            left, top = min(xs), min(ys)
+            width, height = max(xs) - left + 1, max(ys) - top + 1
+            # Scattered pixels are cheaper to read one by one than in a huge rectangle
+            bounds.append((left, top, width, height) if width * height <= self.MAX_RECT_PIXELS else None)
+        
+        # Workers are parked at the start barrier, so swapping the references is safe
+        self._coordinates = list(coordinates)
+        self._pixels = pixels
+        self._valid = valid
+        self._groups = [tuple(indices) for indices in groups]
+        self._bounds = bounds
+        self._scratch = self._new_scratch()
+    
+    def _new_scratch(self):
+        """Allocate empty per-display scratch buffers for the configured groups"""
+        return [(array('B', bytes(3 * len(indices))), bytearray(len(indices))) for indices in self._groups]
+    
+    def sample(self):
+        """
+        Sample every configured pixel
+        
+        Returns:
+            False if a worker missed the tick; its pixels are then marked invalid
+        """
+        try:
+            self._start.wait(self.timeout)
+            self._done.wait(self.timeout)
+        except threading.BrokenBarrierError:
+            print("Error: a capture worker did not finish its tick, restarting workers")
+            self.close()
+            valid = self._valid
+            for i in range(len(valid)):
+                valid[i] = 0
+            # The stuck worker may still write into its old scratch buffer
+            self._scratch = self._new_scratch()
+            self.start()
+            return False
+        
+        # Only workers that made it through the done barrier are copied
+        pixels = self._pixels
+        valid = self._valid
+        for indices, (scratch_pixels, scratch_valid) in zip(self._groups, self._scratch):
+            for j in range(len(indices)):
+                i = indices[j]
+                o = i * 3
+                p = j * 3
+                pixels[o] = scratch_pixels[p]
+                pixels[o + 1] = scratch_pixels[p + 1]
+                pixels[o + 2] = scratch_pixels[p + 2]
+                valid[i] = scratch_valid[j]
+        return True
+    
+    def _display_of(self, x, y):
+        """Index of the display showing (x, y); off-screen pixels go to the first display"""
+        for display in self.displays:
+            if display.contains(x, y):
+                return display.index
+        return 0
+    
+    def _worker(self, index, start, done, generation):
+        """Capture one display's pixels every tick until the barriers are aborted"""
+        try:
+            capture = self.backend_factory(self.capture_backend)
+        except Exception as e:
+            print(f"Error creating capture backend for display {index}: {e}")
+            start.abort()
+            return
+        
+        try:
+            while True:
+                start.wait()
+                if self._generation != generation:
+                    break
+                tick_start = time.perf_counter()
+                self._capture_display(capture, index)
+                self.display_times[index] = time.perf_counter() - tick_start
+                done.wait()
+        except threading.BrokenBarrierError:
+            pass
+        except Exception as e:
+            print(f"Error capturing display {index}: {e}")
+            done.abort()
+        finally:
+            capture.close()
+    
+    def _capture_display(self, capture, index):
+        """Copy one display's pixels into its scratch buffer"""
+        # Everything is read up front: after a timeout this worker must keep
+        # to the buffers of its own generation
+        indices = self._groups[index]
+        if not indices:
+            return
+        coordinates = self._coordinates
+        pixels, valid = self._scratch[index]
+        
+        bounds = self._bounds[index]
+        if bounds is not None:
+            left, top, width, height = bounds
+            frame = capture.grab(left, top, width, height)
+            for j in range(len(indices)):
+                if frame is None:
+                    valid[j] = 0
+                else:
+                    x, y = coordinates[indices[j]]
+                    frame.copy_pixel(x - left, y - top, pixels, j * 3)
+                    valid[j] = 1
+        else:
+            for j in range(len(indices)):
+                x, y = coordinates[indices[j]]
+                valid[j] = capture.read_pixel_into(x, y, pixels, j * 3)
@@ -2,20 +2,86 @@
 
 import time
 import threading
+from array import array
 from .color_utils import ColorUtils
+from .capture import create_capture_backend
+from .damage import X11DamageWatcher
+from .displays import enumerate_displays
+from .parallel_capture import ParallelCapture
+from ..metrics.profiler import ProfilerSlot
+from .rules import RulePlan
+from .sample_history import SampleHistory
+
+
+# Seconds the areas must stay unedited before the plan is rebuilt, so typing
+# into an area's fields does not recompile the rules at every keystroke
+PLAN_REBUILD_DELAY = 0.3
+
+# Area settings that decide when an area fires; editing others keeps its trigger state
+TRIGGER_INPUTS = ('coordinates', 'coordinates_condition', 'baseline_color', 'condition_color',
+                  'use_condition', 'pixels', 'templates', 'histograms', 'rule')
 
 
 class PixelMonitor:
     """Handles pixel monitoring for areas"""
     
-    def __init__(self, check_interval=0.05):
+    def __init__(self, check_interval=0.05, history_size=600, capture_backend='auto',
+                 event_driven=False, safety_poll_interval=1.0, parallel_capture=False, magnifier_radius=0):
         self.check_interval = check_interval
+        self.capture_backend = capture_backend  # See create_capture_backend
+        self.event_driven = event_driven  # Only resample pixels reported damaged by X11
+        self.safety_poll_interval = safety_poll_interval  # Full resample interval in event-driven mode
+        self.parallel_capture = parallel_capture  # Capture each display in its own worker thread
+        self.magnifier_radius = magnifier_radius  # Pixels captured around each Pixel A for previews (0: off)
+        self.magnifier_frames = {}  # Pixel A coordinates -> (width, height, RGB bytes), see request_magnifier
+        self._magnifier_wanted = None  # Pixel A coordinates with a preview, until the next sample
+        self.capture = None
+        self.history_size = history_size
+        self.histories = {}  # area id -> SampleHistory of Pixel A
         self.monitoring = False
         self.monitor_thread = None
         self.color_utils = ColorUtils()
+        self.profiler = None  # Optional SessionProfiler, checked once per tick
+        self._plan = None
+        self._plan_version = None
+        self._pending_version = None  # Newer snapshot version waiting for PLAN_REBUILD_DELAY
+        self._pending_since = 0.0
+        self._snapshot = None  # AreaSnapshot the plan was built from
+        
+        # Per-plan buffers, reused every tick so the steady state allocates nothing
+        self._pixels = array('B')  # RGB of every plan coordinate
+        self._valid = bytearray()  # Per coordinate: 1 if this tick's sample succeeded
+        self._magnified = bytearray()  # Per coordinate: 1 if it is a Pixel A that may be previewed
+        self._shown = array('h')  # Per area: RGB last passed to update_callback
+        self._thresholds = []  # Per area, from the snapshot
+        self._triggered = bytearray()  # Per area: 1 while waiting for the trigger to re-arm
+        self._plan_histories = []  # Per area: SampleHistory, in plan order
+        
+        # Counters, read by the metrics endpoint
+        self.tick_count = 0
+        self.tick_overrun_count = 0  # Ticks whose work took longer than check_interval
+        self.tick_rate = 0.0  # Smoothed ticks per second
+        self.tick_work = 0.0  # Smoothed seconds of work per tick, excluding the check_interval sleep
+        # (earlier plans' area id -> count, plan area ids, per area samples of the current plan)
+        self._sample_state = ({}, (), array('Q'))
+        self.trigger_counts = {}  # area id -> sounds triggered
+    
+    @property
+    def sample_counts(self):
+        """Dictionary of area id -> Pixel A samples taken"""
+        base, area_ids, counts = self._sample_state
+        merged = dict(base)
+        for area_id, count in zip(area_ids, counts):
+            merged[area_id] = merged.get(area_id, 0) + count
+        return merged
     
     def start_monitoring(self, areas, update_callback, play_sound_callback):
-        """Start monitoring all areas"""
+        """
+        Start monitoring the ready areas of an AreaRegistry
+        
+        Snapshots the registry publishes later are picked up at the next tick,
+        so areas can be edited, added and removed while monitoring.
+        """
         if self.monitoring:
             return
         
@@ -23,10 +89,9 @@ class PixelMonitor:
         self.areas = areas
         self.update_callback = update_callback
         self.play_sound_callback = play_sound_callback
-        
-        # Reset state for all areas
-        for area in self.areas:
-            area['color_changed'] = False
+        # Start from a fresh plan, so every area starts armed
+        self._plan = None
+        self._plan_version = None
         
         # Start monitoring thread
         self.monitor_thread = threading.Thread(target=self._monitor_all_areas, daemon=True)
@@ -38,54 +103,336 @@ class PixelMonitor:
     
     def _monitor_all_areas(self):
         """Monitor all areas simultaneously"""
+        # Created on the monitor thread: X11 connections must not be shared between threads
+        capture = create_capture_backend(self.capture_backend)
+        self.capture = capture
+        damage_watcher = self._create_damage_watcher() if self.event_driven else None
+        sampler = self._create_parallel_capture() if self.parallel_capture else None
+        sampler_plan = None
+        sampler_failures = 0
+        profiler = self.profiler
+        profiler_slot = ProfilerSlot("monitor")
+        
+        last_full_sample = None
+        last_start = None
         while self.monitoring:
-            for area in self.areas:
-                self._monitor_area(area)
+            if profiler is not None and (profiler.active or profiler_slot.profile is not None):
+                profiler.checkpoint(profiler_slot)
+            
+            rects = None
+            if damage_watcher and last_full_sample is not None:
+                # Sleep until the screen changes, at most until the next safety poll
+                next_poll = last_full_sample + self.safety_poll_interval
+                rects = damage_watcher.wait(next_poll - time.perf_counter())
+            
+            start = time.perf_counter()
+            snapshot = self.areas.snapshot()
+            if snapshot.version != self._plan_version and self._plan_due(snapshot.version, start):
+                self._rebuild_plan(snapshot)
+                # Coordinates may have changed, so resample everything
+                rects = None
+            
+            plan = self._plan
+            if plan is None:
+                time.sleep(self.check_interval)
+                continue
+            
+            if rects is None or start - last_full_sample >= self.safety_poll_interval:
+                if plan.regions:
+                    self._scan_regions(capture, range(len(plan.regions)))
+                if sampler is None:
+                    self._sample_coordinates(capture)
+                else:
+                    if sampler_plan is not plan:
+                        # Hand the new plan's coordinates and buffers to the workers
+                        sampler.configure(plan.coordinates, self._pixels, self._valid)
+                        sampler_plan = plan
+                    if sampler.sample():
+                        sampler_failures = 0
+                        if self._magnifier_wanted:
+                            # The workers read single pixels; previews need their surroundings
+                            self._sample_magnified(capture)
+                    else:
+                        sampler_failures += 1
+                        self._sample_coordinates(capture)
+                        if sampler_failures >= 3:
+                            print("Parallel capture keeps failing, capturing serially")
+                            sampler.close()
+                            sampler = None
+                last_full_sample = start
+                area_ids = None
+            else:
+                damaged = damage_watcher.damaged_coordinates(plan.coordinates, rects)
+                damaged_regions = damage_watcher.damaged_regions(plan.regions, rects)
+                if not damaged and not damaged_regions:
+                    continue
+                area_ids = set()
+                if damaged_regions:
+                    self._scan_regions(capture, damaged_regions)
+                    for region in damaged_regions:
+                        area_ids.update(plan.region_areas[region])
+                for coords in damaged:
+                    i = plan.pixel_index[coords]
+                    self._valid[i] = capture.read_pixel_into(coords[0], coords[1], self._pixels, i * 3)
+                    area_ids.update(area['id'] for area in self._snapshot.areas_at(coords))
+                if self._magnifier_wanted:
+                    self._sample_magnified(capture)
+            
+            self._evaluate_areas(area_ids)
+            self._record_tick(start, last_start)
+            last_start = start
+            # Also rate limits event-driven mode: damage arriving meanwhile is handled in one batch
             time.sleep(self.check_interval)
+        
+        self.tick_rate = 0.0
+        if profiler is not None:
+            profiler.release(profiler_slot)
+        capture.close()
+        if self.capture is capture:
+            self.capture = None
+        if damage_watcher:
+            damage_watcher.close()
+        if sampler:
+            sampler.close()
+    
+    def _create_parallel_capture(self):
+        """Start one capture worker per display, or None to capture serially"""
+        displays = enumerate_displays()
+        if len(displays) < 2:
+            print("Parallel capture needs several displays, capturing serially")
+            return None
+        sampler = ParallelCapture(displays, self.capture_backend)
+        sampler.start()
+        return sampler
+    
+    def _create_damage_watcher(self):
+        """Create an X11 Damage watcher, or None to fall back to polling"""
+        try:
+            return X11DamageWatcher()
+        except (RuntimeError, OSError) as e:
+            print(f"Event-driven capture unavailable, polling instead: {e}")
+            return None
+    
+    def _record_tick(self, start, last_start):
+        """Update the loop counters after a tick"""
+        self.tick_count += 1
+        work = time.perf_counter() - start
+        if work > self.check_interval:
+            self.tick_overrun_count += 1
+        self.tick_work = work if self.tick_work == 0.0 else self.tick_work + 0.05 * (work - self.tick_work)
+        if last_start is not None:
+            rate = 1.0 / max(start - last_start, 1e-6)
+            # Exponential moving average over roughly the last 20 ticks
+            self.tick_rate = rate if self.tick_rate == 0.0 else self.tick_rate + 0.05 * (rate - self.tick_rate)
+    
+    def _plan_due(self, version, now):
+        """Whether to rebuild the plan for a new snapshot version: at once for the first plan, else once edits pause"""
+        if self._plan is None:
+            return True
+        if version != self._pending_version:
+            self._pending_version = version
+            self._pending_since = now
+        return now - self._pending_since >= PLAN_REBUILD_DELAY
+    
+    def _rebuild_plan(self, snapshot):
+        """Compile the trigger rules of a snapshot's ready areas into one evaluation plan"""
+        self._plan_version = snapshot.version
+        # Unchanged templates and histograms keep their scanner, so an edit of one
+        # area neither reloads templates nor resets the histograms of the others
+        scanners = self._plan.scanners_by_key() if self._plan is not None else None
+        areas = snapshot.ready()
+        try:
+            plan = RulePlan(areas, scanners=scanners)
+        except Exception:
+            # Areas are only checked without reading files, so e.g. a template
+            # may be missing; monitor the areas that compile
+            plan = RulePlan([area for area in areas if self._compiles(area, scanners)], scanners=scanners)
+        
+        # Keep history of existing areas, drop it for removed ones
+        histories = {}
+        for area in plan.areas:
+            history = self.histories.get(area['id'])
+            histories[area['id']] = history if history is not None else SampleHistory(self.history_size)
+        
+        # Fold the old plan's sample counts into the base before switching
+        base, area_ids, counts = self._sample_state
+        base = dict(base)
+        for area_id, count in zip(area_ids, counts):
+            base[area_id] = base.get(area_id, 0) + count
+        
+        # Keep trigger state of areas whose pixels, colors and rule are unchanged
+        previous = {}
+        if self._plan is not None:
+            for i, area in enumerate(self._plan.areas):
+                previous[area['id']] = (area, self._triggered[i])
+        triggered = bytearray(len(plan.areas))
+        for i, area in enumerate(plan.areas):
+            old = previous.get(area['id'])
+            if old is not None and self._same_trigger_inputs(old[0], area):
+                triggered[i] = old[1]
+        
+        coordinate_count = len(plan.coordinates)
+        area_count = len(plan.areas)
+        self._pixels = array('B', bytes(3 * coordinate_count))
+        self._valid = bytearray(coordinate_count)
+        self._magnified = bytearray(coordinate_count)
+        if self.magnifier_radius > 0:
+            for pixel in plan.primary_pixels:
+                if pixel >= 0:
+                    self._magnified[pixel] = 1
+        self.magnifier_frames = {coords: frame for coords, frame in self.magnifier_frames.items()
+                                 if coords in plan.pixel_index}
+        self._shown = array('h', [-1]) * (3 * area_count)
+        self._thresholds = [area['threshold'] for area in plan.areas]
+        self._triggered = triggered
+        self._plan_histories = [histories[area['id']] for area in plan.areas]
+        self.histories = histories
+        self._sample_state = (base, tuple(area['id'] for area in plan.areas), array('Q', bytes(8 * area_count)))
+        self._snapshot = snapshot
+        self._plan = plan
     
-    def _monitor_area(self, area):
-        """Monitor a single area"""
-        current_color = self.color_utils.get_pixel_color_at(area['coordinates'])
+    @staticmethod
+    def _compiles(area, scanners):
+        """Whether an area's rule compiles, including loading its templates; prints why not"""
+        try:
+            RulePlan([area], scanners=scanners)
+        except Exception as e:
+            print(f"Error compiling rules of area {area['id'] + 1}, skipping it: {e}")
+            return False
+        return True
+    
+    @staticmethod
+    def _same_trigger_inputs(old, new):
+        """Whether an edit left everything that decides a trigger unchanged"""
+        if old is new:
+            return True
+        return all(old[key] == new[key] for key in TRIGGER_INPUTS)
+    
+    def get_history(self, area_id):
+        """Get the SampleHistory of an area, or None if it is not monitored"""
+        return self.histories.get(area_id)
+    
+    def request_magnifier(self, coordinates):
+        """
+        Ask for fresh magnifier_frames from the next sample; safe from any thread
         
-        if current_color:
-            # Update display
-            if self.update_callback:
-                self.update_callback(area['id'], current_color)
-            
-            # Check if color differs from baseline significantly
-            threshold = self._get_threshold(area)
-            if self.color_utils.color_difference(current_color, area['baseline_color']) > threshold:
-                if not area['color_changed']:
-                    # Pixel A changed from baseline!
-                    should_play = True
-                    
-                    if area['use_condition'].get():
-                        # Check if condition pixel (B) is the required color
-                        if area['coordinates_condition'] and area['condition_color']:
-                            condition_current = self.color_utils.get_pixel_color_at(area['coordinates_condition'])
-                            if condition_current:
-                                if self.color_utils.color_difference(condition_current, area['condition_color']) > threshold:
-                                    should_play = False
-                            else:
-                                should_play = False
-                        else:
-                            should_play = False
-                    
-                    if should_play:
-                        # Play sound!
-                        area['color_changed'] = True
-                        if self.play_sound_callback:
-                            self.play_sound_callback(area)
+        Args:
+            coordinates: Pixel A coordinates whose preview is shown
+        """
+        self._magnifier_wanted = frozenset(coordinates) or None
+    
+    def cancel_magnifier(self):
+        """Stop capturing neighbourhoods, e.g. when the previews are closed"""
+        self._magnifier_wanted = None
+        self.magnifier_frames = {}
+    
+    def _sample_coordinates(self, capture):
+        """Sample every plan coordinate once for this tick into the pixel buffer"""
+        coordinates = self._plan.coordinates
+        pixels = self._pixels
+        valid = self._valid
+        magnified = self._magnified
+        wanted = self._magnifier_wanted
+        read_pixel_into = capture.read_pixel_into
+        for i in range(len(coordinates)):
+            x, y = coordinates[i]
+            if wanted is not None and magnified[i] and coordinates[i] in wanted:
+                valid[i] = self._sample_neighbourhood(capture, x, y, i)
             else:
-                # Color returned to baseline
-                if area['color_changed']:
-                    area['color_changed'] = False
+                valid[i] = read_pixel_into(x, y, pixels, i * 3)
+        if wanted is not None:
+            self._magnifier_wanted = None
     
-    def _get_threshold(self, area):
-        """Get threshold value from area"""
-        try:
-            val = int(area['ui']['threshold_entry'].get())
-            return max(0, min(100, val))
-        except:
-            return 30
-
+    def _sample_magnified(self, capture):
+        """Sample the previewed Pixel A coordinates again with their surroundings"""
+        coordinates = self._plan.coordinates
+        wanted = self._magnifier_wanted
+        for i in range(len(coordinates)):
+            if self._magnified[i] and coordinates[i] in wanted:
+                x, y = coordinates[i]
+                self._valid[i] = self._sample_neighbourhood(capture, x, y, i)
+        self._magnifier_wanted = None
+    
+    def _scan_regions(self, capture, regions):
+        """Grab search rectangles of the plan and update the rules scanning them"""
+        plan = self._plan
+        for region in regions:
+            left, top, width, height = plan.regions[region]
+            # Scanned right away: backends may reuse the frame for the next grab
+            plan.scan(region, capture.grab(left, top, width, height))
+    
+    def _sample_neighbourhood(self, capture, x, y, i):
+        """
+        Sample a pixel from one grab of its surroundings and copy the grab to magnifier_frames
+        
+        The grab costs about as much as a single pixel, so previews need no
+        screenshots of their own.
+        """
+        radius = self.magnifier_radius
+        size = 2 * radius + 1
+        frame = capture.grab(x - radius, y - radius, size, size)
+        if frame is None:
+            # E.g. too close to the screen edge for the whole neighbourhood
+            return capture.read_pixel_into(x, y, self._pixels, i * 3)
+        frame.copy_pixel(radius, radius, self._pixels, i * 3)
+        self.magnifier_frames[(x, y)] = (size, size, frame.to_rgb())
+        return True
+    
+    def _evaluate_areas(self, area_ids=None):
+        """
+        Evaluate the rules of all areas against this tick's samples
+        
+        Args:
+            area_ids: IDs of the areas whose pixels were resampled, or None for all
+        """
+        plan = self._plan
+        pixels = self._pixels
+        valid = self._valid
+        shown = self._shown
+        triggered = self._triggered
+        histories = self._plan_histories
+        counts = self._sample_state[2]
+        primary_pixels = plan.primary_pixels
+        fire_slots = plan.fire_slots
+        rearm_slots = plan.rearm_slots
+        values = plan.evaluate(pixels, valid, self._thresholds)
+        now = time.monotonic()  # Orders the history
+        wall_time = time.time()
+        
+        areas = plan.areas
+        for i in range(len(areas)):
+            area = areas[i]
+            if area_ids is not None and area['id'] not in area_ids:
+                continue
+            
+            pixel = primary_pixels[i]
+            if pixel >= 0 and valid[pixel]:
+                o = pixel * 3
+                histories[i].append_from(now, pixels, o, wall_time)
+                counts[i] += 1
+                # Update display, only when the color changed
+                s = i * 3
+                if (self.update_callback and
+                        (shown[s] != pixels[o] or shown[s + 1] != pixels[o + 1] or shown[s + 2] != pixels[o + 2])):
+                    shown[s] = pixels[o]
+                    shown[s + 1] = pixels[o + 1]
+                    shown[s + 2] = pixels[o + 2]
+                    try:
+                        self.update_callback(area['id'], (pixels[o], pixels[o + 1], pixels[o + 2]))
+                    except Exception as e:
+                        # E.g. the area's widgets were destroyed meanwhile; keep monitoring the others
+                        print(f"Error updating area {area['id'] + 1}: {e}")
+            
+            if triggered[i]:
+                # Trigger condition cleared (e.g. Pixel A returned to baseline)
+                if values[rearm_slots[i]]:
+                    triggered[i] = 0
+            elif values[fire_slots[i]]:
+                # Play sound!
+                triggered[i] = 1
+                self.trigger_counts[area['id']] = self.trigger_counts.get(area['id'], 0) + 1
+                if self.play_sound_callback:
+                    try:
+                        self.play_sound_callback(area)
+                    except Exception as e:
+                        print(f"Error triggering area {area['id'] + 1}: {e}")
@@ -0,0 +1,431 @@
+"""Declarative trigger rules compiled into a batched evaluation plan"""
+
+import os
+from .template_match import TemplateMatcher
+from .histogram import ColorHistogram
+
+
+class RulePlan:
+    """
+    Evaluation plan for the trigger rules of a set of areas
+    
+    A rule is a nested dictionary stored in the layout JSON:
+        
+        {"changed": "A"}                  pixel A differs from its reference color
+        {"matches": "B", "threshold": 10} pixel B matches its reference color
+        {"all": [rule, ...]}              every sub-rule holds
+        {"any": [rule, ...]}              at least one sub-rule holds
+        {"not": rule}                     the sub-rule does not hold
+        {"at_least": 3, "of": [rule, ...]}
+        {"appears": "icon"}               template "icon" is found in its search region
+        {"disappears": "icon"}            template "icon" is not found in its search region
+        {"fraction": "bar", "colors": [[255, 0, 0]], "above": 0.4}
+                                          over 40% of histogram "bar" is in red's bin
+                                          ("below" for an upper bound)
+    
+    Pixel "A" is the area's coordinates/baseline color, "B" is the condition
+    pixel/color, any other name refers to an entry in area['pixels']. Template
+    names refer to entries in area['templates'], histogram names to entries
+    in area['histograms']:
+        
+        {"file": "icon.png", "region": [left, top, width, height], "score": 0.8}
+        {"region": [left, top, width, height], "levels": 4}
+    
+    Compiling flattens every area's rule into three flat tables: probes (one
+    color difference per distinct pixel/reference pair), leaves (a probe
+    compared against a threshold) and nodes (count of true inputs against a
+    minimum). One pass over these tables evaluates all rules of the frame.
+    
+    A leaf whose pixel could not be sampled (capture failure, off screen) or
+    whose region could not be scanned is unknown (None) rather than False.
+    "not" keeps it unknown, and nodes are only decided when the known inputs
+    settle them, so a failed grab neither fires an area nor re-arms it.
+    
+    Samples are read from a flat RGB buffer: pixel i of self.coordinates
+    occupies bytes 3*i .. 3*i+2, so evaluation allocates nothing. Rules
+    looking at whole rectangles instead use scanners: the monitor grabs each
+    of self.regions once per tick and passes it to scan(), which updates the
+    scanners of that region for the next evaluate().
+    """
+    
+    def __init__(self, areas, coordinates=(), scanners=None, load=True):
+        """
+        Compile a plan
+        
+        Args:
+            areas: Area configurations (see AreaRegistry.freeze) to compile, in evaluation order
+            coordinates: Preferred sample buffer order; pixels used by rules
+                but missing here are appended
+            scanners: Scanners of an earlier plan by key (see scanners_by_key)
+                to reuse, keeping their loaded templates and histogram state
+            load: Create the scanners; False only checks the rules, without
+                reading template files
+        """
+        self.areas = list(areas)
+        self.coordinates = [tuple(c) for c in coordinates]
+        self.pixel_index = {c: i for i, c in enumerate(self.coordinates)}
+        self.primary_pixels = []  # per area: sample buffer index of Pixel A, or -1
+        self.probes = []  # (pixel index or -1, reference r, g, b)
+        self.leaves = []  # (slot, probe index, area index, threshold override, want_changed)
+        self.nodes = []  # (slot, ((input slot, negate), ...), minimum true inputs)
+        self.regions = []  # (left, top, width, height) grabbed once per tick for scanners
+        self.region_areas = []  # per region: IDs of the areas whose rules scan it
+        self.scanners = []  # (region index, object with scan(frame) returning True, False or None)
+        self.scanner_keys = []  # per scanner: key identifying its configuration
+        self.scan_leaves = []  # (slot, scanner index, wanted scan result)
+        self.fraction_leaves = []  # (slot, histogram scanner index, bins, above or None, below or None)
+        self.fire_slots = []  # per area: slot that fires the sound
+        self.rearm_slots = []  # per area: slot that re-arms the trigger
+        self._probe_index = {}
+        self._leaf_index = {}
+        self._region_index = {}
+        self._scanner_index = {}
+        self._reuse = scanners or {}
+        self._load = load
+        self._slot_count = 0
+        
+        for area_index, area in enumerate(self.areas):
+            coords = tuple(area['coordinates']) if area['coordinates'] else None
+            self.primary_pixels.append(self._pixel(coords) if coords else -1)
+            self.fire_slots.append(self._compile(area, area_index, self.rule_for(area)))
+            self.rearm_slots.append(self._compile(area, area_index, self.rearm_rule_for(area)))
+        
+        self._diffs = [0] * len(self.probes)
+        self._values = [False] * self._slot_count
+        self._scanned = [None] * len(self.scanners)
+        self._region_scanners = [
+            tuple(i for i, (region, scanner) in enumerate(self.scanners) if region == index)
+            for index in range(len(self.regions))
+        ]
+    
+    @staticmethod
+    def rule_for(area):
+        """Get the trigger rule of an area, falling back to the Pixel A/B behavior"""
+        if area.get('rule'):
+            return area['rule']
+        if area['use_condition']:
+            return {"all": [{"changed": "A"}, {"matches": "B"}]}
+        return {"changed": "A"}
+    
+    @staticmethod
+    def rearm_rule_for(area):
+        """Get the rule that re-arms an area after it fired"""
+        if area.get('rule'):
+            return {"not": area['rule']}
+        # Pixel A returned to its baseline
+        return {"matches": "A"}
+    
+    @staticmethod
+    def validate(area, load=False):
+        """
+        Raise ValueError if the area's rule is malformed
+        
+        Args:
+            area: Area configuration to check
+            load: Also load the template files, raising ValueError if one cannot be read
+        """
+        RulePlan([area], load=load)
+    
+    def scanners_by_key(self):
+        """Get the plan's scanners by key, to pass to the next plan"""
+        return {key: scanner for key, (region, scanner) in zip(self.scanner_keys, self.scanners)}
+    
+    @staticmethod
+    def uses_pixel(rule, name):
+        """Whether a rule compares the named pixel"""
+        if not isinstance(rule, dict):
+            return False
+        if rule.get('changed') == name or rule.get('matches') == name:
+            return True
+        children = []
+        for key in ('all', 'any', 'of'):
+            if isinstance(rule.get(key), list):
+                children.extend(rule[key])
+        if 'not' in rule:
+            children.append(rule['not'])
+        return any(RulePlan.uses_pixel(child, name) for child in children)
+    
+    def scan(self, region, frame):
+        """
+        Update the scanners of a region from this tick's capture
+        
+        Args:
+            region: Index into self.regions
+            frame: CaptureFrame of the region, or None if the grab failed
+        """
+        scanned = self._scanned
+        for i in self._region_scanners[region]:
+            scanned[i] = self.scanners[i][1].scan(frame)
+    
+    def evaluate(self, pixels, valid, thresholds):
+        """
+        Evaluate every rule against one frame
+        
+        Args:
+            pixels: Flat RGB sample buffer ordered like self.coordinates
+            valid: Per pixel, nonzero if this tick's sample succeeded
+            thresholds: Threshold of each area, in plan order
+        
+        Returns:
+            List of slot values (True, False or None if unknown); index it
+            with fire_slots / rearm_slots
+        """
+        diffs = self._diffs
+        for i, (pixel, r, g, b) in enumerate(self.probes):
+            if pixel < 0 or not valid[pixel]:
+                diffs[i] = -1
+            else:
+                o = pixel * 3
+                diffs[i] = max(abs(pixels[o] - r), abs(pixels[o + 1] - g), abs(pixels[o + 2] - b))
+        
+        values = self._values
+        for slot, probe, area_index, override, want_changed in self.leaves:
+            diff = diffs[probe]
+            if diff < 0:
+                values[slot] = None
+                continue
+            threshold = thresholds[area_index] if override is None else override
+            values[slot] = (diff > threshold) == want_changed
+        
+        scanned = self._scanned
+        for slot, scanner, wanted in self.scan_leaves:
+            result = scanned[scanner]
+            values[slot] = None if result is None else result == wanted
+        scanners = self.scanners
+        for slot, scanner, bins, above, below in self.fraction_leaves:
+            fraction = scanners[scanner][1].fraction(bins) if scanned[scanner] else None
+            if fraction is None:
+                values[slot] = None
+            else:
+                values[slot] = (above is None or fraction > above) and (below is None or fraction < below)
+        
+        # Children are compiled before their parents, so evaluating nodes in
+        # order only ever reads finished slots
+        for slot, inputs, minimum in self.nodes:
+            count = 0
+            unknown = 0
+            for input_slot, negate in inputs:
+                value = values[input_slot]
+                if value is None:
+                    unknown += 1
+                elif value != negate:
+                    count += 1
+            if count >= minimum:
+                values[slot] = True
+            elif count + unknown < minimum:
+                values[slot] = False
+            else:
+                # The unknown inputs could go either way
+                values[slot] = None
+        
+        return values
+    
+    def _new_slot(self):
+        """Allocate a value slot"""
+        slot = self._slot_count
+        self._slot_count += 1
+        return slot
+    
+    def _compile(self, area, area_index, rule):
+        """Compile a rule into the plan and return the slot holding its result"""
+        if not isinstance(rule, dict) or len(rule) == 0:
+            raise ValueError(f"Area {area['id'] + 1}: rule must be a non-empty object, got {rule!r}")
+        
+        if 'changed' in rule or 'matches' in rule:
+            want_changed = 'changed' in rule
+            name = rule['changed'] if want_changed else rule['matches']
+            override = rule.get('threshold')
+            if override is not None:
+                override = max(0, min(100, int(override)))
+            return self._leaf(area, area_index, name, override, want_changed)
+        
+        if 'appears' in rule or 'disappears' in rule:
+            wanted = 'appears' in rule
+            name = rule['appears'] if wanted else rule['disappears']
+            return self._scan_leaf(self._template_scanner(area, name), wanted)
+        
+        if 'fraction' in rule:
+            return self._fraction_leaf(area, rule)
+        
+        if 'not' in rule:
+            child = self._compile(area, area_index, rule['not'])
+            return self._node(((child, True),), 1)
+        
+        if 'all' in rule or 'any' in rule:
+            children = self._children(area, area_index, rule['all'] if 'all' in rule else rule['any'])
+            minimum = len(children) if 'all' in rule else 1
+            return self._node(tuple((c, False) for c in children), minimum)
+        
+        if 'at_least' in rule:
+            children = self._children(area, area_index, rule.get('of'))
+            minimum = int(rule['at_least'])
+            if minimum < 1 or minimum > len(children):
+                raise ValueError(f"Area {area['id'] + 1}: at_least must be between 1 and {len(children)}")
+            return self._node(tuple((c, False) for c in children), minimum)
+        
+        raise ValueError(f"Area {area['id'] + 1}: unknown rule {rule!r}")
+    
+    def _children(self, area, area_index, rules):
+        """Compile a list of sub-rules"""
+        if not isinstance(rules, list) or not rules:
+            raise ValueError(f"Area {area['id'] + 1}: expected a non-empty list of rules")
+        return [self._compile(area, area_index, r) for r in rules]
+    
+    def _leaf(self, area, area_index, name, override, want_changed):
+        """Add a pixel comparison, sharing probes and leaves where possible"""
+        coords, ref = self._resolve_pixel(area, name)
+        probe_key = (coords, ref)
+        probe = self._probe_index.get(probe_key)
+        if probe is None:
+            probe = len(self.probes)
+            if coords is None or ref is None:
+                # Never matches nor differs
+                self.probes.append((-1, 0, 0, 0))
+            else:
+                self.probes.append((self._pixel(coords), ref[0], ref[1], ref[2]))
+            self._probe_index[probe_key] = probe
+        
+        # Leaves with an explicit threshold do not depend on the area, so share them
+        leaf_key = (probe, area_index if override is None else None, override, want_changed)
+        slot = self._leaf_index.get(leaf_key)
+        if slot is None:
+            slot = self._new_slot()
+            self.leaves.append((slot, probe, area_index, override, want_changed))
+            self._leaf_index[leaf_key] = slot
+        return slot
+    
+    def _scan_leaf(self, scanner, wanted):
+        """Add a check of a scanner's result, sharing it between areas"""
+        leaf_key = ('scan', scanner, wanted)
+        slot = self._leaf_index.get(leaf_key)
+        if slot is None:
+            slot = self._new_slot()
+            self.scan_leaves.append((slot, scanner, wanted))
+            self._leaf_index[leaf_key] = slot
+        return slot
+    
+    def _scanner(self, area, key, region, create):
+        """Get the index of the scanner for key, creating it on first use"""
+        index = self._scanner_index.get(key)
+        if index is None:
+            region_index = self._region_index.get(region)
+            if region_index is None:
+                region_index = len(self.regions)
+                self.regions.append(region)
+                self.region_areas.append(set())
+                self._region_index[region] = region_index
+            index = len(self.scanners)
+            scanner = self._reuse.get(key)
+            if scanner is None and self._load:
+                scanner = create()
+            self.scanners.append((region_index, scanner))
+            self.scanner_keys.append(key)
+            self._scanner_index[key] = index
+        self.region_areas[self.scanners[index][0]].add(area['id'])
+        return index
+    
+    def _template_scanner(self, area, name):
+        """Get the scanner looking for one of an area's templates"""
+        template = (area.get('templates') or {}).get(name)
+        if not isinstance(template, dict):
+            raise ValueError(f"Area {area['id'] + 1}: rule references unknown template {name!r}")
+        region = self._region(area, template.get('region'))
+        score = float(template.get('score', 0.8))
+        if not 0 < score <= 1:
+            raise ValueError(f"Area {area['id'] + 1}: template score must be between 0 and 1, got {score}")
+        file_path = template.get('file')
+        if not file_path:
+            raise ValueError(f"Area {area['id'] + 1}: template {name!r} has no file")
+        
+        def create():
+            try:
+                return TemplateMatcher.load(file_path, score)
+            except OSError as e:
+                raise ValueError(f"Area {area['id'] + 1}: cannot load template {file_path!r}: {e}")
+        
+        # An edited image gets a new key, so it is loaded again instead of reused
+        version = None  # Checks without loading do no file I/O
+        if self._load:
+            try:
+                stat = os.stat(file_path)
+            except OSError as e:
+                raise ValueError(f"Area {area['id'] + 1}: cannot load template {file_path!r}: {e}")
+            version = (stat.st_mtime_ns, stat.st_size)
+        return self._scanner(area, ('template', file_path, version, region, score), region, create)
+    
+    def _fraction_leaf(self, area, rule):
+        """Add a bin fraction check of one of an area's histograms"""
+        name = rule['fraction']
+        histogram = (area.get('histograms') or {}).get(name)
+        if not isinstance(histogram, dict):
+            raise ValueError(f"Area {area['id'] + 1}: rule references unknown histogram {name!r}")
+        region = self._region(area, histogram.get('region'))
+        levels = int(histogram.get('levels', 4))
+        if not 2 <= levels <= ColorHistogram.MAX_LEVELS:
+            raise ValueError(f"Area {area['id'] + 1}: histogram levels must be between 2 and "
+                             f"{ColorHistogram.MAX_LEVELS}, got {levels}")
+        scanner = self._scanner(area, ('histogram', region, levels), region, lambda: ColorHistogram(levels))
+        
+        colors = rule.get('colors')
+        if not isinstance(colors, list) or not colors or not all(
+                isinstance(c, (list, tuple)) and len(c) == 3 for c in colors):
+            raise ValueError(f"Area {area['id'] + 1}: fraction rule needs \"colors\": [[r, g, b], ...]")
+        bins = tuple(sorted({ColorHistogram.bin_of(tuple(max(0, min(255, int(v))) for v in c), levels)
+                             for c in colors}))
+        
+        above = rule.get('above')
+        below = rule.get('below')
+        if above is None and below is None:
+            raise ValueError(f"Area {area['id'] + 1}: fraction rule needs \"above\" and/or \"below\"")
+        above = float(above) if above is not None else None
+        below = float(below) if below is not None else None
+        
+        leaf_key = ('fraction', scanner, bins, above, below)
+        slot = self._leaf_index.get(leaf_key)
+        if slot is None:
+            slot = self._new_slot()
+            self.fraction_leaves.append((slot, scanner, bins, above, below))
+            self._leaf_index[leaf_key] = slot
+        return slot
+    
+    @staticmethod
+    def _region(area, region):
+        """Validate a [left, top, width, height] search rectangle"""
+        if not isinstance(region, (list, tuple)) or len(region) != 4:
+            raise ValueError(f"Area {area['id'] + 1}: region must be [left, top, width, height], got {region!r}")
+        left, top, width, height = (int(v) for v in region)
+        if width <= 0 or height <= 0:
+            raise ValueError(f"Area {area['id'] + 1}: region must have a positive size, got {region!r}")
+        return left, top, width, height
+    
+    def _pixel(self, coords):
+        """Get the sample buffer index of a coordinate, adding it if needed"""
+        index = self.pixel_index.get(coords)
+        if index is None:
+            index = len(self.coordinates)
+            self.coordinates.append(coords)
+            self.pixel_index[coords] = index
+        return index
+    
+    def _node(self, inputs, minimum):
+        """Add a combinator node"""
+        slot = self._new_slot()
+        self.nodes.append((slot, inputs, minimum))
+        return slot
+    
+    @staticmethod
+    def _resolve_pixel(area, name):
+        """Get the (coordinates, reference color) pair for a named pixel"""
+        if name == "A":
+            coords, color = area['coordinates'], area['baseline_color']
+        elif name == "B":
+            coords, color = area['coordinates_condition'], area['condition_color']
+        else:
+            pixel = area.get('pixels', {}).get(name)
+            if pixel is None:
+                raise ValueError(f"Area {area['id'] + 1}: rule references unknown pixel {name!r}")
+            coords, color = pixel.get('coordinates'), pixel.get('color')
+        
+        coords = tuple(coords) if coords else None
+        color = tuple(color) if color else None
+        return coords, color
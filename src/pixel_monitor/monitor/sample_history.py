@@ -0,0 +1,153 @@
+"""Fixed-size per-area sample history"""
+
+from array import array
+
+
+class SampleHistory:
+    """
+    Ring buffer of (timestamp, RGB, wall_time) samples backed by preallocated arrays
+    
+    timestamp is time.monotonic(), which orders the samples and is what
+    window() and stats() search, so a wall clock step cannot break the
+    binary search. wall_time is the time.time() of the same sample, for
+    showing it or sending it to other machines.
+    """
+    
+    def __init__(self, capacity=600):
+        """
+        Initialize sample history
+        
+        Args:
+            capacity: Number of samples kept (600 = 30 seconds at 50ms intervals)
+        """
+        self.capacity = capacity
+        self._timestamps = array('d', bytes(8 * capacity))
+        self._wall_times = array('d', bytes(8 * capacity))
+        self._colors = array('B', bytes(3 * capacity))
+        self._next = 0  # Slot the next sample is written to
+        self._count = 0
+    
+    def append(self, timestamp, color, wall_time):
+        """Record a sample, overwriting the oldest one when full"""
+        i = self._next
+        j = i * 3
+        colors = self._colors
+        colors[j] = color[0]
+        colors[j + 1] = color[1]
+        colors[j + 2] = color[2]
+        self._timestamps[i] = timestamp
+        self._wall_times[i] = wall_time
+        self._next = i + 1 if i + 1 < self.capacity else 0
+        if self._count < self.capacity:
+            self._count += 1
+    
+    def append_from(self, timestamp, pixels, offset, wall_time):
+        """Record a sample read from bytes offset .. offset+2 of an RGB buffer"""
+        i = self._next
+        j = i * 3
+        colors = self._colors
+        colors[j] = pixels[offset]
+        colors[j + 1] = pixels[offset + 1]
+        colors[j + 2] = pixels[offset + 2]
+        self._timestamps[i] = timestamp
+        self._wall_times[i] = wall_time
+        self._next = i + 1 if i + 1 < self.capacity else 0
+        if self._count < self.capacity:
+            self._count += 1
+    
+    def clear(self):
+        """Forget all samples"""
+        self._next = 0
+        self._count = 0
+    
+    def latest(self):
+        """Get the most recent (timestamp, color, wall_time) sample, or None"""
+        if not self._count:
+            return None
+        return self._sample(self._count - 1)
+    
+    def window(self, since=None, until=None):
+        """
+        Iterate over samples with since <= timestamp <= until, oldest first
+        
+        Bounds are time.monotonic() values, e.g. since=time.monotonic() - 5.
+        Samples are read in place; the buffer is never copied.
+        """
+        start, stop = self._bounds(since, until)
+        for n in range(start, stop):
+            yield self._sample(n)
+    
+    def stats(self, since=None, until=None):
+        """
+        Summarize samples in a time window
+        
+        Returns:
+            Dictionary with count, first/last timestamp and wall time and
+            per-channel min/max/mean RGB tuples, or None if the window is empty
+        """
+        start, stop = self._bounds(since, until)
+        if start >= stop:
+            return None
+        
+        colors = self._colors
+        lo = [255, 255, 255]
+        hi = [0, 0, 0]
+        total = [0, 0, 0]
+        for n in range(start, stop):
+            j = self._slot(n) * 3
+            for c in range(3):
+                v = colors[j + c]
+                total[c] += v
+                if v < lo[c]:
+                    lo[c] = v
+                if v > hi[c]:
+                    hi[c] = v
+        
+        count = stop - start
+        return {
+            'count': count,
+            'first': self._timestamps[self._slot(start)],
+            'last': self._timestamps[self._slot(stop - 1)],
+            'first_wall_time': self._wall_times[self._slot(start)],
+            'last_wall_time': self._wall_times[self._slot(stop - 1)],
+            'min': tuple(lo),
+            'max': tuple(hi),
+            'mean': tuple(t / count for t in total)
+        }
+    
+    def _slot(self, n):
+        """Map the n-th oldest sample to its array slot"""
+        oldest = self._next - self._count
+        return (oldest + n) % self.capacity
+    
+    def _sample(self, n):
+        """Get the n-th oldest sample"""
+        i = self._slot(n)
+        j = i * 3
+        colors = self._colors
+        return self._timestamps[i], (colors[j], colors[j + 1], colors[j + 2]), self._wall_times[i]
+    
+    def _bounds(self, since, until):
+        """Binary search the [start, stop) sample range for a time window"""
+        start, stop = 0, self._count
+        if since is not None:
+            start = self._search(since, strict=False)
+        if until is not None:
+            stop = self._search(until, strict=True)
+        return start, stop
+    
+    def _search(self, timestamp, strict):
+        """Index of the first sample newer than (strict) or at least timestamp"""
+        lo, hi = 0, self._count
+        timestamps = self._timestamps
+        while lo < hi:
+            mid = (lo + hi) // 2
+            t = timestamps[self._slot(mid)]
+            if t < timestamp or (strict and t == timestamp):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+    
+    def __len__(self):
+        return self._count
@@ -0,0 +1,234 @@
+"""Locating a template image inside captured frames"""
+
+import os
+import math
+import threading
+from array import array
+from operator import mul
+
+
+class TemplateMatcher:
+    """
+    Finds a template inside a search rectangle with pyramid normalized cross-correlation
+    
+    Frame and template are converted to grayscale and halved in size up to
+    three times. The smallest level is searched exhaustively and the best
+    candidates are refined on every finer level within a pixel of the
+    position scaled up from the level below, so most of the work happens on
+    images 1/64 of the original size. Normalized cross-correlation scores
+    range from -1 to 1 and ignore uniform brightness and contrast changes.
+    """
+    
+    CANDIDATES = 4  # Positions refined from the coarsest level
+    REFINE_RADIUS = 1  # Pixels searched around a candidate on the next finer level
+    MIN_COARSE_SIZE = 6  # The template is not reduced below this many pixels per side
+    
+    _cache = {}  # (path, mtime) -> grayscale template image
+    _cache_lock = threading.Lock()
+    
+    def __init__(self, template, min_score=0.8, max_levels=3):
+        """
+        Initialize template matcher
+        
+        Args:
+            template: PIL image to look for
+            min_score: Correlation at which the template counts as present
+            max_levels: Maximum number of times the images are halved
+        """
+        gray = template.convert('L')
+        self.width, self.height = gray.size
+        self.min_score = min_score
+        
+        levels = 0
+        while (levels < max_levels and
+               min(self.width, self.height) >> (levels + 1) >= self.MIN_COARSE_SIZE):
+            levels += 1
+        self.levels = levels
+        self._templates = [_Template(gray if level == 0 else gray.reduce(1 << level))
+                           for level in range(levels + 1)]
+        
+        self._last_image = None  # Grayscale bytes of the last frame scanned
+        self.score = None  # Score of the last match, None if the frame could not be searched
+        self.position = None  # (x, y) of the best match relative to the search rectangle
+    
+    @classmethod
+    def load(cls, path, min_score=0.8):
+        """
+        Create a matcher for an image file
+        
+        Decoded templates are cached until the file changes, so recompiling
+        rules does not read the file again.
+        """
+        path = os.path.abspath(path)
+        key = (path, os.path.getmtime(path))
+        with cls._cache_lock:
+            image = cls._cache.get(key)
+            if image is None:
+                from PIL import Image
+                with Image.open(path) as source:
+                    image = source.convert('L')
+                cls._cache = {k: v for k, v in cls._cache.items() if k[0] != path}
+                cls._cache[key] = image
+        return cls(image, min_score)
+    
+    def scan(self, frame):
+        """
+        Search a captured frame for the template
+        
+        Returns:
+            True if it is present, False if not, None if the frame is missing
+            or smaller than the template
+        """
+        if frame is None or frame.width < self.width or frame.height < self.height:
+            self.score = None
+            self.position = None
+            return None
+        
+        image = frame.to_image().convert('L')
+        data = image.tobytes()
+        if data != self._last_image:
+            # Nothing to do for a frame identical to the last one
+            self._last_image = data
+            self.score, self.position = self.match(image)
+        return self.score >= self.min_score
+    
+    def match(self, image):
+        """
+        Find the best match in a grayscale image
+        
+        Returns:
+            (score, (x, y)) of the best position
+        """
+        levels = [image] + [image.reduce(1 << level) for level in range(1, self.levels + 1)]
+        
+        # Exhaustive search of the coarsest level
+        coarse = _Level(levels[-1])
+        scored = coarse.search_all(self._templates[-1])
+        candidates = self._distinct(sorted(scored, reverse=True), self.CANDIDATES)
+        
+        # Refine around the candidates, level by level, keeping fewer on the larger levels
+        radius = self.REFINE_RADIUS
+        for level in range(self.levels - 1, -1, -1):
+            level_image = levels[level]
+            template = self._templates[level]
+            width, height = template.width, template.height
+            max_x = level_image.width - width
+            max_y = level_image.height - height
+            refined = {}
+            for score, (x, y) in candidates:
+                # The position doubles, give or take the radius
+                left = max(0, x * 2 - radius)
+                top = max(0, y * 2 - radius)
+                right = min(max_x, x * 2 + radius + 1)
+                bottom = min(max_y, y * 2 + radius + 1)
+                window = _Level(level_image.crop((left, top, right + width, bottom + height)))
+                for score, (wx, wy) in window.search_all(template):
+                    refined[(left + wx, top + wy)] = (score, (left + wx, top + wy))
+            keep = max(1, len(candidates) // 2)
+            candidates = self._distinct(sorted(refined.values(), reverse=True), keep)
+        
+        if not candidates:
+            return -1.0, None
+        return candidates[0]
+    
+    @staticmethod
+    def _distinct(scored, count):
+        """Take the best scores, skipping positions next to one already taken"""
+        taken = []
+        for result in scored:
+            x, y = result[1]
+            if all(abs(x - tx) > 1 or abs(y - ty) > 1 for score, (tx, ty) in taken):
+                taken.append(result)
+                if len(taken) == count:
+                    break
+        return taken
+
+
+class _Template:
+    """A grayscale pyramid level of a template"""
+    
+    def __init__(self, image):
+        self.width, self.height = image.size
+        data = image.tobytes()
+        self.rows = [data[y * self.width:(y + 1) * self.width] for y in range(self.height)]
+        self.count = len(data)
+        self.total = sum(data)
+        # sqrt of count times the variance, the template's part of the NCC denominator
+        self.spread = math.sqrt(max(0.0, sum(map(mul, data, data)) - self.total * self.total / self.count))
+        # Smaller slots make the multiplications faster; every window sum must still fit
+        self.typecode = 'I' if 255 * 255 * self.count < 1 << 32 else 'Q'
+        self._kernels = {}
+    
+    def kernels(self, image_width):
+        """
+        Get (span, template kernel, all-ones kernel) packed for images of a width
+        
+        Kernels hold the reversed template laid out with the image's stride,
+        so multiplying them with a packed image correlates instead of convolving.
+        """
+        kernels = self._kernels.get(image_width)
+        if kernels is None:
+            span = (self.height - 1) * image_width + self.width
+            kernel = array(self.typecode, bytes(span * array(self.typecode).itemsize))
+            ones = array(self.typecode, kernel)
+            for k, row in enumerate(self.rows):
+                start = span - 1 - k * image_width
+                for j, value in enumerate(row):
+                    kernel[start - j] = value
+                    ones[start - j] = 1
+            kernels = (span, int.from_bytes(kernel.tobytes(), 'little'), int.from_bytes(ones.tobytes(), 'little'))
+            self._kernels[image_width] = kernels
+        return kernels
+
+
+class _Level:
+    """A grayscale pyramid level of a frame"""
+    
+    def __init__(self, image):
+        self.width, self.height = image.size
+        self.data = image.tobytes()
+    
+    def search_all(self, template):
+        """
+        Score the template at every position
+        
+        The image is packed into 32- or 64-bit slots of a big integer, so one
+        integer multiplication with a packed kernel (done in C) yields a
+        window sum for every position at once: the products with the
+        template, and with the all-ones kernel the sums and sums of squares.
+        """
+        span, kernel, ones = template.kernels(self.width)
+        typecode = template.typecode
+        values = array(typecode, list(self.data))
+        squares = array(typecode, map(mul, values, values))
+        products = self._correlate(values, kernel, span)
+        totals = self._correlate(values, ones, span)
+        square_totals = self._correlate(squares, ones, span)
+        
+        image_width = self.width
+        count = template.count
+        template_total = template.total
+        template_spread = template.spread
+        results = []
+        for y in range(self.height - template.height + 1):
+            o = y * image_width
+            for x in range(image_width - template.width + 1):
+                total = totals[o]
+                spread = square_totals[o] - total * total / count
+                if spread <= 1e-9 or template_spread <= 1e-9:
+                    # A flat window or template has no pattern to correlate
+                    score = 1.0 if spread <= 1e-9 and template_spread <= 1e-9 else 0.0
+                else:
+                    score = (products[o] - total * template_total / count) / (math.sqrt(spread) * template_spread)
+                results.append((score, (x, y)))
+                o += 1
+        return results
+    
+    @staticmethod
+    def _correlate(values, kernel, span):
+        """Multiply packed values with a kernel; entry o belongs to the window whose top left pixel is values[o]"""
+        product = int.from_bytes(values.tobytes(), 'little') * kernel
+        coefficients = array(values.typecode)
+        coefficients.frombytes(product.to_bytes(values.itemsize * (len(values) + span), 'little'))
+        # Entries of windows wrapping around the right edge are never read
+        return coefficients[span - 1:]
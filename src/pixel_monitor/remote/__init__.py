@@ -0,0 +1,6 @@
+"""Capture agents and the aggregator collecting their alerts"""
+
+from .agent import CaptureAgent, EventSender, load_areas, run_agent
+from .aggregator import Aggregator, run_aggregator
+
+__all__ = ['CaptureAgent', 'EventSender', 'load_areas', 'run_agent', 'Aggregator', 'run_aggregator']
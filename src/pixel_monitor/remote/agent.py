@@ -0,0 +1,319 @@
+"""Headless capture agent streaming samples and triggers to an aggregator"""
+
+import json
+import time
+import select
+import socket
+import threading
+from collections import deque
+from .protocol import (parse_address, encode_areas, encode_events, EVENT,
+                       EVENT_TRIGGER, EVENT_SAMPLE)
+from ..monitor import PixelMonitor, AreaRegistry
+from ..metrics import SessionProfiler
+
+
+class EventSender:
+    """
+    Streams events to an aggregator over one persistent connection
+    
+    Triggers wake the sender thread at once; samples wait up to
+    batch_interval for company, so a burst of color changes goes out as one
+    write. Everything queued when the thread wakes is sent together. After a
+    connection error the sender reconnects and resends the area table first.
+    """
+    
+    def __init__(self, address, agent, batch_interval=0.02, max_batch=4096,
+                 queue_size=16384, reconnect_interval=1.0, timeout=5.0):
+        """
+        Initialize event sender
+        
+        Args:
+            address: Aggregator address, tcp://host:port or unix:///path
+            agent: Name the aggregator knows this agent by
+            batch_interval: Seconds samples may wait to be batched with others
+            max_batch: Maximum number of events per EVENTS frame
+            queue_size: Events held while disconnected; the oldest are dropped when full
+            reconnect_interval: Seconds between connection attempts
+            timeout: Socket timeout for connecting and sending
+        """
+        self.family, self.address = parse_address(address)
+        self.agent = agent
+        self.batch_interval = batch_interval
+        self.max_batch = max_batch
+        self.queue_size = queue_size
+        self.reconnect_interval = reconnect_interval
+        self.timeout = timeout
+        
+        self._events = deque(maxlen=queue_size)  # Packed events waiting to be sent, oldest dropped first
+        self._urgent = False  # A trigger is waiting
+        self._areas_frame = None  # Last AREAS frame, resent on every new connection
+        self._areas_changed = False
+        self._condition = threading.Condition()
+        self._socket = None
+        self._announce = False  # The area table has not been sent over the current connection
+        self._next_connect = 0.0
+        self._running = False
+        self._worker = None
+        
+        # Counters
+        self.sent = 0  # Events written to the socket
+        self.batches = 0  # Writes
+        self.dropped = 0  # Events discarded while the queue was full or the connection failed
+        self.connects = 0
+    
+    def start(self):
+        """Start the sender thread"""
+        if self._running:
+            return
+        self._running = True
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+    
+    def stop(self, timeout=None):
+        """Stop the sender thread after it sends what is already queued"""
+        if not self._running:
+            return
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        self._worker.join(timeout)
+        if not self._worker.is_alive():
+            # Otherwise the worker is still sending and closes the connection when it finishes
+            self._close()
+    
+    def set_areas(self, areas):
+        """
+        Send the sound settings of the agent's areas
+        
+        Args:
+            areas: List of {"id", "sound_file", "volume"} dictionaries
+        """
+        with self._condition:
+            self._areas_frame = encode_areas(self.agent, areas)
+            self._areas_changed = True
+            self._condition.notify_all()
+    
+    def trigger(self, area_id, timestamp, color):
+        """Queue a trigger of an area and wake the sender"""
+        self._queue(EVENT.pack(EVENT_TRIGGER, area_id, timestamp, *color), True)
+    
+    def sample(self, area_id, timestamp, color):
+        """Queue a Pixel A color change of an area"""
+        self._queue(EVENT.pack(EVENT_SAMPLE, area_id, timestamp, *color), False)
+    
+    def queue_depth(self):
+        """Number of events waiting to be sent"""
+        return len(self._events)
+    
+    def _queue(self, event, urgent):
+        """Add a packed event; never blocks on the network"""
+        with self._condition:
+            events = self._events
+            if len(events) == self.queue_size:
+                # Appending pushes out the oldest event
+                self.dropped += 1
+            events.append(event)
+            if urgent:
+                self._urgent = True
+                self._condition.notify_all()
+            elif len(events) == 1:
+                # Start the batch interval
+                self._condition.notify_all()
+    
+    def _run(self):
+        """Send queued events in batches until stopped and drained, then close the connection"""
+        try:
+            self._send_loop()
+        finally:
+            self._close()
+    
+    def _send_loop(self):
+        """Send queued events in batches until stopped and drained"""
+        while True:
+            with self._condition:
+                while self._running and not self._events and not self._areas_changed:
+                    self._condition.wait()
+                if self._running and not self._urgent:
+                    # Let more samples join the batch, unless a trigger arrives first
+                    self._condition.wait(self.batch_interval)
+                if not self._running and not self._events:
+                    return
+                events = list(self._events)
+                self._events.clear()
+                self._urgent = False
+                send_areas = self._areas_changed
+                self._areas_changed = False
+                areas_frame = self._areas_frame
+            
+            if self._socket is not None and self._peer_closed():
+                # Reconnect instead of writing into a connection the aggregator closed
+                self._close()
+            if self._socket is None and not self._connect():
+                with self._condition:
+                    if not self._running:
+                        # Nobody to send the rest to
+                        self.dropped += len(events) + len(self._events)
+                        self._events.clear()
+                        return
+                    # Keep the events for the next attempt, oldest first
+                    self.dropped += max(0, len(events) + len(self._events) - self.queue_size)
+                    pending = deque(events, maxlen=self.queue_size)
+                    pending.extend(self._events)
+                    self._events = pending
+                    self._condition.wait(max(0.0, self._next_connect - time.monotonic()))
+                continue
+            
+            self._send(events, send_areas, areas_frame)
+    
+    def _send(self, events, send_areas, areas_frame):
+        """Write one batch over the open connection"""
+        chunks = []
+        if (send_areas or self._announce) and areas_frame is not None:
+            chunks.append(areas_frame)
+        for start in range(0, len(events), self.max_batch):
+            chunks.append(encode_events(events[start:start + self.max_batch]))
+        if not chunks:
+            return
+        try:
+            self._socket.sendall(b''.join(chunks))
+            self._announce = False
+            self.sent += len(events)
+            self.batches += 1
+        except OSError as e:
+            print(f"Error sending events to aggregator: {e}")
+            self._close()
+            with self._condition:
+                self.dropped += len(events)
+    
+    def _peer_closed(self):
+        """The aggregator never writes, so a readable socket means it closed the connection"""
+        try:
+            readable, _, _ = select.select([self._socket], [], [], 0)
+        except (OSError, ValueError):
+            return True
+        return bool(readable)
+    
+    def _connect(self):
+        """Open the connection, at most once per reconnect_interval"""
+        now = time.monotonic()
+        if now < self._next_connect:
+            return False
+        self._next_connect = now + self.reconnect_interval
+        sock = socket.socket(self.family, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.address)
+            if self.family != getattr(socket, 'AF_UNIX', None):
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        except OSError as e:
+            print(f"Error connecting to aggregator: {e}")
+            sock.close()
+            return False
+        self._socket = sock
+        self._announce = True
+        self.connects += 1
+        return True
+    
+    def _close(self):
+        """Close the connection"""
+        if self._socket is not None:
+            try:
+                self._socket.close()
+            except OSError:
+                pass
+            self._socket = None
+
+
+class CaptureAgent:
+    """Runs a PixelMonitor without the GUI and streams what it sees to an aggregator"""
+    
+    def __init__(self, address, areas, name=None, pixel_monitor=None):
+        """
+        Initialize capture agent
+        
+        Args:
+            address: Aggregator address, tcp://host:port or unix:///path
+            areas: AreaRegistry of the areas to monitor
+            name: Name shown by the aggregator, defaults to the host name
+            pixel_monitor: PixelMonitor to run, or None for a default one
+        """
+        self.areas = areas
+        self.name = name or socket.gethostname()
+        self.pixel_monitor = pixel_monitor or PixelMonitor()
+        self.sender = EventSender(address, self.name)
+    
+    def start(self):
+        """Send the area table and start monitoring"""
+        self.sender.set_areas([
+            {"id": area['id'], "sound_file": area['sound_file'], "volume": area['volume']}
+            for area in self.areas.snapshot()
+        ])
+        self.sender.start()
+        self.pixel_monitor.start_monitoring(self.areas, self._on_sample, self._on_trigger)
+    
+    def stop(self, timeout=2.0):
+        """Stop monitoring and send what is still queued"""
+        self.pixel_monitor.stop_monitoring()
+        self.sender.stop(timeout)
+    
+    def _on_sample(self, area_id, color):
+        """Forward a Pixel A color change; called on the monitor thread"""
+        self.sender.sample(area_id, time.time(), color)
+    
+    def _on_trigger(self, area):
+        """Forward a trigger with the sample that fired it; called on the monitor thread"""
+        history = self.pixel_monitor.get_history(area['id'])
+        sample = history.latest() if history else None
+        if sample:
+            self.sender.trigger(area['id'], sample[2], sample[1])
+        else:
+            self.sender.trigger(area['id'], time.time(), (0, 0, 0))
+
+
+def load_areas(path):
+    """
+    Read a saved layout file into an AreaRegistry without creating widgets
+    
+    Area IDs are the positions in the file, so they stay the same between runs.
+    """
+    with open(path, 'r') as f:
+        config = json.load(f)
+    if not isinstance(config, dict) or 'areas' not in config:
+        raise ValueError("Invalid configuration format")
+    
+    registry = AreaRegistry()
+    with registry.batch():
+        for area_id, area_config in enumerate(config['areas']):
+            registry.add(AreaRegistry.from_layout(area_id, area_config))
+    return registry
+
+
+def run_agent(address, layout_path, name=None):
+    """Monitor a layout file's areas headless until interrupted"""
+    from ..config import SettingsManager
+    settings_manager = SettingsManager()
+    areas = load_areas(layout_path)
+    for area in areas.snapshot():
+        if area['problem']:
+            print(f"Area {area['id'] + 1} is skipped: {area['problem']}")
+    
+    pixel_monitor = PixelMonitor(
+        check_interval=settings_manager.get_check_interval(),
+        event_driven=settings_manager.get_event_driven_capture(),
+        parallel_capture=settings_manager.get_parallel_capture()
+    )
+    # Without the GUI, profiling is toggled with SIGUSR1 only
+    profiler = SessionProfiler()
+    pixel_monitor.profiler = profiler
+    profiler.install_signal_toggle()
+    
+    agent = CaptureAgent(address, areas, name=name, pixel_monitor=pixel_monitor)
+    agent.start()
+    print(f"Agent {agent.name} monitoring {len(areas.snapshot().ready())} areas, sending to {address}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        agent.stop()
@@ -0,0 +1,303 @@
+"""Aggregator merging the event streams of many capture agents"""
+
+import os
+import json
+import time
+import socket
+import selectors
+import threading
+from .protocol import (parse_address, FRAME_HEADER, FRAME_AREAS, FRAME_EVENTS, EVENT,
+                       EVENT_TRIGGER, EVENT_SAMPLE, MAX_FRAME_SIZE, PROTOCOL_VERSION)
+
+
+SOUND_CONCURRENCY = 2  # Sounds prepared at once by run_aggregator
+
+
+class Aggregator:
+    """
+    Receives the event streams of capture agents and publishes their triggers
+    
+    One thread serves every connection through a selector, so many agents
+    cost a socket each rather than a thread each. Frames are cut from a
+    per-connection buffer and their events unpacked with struct.iter_unpack;
+    triggers are handed to an AlertBus, so playing sounds never holds up
+    reading the streams.
+    """
+    
+    def __init__(self, address, alert_bus=None, sound_dir=None, recv_size=256 * 1024):
+        """
+        Initialize aggregator
+        
+        Args:
+            address: Address to listen on, tcp://host:port or unix:///path
+            alert_bus: AlertBus triggers are published to, or None to only count them
+            sound_dir: Directory sound files named by agents are played from, defaults to the working directory
+            recv_size: Bytes read from a connection at once
+        """
+        self.family, self.address = parse_address(address)
+        self.alert_bus = alert_bus
+        self.sound_dir = os.path.abspath(sound_dir or os.getcwd())
+        self.recv_size = recv_size
+        self.agents = {}  # Agent name -> _Agent with its areas and latest colors
+        self._selector = None
+        self._listener = None
+        self._running = False
+        self._thread = None
+        
+        # Counters
+        self.connections = 0  # Open connections
+        self.frames = 0
+        self.events = 0
+        self.triggers = 0
+        self.samples = 0
+        self.bytes_received = 0
+        self.rejected = 0  # Connections closed for sending malformed frames
+        self.lag = 0.0  # Smoothed seconds from a batch's newest sample to its arrival
+        self.max_lag = 0.0  # Longest time from a sample to its arrival
+    
+    def start(self):
+        """Listen and serve connections in a background thread"""
+        if self._running:
+            return
+        if self.family == getattr(socket, 'AF_UNIX', None) and os.path.exists(self.address):
+            os.unlink(self.address)  # Left behind by an earlier run
+        listener = socket.socket(self.family, socket.SOCK_STREAM)
+        if self.family != getattr(socket, 'AF_UNIX', None):
+            listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        listener.bind(self.address)
+        listener.listen(128)
+        listener.setblocking(False)
+        if self.family != getattr(socket, 'AF_UNIX', None):
+            self.address = listener.getsockname()[:2]  # Port 0 picks a free port
+        
+        self._listener = listener
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(listener, selectors.EVENT_READ, None)
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+    
+    def stop(self, timeout=2.0):
+        """Close every connection and stop listening"""
+        if not self._running:
+            return
+        self._running = False
+        self._thread.join(timeout)
+    
+    def _run(self):
+        """Serve the listener and all connections"""
+        try:
+            while self._running:
+                for key, mask in self._selector.select(0.2):
+                    if key.data is None:
+                        self._accept()
+                    else:
+                        self._read(key.data)
+        finally:
+            for key in list(self._selector.get_map().values()):
+                if key.data is not None:
+                    self._close(key.data)
+            self._selector.close()
+            self._listener.close()
+            if self.family == getattr(socket, 'AF_UNIX', None):
+                try:
+                    os.unlink(self.address)
+                except OSError:
+                    pass
+    
+    def _accept(self):
+        """Accept every pending connection"""
+        while True:
+            try:
+                sock, peer = self._listener.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError as e:
+                print(f"Error accepting agent connection: {e}")
+                return
+            sock.setblocking(False)
+            connection = _Connection(sock, peer or self.address)
+            self._selector.register(sock, selectors.EVENT_READ, connection)
+            self.connections += 1
+    
+    def _read(self, connection):
+        """Read what arrived on a connection and handle every complete frame"""
+        try:
+            data = connection.sock.recv(self.recv_size)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            data = b''
+        if not data:
+            self._close(connection)
+            return
+        self.bytes_received += len(data)
+        
+        buffer = connection.buffer
+        buffer += data
+        header = FRAME_HEADER.size
+        offset = 0
+        while len(buffer) - offset >= header:
+            kind, length = FRAME_HEADER.unpack_from(buffer, offset)
+            if length > MAX_FRAME_SIZE:
+                self._reject(connection, f"frame of {length} bytes")
+                return
+            end = offset + header + length
+            if end > len(buffer):
+                break
+            payload = bytes(buffer[offset + header:end])
+            offset = end
+            self.frames += 1
+            if kind == FRAME_EVENTS:
+                if not self._handle_events(connection, payload):
+                    return
+            elif kind == FRAME_AREAS:
+                if not self._handle_areas(connection, payload):
+                    return
+            # Unknown frame types are skipped, so newer agents can add some
+        if offset:
+            del buffer[:offset]
+    
+    def _handle_areas(self, connection, payload):
+        """Register an agent and the sound settings of its areas"""
+        try:
+            message = json.loads(payload)
+            version = message.get("version")
+            name = str(message["agent"])
+            areas = message["areas"]
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            self._reject(connection, f"area table ({e})")
+            return False
+        if version != PROTOCOL_VERSION:
+            self._reject(connection, f"protocol version {version}")
+            return False
+        
+        agent = self.agents.get(name)
+        if agent is None:
+            agent = self.agents[name] = _Agent(name)
+        if connection.agent is not agent:
+            print(f"Agent {name} connected from {connection.peer}")
+        connection.agent = agent
+        agent.areas = {}
+        for area in areas:
+            try:
+                area_id = int(area["id"])
+            except (KeyError, TypeError, ValueError):
+                continue
+            agent.areas[area_id] = {
+                'id': (name, area_id),
+                'agent': name,
+                'sound_file': self._sound_path(area.get("sound_file")),
+                'volume': area.get("volume", 50)
+            }
+        return True
+    
+    def _handle_events(self, connection, payload):
+        """Record samples and publish triggers of an EVENTS frame"""
+        agent = connection.agent
+        if agent is None or len(payload) % EVENT.size:
+            self._reject(connection, "events before the area table" if agent is None else "truncated events")
+            return False
+        if not payload:
+            return True
+        
+        now = time.time()
+        colors = agent.colors
+        bus = self.alert_bus
+        first = None
+        count = 0
+        for kind, area_id, timestamp, r, g, b in EVENT.iter_unpack(payload):
+            if first is None:
+                first = timestamp
+            count += 1
+            if kind == EVENT_SAMPLE:
+                colors[area_id] = (timestamp, (r, g, b))
+                self.samples += 1
+            elif kind == EVENT_TRIGGER:
+                colors[area_id] = (timestamp, (r, g, b))
+                self.triggers += 1
+                agent.triggers += 1
+                area = agent.areas.get(area_id)
+                if area is not None and bus is not None:
+                    bus.publish(area, color=(r, g, b), sampled_at=timestamp)
+        self.events += count
+        agent.last_seen = now
+        
+        # Clocks of other machines may differ; the lag is exact for local agents
+        self.lag = 0.9 * self.lag + 0.1 * (now - timestamp)
+        self.max_lag = max(self.max_lag, now - first)
+        return True
+    
+    def _sound_path(self, sound_file):
+        """Resolve a sound file named by an agent inside sound_dir"""
+        if not sound_file:
+            return None
+        # Only the file name is used, so agents cannot point at arbitrary files
+        name = os.path.basename(str(sound_file).replace('\\', '/'))
+        return os.path.join(self.sound_dir, name) if name else None
+    
+    def _reject(self, connection, reason):
+        """Close a connection that sent something unreadable"""
+        print(f"Closing agent connection from {connection.peer}: unexpected {reason}")
+        self.rejected += 1
+        self._close(connection)
+    
+    def _close(self, connection):
+        """Close a connection"""
+        try:
+            self._selector.unregister(connection.sock)
+        except (KeyError, ValueError):
+            return
+        connection.sock.close()
+        self.connections -= 1
+        if connection.agent is not None:
+            print(f"Agent {connection.agent.name} disconnected")
+
+
+class _Agent:
+    """What the aggregator knows about one agent"""
+    
+    def __init__(self, name):
+        self.name = name
+        self.areas = {}  # Area id -> area dictionary published with its triggers
+        self.colors = {}  # Area id -> (timestamp, RGB) of the latest Pixel A sample
+        self.triggers = 0
+        self.last_seen = None  # time.time() of the last events received
+
+
+class _Connection:
+    """A connected agent socket and its unparsed bytes"""
+    
+    def __init__(self, sock, peer):
+        self.sock = sock
+        self.peer = peer
+        self.buffer = bytearray()
+        self.agent = None  # _Agent, once the area table arrived
+
+
+def run_aggregator(address, sound_dir=None):
+    """Play the triggers of every connected agent until interrupted"""
+    from ..audio import AudioPlayer
+    from ..alerts import AlertBus
+    from ..config import SettingsManager
+    settings_manager = SettingsManager()
+    try:
+        alert_bus = AlertBus(queue_size=settings_manager.get_alert_queue_size(),
+                             policy=settings_manager.get_alert_overflow())
+    except ValueError as e:
+        print(f"Error configuring alert queue: {e}")
+        alert_bus = AlertBus(queue_size=settings_manager.get_alert_queue_size())
+    alert_bus.add_sink('sound', lambda alert: AudioPlayer.play_sound_sync(alert.area), limit=SOUND_CONCURRENCY)
+    alert_bus.start()
+    
+    aggregator = Aggregator(address, alert_bus=alert_bus, sound_dir=sound_dir)
+    aggregator.start()
+    print(f"Aggregator listening on {address}, playing sounds from {aggregator.sound_dir}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        aggregator.stop()
+        alert_bus.stop(2.0)
@@ -0,0 +1,62 @@
+"""Binary wire format between capture agents and the aggregator"""
+
+import json
+import socket
+import struct
+
+
+PROTOCOL_VERSION = 1
+
+# Every frame starts with its type and payload length
+FRAME_HEADER = struct.Struct('<BI')
+FRAME_AREAS = 1  # UTF-8 JSON: agent name and the sound settings of its areas
+FRAME_EVENTS = 2  # Packed EVENT structs
+
+# One event: kind, area id, time.time() of the sample, RGB of Pixel A
+EVENT = struct.Struct('<BIdBBB')
+EVENT_TRIGGER = 1
+EVENT_SAMPLE = 2
+
+MAX_FRAME_SIZE = 1 << 20  # Larger frames are treated as a broken stream
+
+
+def parse_address(address):
+    """
+    Parse an agent or aggregator address
+    
+    Args:
+        address: tcp://host:port or unix:///path/to/socket
+    
+    Returns:
+        (socket family, address for connect/bind)
+    """
+    if address.startswith('unix://'):
+        if not hasattr(socket, 'AF_UNIX'):
+            raise ValueError("Unix sockets are not available on this platform, use tcp://host:port")
+        return socket.AF_UNIX, address[len('unix://'):]
+    if address.startswith('tcp://'):
+        host, _, port = address[len('tcp://'):].rpartition(':')
+        if not host or not port.isdigit():
+            raise ValueError(f"TCP address must be tcp://host:port, got {address!r}")
+        host = host.strip('[]')  # [::1]:9470
+        family = socket.AF_INET6 if ':' in host else socket.AF_INET
+        return family, (host, int(port))
+    raise ValueError(f"Address must start with tcp:// or unix://, got {address!r}")
+
+
+def encode_areas(agent, areas):
+    """
+    Build an AREAS frame
+    
+    Args:
+        agent: Name of the agent
+        areas: List of {"id", "sound_file", "volume"} dictionaries
+    """
+    payload = json.dumps({"version": PROTOCOL_VERSION, "agent": agent, "areas": areas}).encode('utf-8')
+    return FRAME_HEADER.pack(FRAME_AREAS, len(payload)) + payload
+
+
+def encode_events(events):
+    """Build an EVENTS frame from events already packed with EVENT"""
+    payload = b''.join(events)
+    return FRAME_HEADER.pack(FRAME_EVENTS, len(payload)) + payload
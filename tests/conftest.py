@@ -0,0 +1,10 @@
+"""Shared test setup: import the app from the repository root on any platform"""
+
+import os
+import sys
+import types
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+# winsound only exists on Windows; the audio player imports it at module level
+sys.modules.setdefault('winsound', types.ModuleType('winsound'))
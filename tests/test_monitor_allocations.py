@@ -0,0 +1,143 @@
+"""Check that the steady-state monitor tick does not allocate
+
+Drives PixelMonitor's sampling and evaluation with a capture backend that
+reads from an in-memory screen, so no display is needed. The ticks are
+measured with magnifier previews off and with the app's default
+magnifier_radius between preview refreshes:
+    
+    python -m pytest tests
+
+Fails if the ticks retain or transiently use more memory than the budget
+after warming up, e.g. after a change reintroduces per-tick dicts or tuples.
+"""
+
+import time
+import tracemalloc
+
+import pytest
+
+from src.pixel_monitor.monitor.area_registry import AreaRegistry
+from src.pixel_monitor.monitor.capture import CaptureFrame
+from src.pixel_monitor.monitor.pixel_monitor import PixelMonitor
+
+
+AREAS = 50
+TICKS = 2000
+RETAINED_BUDGET = 1024  # Bytes still allocated after all ticks
+PEAK_BUDGET = 4096  # Bytes allocated at once during any tick
+MAGNIFIER_RADIUS = 4  # Default of SettingsManager.get_magnifier_radius
+
+
+class _Value:
+    """Stands in for a Tk variable or entry"""
+    
+    def __init__(self, value):
+        self.value = value
+    
+    def get(self):
+        return self.value
+
+
+class MemoryCapture:
+    """Capture backend reading a fixed in-memory RGB screen"""
+    
+    name = 'memory'
+    
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.screen = bytearray(width * height * 3)
+        self._view = memoryview(self.screen)
+        self._frames = {}  # (width, height) -> reused CaptureFrame, like the SHM backend
+    
+    def grab(self, left, top, width, height):
+        if left < 0 or top < 0 or left + width > self.width or top + height > self.height:
+            return None
+        key = (width, height)
+        frame = self._frames.get(key)
+        if frame is None:
+            frame = self._frames[key] = CaptureFrame(0, 0, width, height, bytearray(width * height * 3),
+                                                     width * 3, 3, (0, 1, 2))
+        data = frame.data
+        screen = self._view
+        row_bytes = width * 3
+        for row in range(height):
+            i = ((top + row) * self.width + left) * 3
+            data[row * row_bytes:(row + 1) * row_bytes] = screen[i:i + row_bytes]
+        frame.left = left
+        frame.top = top
+        return frame
+    
+    def read_pixel_into(self, x, y, buffer, offset):
+        i = (y * self.width + x) * 3
+        screen = self.screen
+        buffer[offset] = screen[i]
+        buffer[offset + 1] = screen[i + 1]
+        buffer[offset + 2] = screen[i + 2]
+        return True
+    
+    def close(self):
+        pass
+
+
+def create_areas(count, margin=0):
+    """Areas mixing the legacy Pixel A/B behavior with custom rules, margin pixels from the screen edges"""
+    areas = AreaRegistry()
+    for area_id in range(count):
+        x = margin + area_id
+        area = {
+            'id': area_id,
+            'coordinates': (x, margin),
+            'baseline_color': (0, 0, 0),
+            'use_condition': _Value(area_id % 2 == 0),
+            'coordinates_condition': (x, margin + 1),
+            'condition_color': (0, 0, 0),
+            'pixels': {'C': {'coordinates': (x, margin + 2), 'color': (0, 0, 0)}},
+            'rule': {"at_least": 1, "of": [{"changed": "A"}, {"changed": "C"}]} if area_id % 3 == 0 else None,
+            'sound_file': 'alert.wav',
+            'ui': {'threshold_entry': _Value("30")}
+        }
+        areas.add(area)
+    return areas
+
+
+@pytest.mark.parametrize('magnifier_radius', [0, MAGNIFIER_RADIUS])
+def test_tick_allocations(magnifier_radius):
+    """Steady-state ticks stay within the retained and peak allocation budgets"""
+    # Keep every magnified neighbourhood on screen
+    margin = magnifier_radius
+    monitor = PixelMonitor(magnifier_radius=magnifier_radius)
+    monitor.areas = create_areas(AREAS, margin)
+    monitor.update_callback = lambda area_id, color: None
+    monitor.play_sound_callback = lambda area: None
+    capture = MemoryCapture(AREAS + 2 * margin, 3 + 2 * margin)
+    
+    def tick():
+        monitor._sample_coordinates(capture)
+        monitor._evaluate_areas()
+    
+    monitor._rebuild_plan(monitor.areas.snapshot())
+    # Warm up: first display updates, history growth to capacity, interned ints
+    for _ in range(monitor.history_size + 10):
+        tick()
+    
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        start = time.perf_counter()
+        for _ in range(TICKS):
+            tick()
+        elapsed = time.perf_counter() - start
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    
+    retained = max(current - before, 0)
+    transient = max(peak - before, 0)
+    # Shown with pytest -s
+    print(f"magnifier_radius {magnifier_radius}: {AREAS} areas, {len(monitor._plan.coordinates)} pixels: "
+          f"{elapsed / TICKS * 1e6:.1f} us/tick (traced), "
+          f"retained {retained} B, peak {transient} B")
+    assert retained <= RETAINED_BUDGET, f"ticks retained {retained} B (budget {RETAINED_BUDGET} B)"
+    assert transient <= PEAK_BUDGET, f"ticks peaked at {transient} B (budget {PEAK_BUDGET} B)"